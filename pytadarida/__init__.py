@@ -14,6 +14,8 @@ Functions
 run_tadarida
     Run Tadarida-D on a list of .wav files or a directory containing .wav
     files.
+run_tadarida_parallel
+    Run Tadarida-D on many files using several parallel processes.
 
 Classes
 -------
@@ -23,12 +25,14 @@ RunStatus
 
 from pytadarida.commands import run_tadarida
 from pytadarida.logs import RunStatus
+from pytadarida.parallel import run_tadarida_parallel
 
 __version__ = "0.1.0"
 
 
 __all__ = [
     "run_tadarida",
+    "run_tadarida_parallel",
     "RunStatus",
     "__version__",
 ]
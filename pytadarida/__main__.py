@@ -0,0 +1,7 @@
+"""Run the pytadarida command line interface with python -m pytadarida."""
+import sys
+
+from pytadarida.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
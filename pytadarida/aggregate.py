@@ -0,0 +1,640 @@
+"""Summaries of detections that are updated batch by batch.
+
+Reports often only need aggregates, such as the number of calls and the
+frequency percentiles of each file, hour or night, and keeping every
+detection of a large run in memory to compute them is wasteful. A
+DetectionSummary folds the detections of each batch into running
+statistics of each group, with vectorized grouped reductions, so the
+detections can be dropped as soon as they are summarized.
+
+For every group and column, the summary keeps the count, sum, minimum and
+maximum of the values, and a histogram with fixed bins from which
+percentiles are estimated. Histograms are stored sparsely, so their size
+depends on the number of distinct bins filled in each group rather than on
+the number of detections. Summaries of disjoint shards of a run, possibly
+computed on different machines, can be saved and merged into the summary
+of the whole run.
+"""
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from pytadarida.batching import AdaptiveBatcher
+from pytadarida.logs import RunStatus, merge_run_status
+from pytadarida.parallel import BatchResult, iter_batch_results
+from pytadarida.priority import ProcessPriority
+from pytadarida.scheduling import TimingHistory
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pytadarida.metrics import MetricsRegistry
+    from pytadarida.normalize import DedupMode
+    from pytadarida.screening import EnergyGate
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "DEFAULT_EDGES",
+    "DetectionSummary",
+    "recording_start",
+    "summarize_tadarida",
+]
+
+
+DEFAULT_EDGES: Dict[str, np.ndarray] = {
+    "FreqMP": np.arange(0, 250.5, 0.5),
+    "Fmin": np.arange(0, 250.5, 0.5),
+    "Fmax": np.arange(0, 250.5, 0.5),
+    "Dur": np.arange(0, 100.25, 0.25),
+}
+"""Histogram bin edges of the summarized columns: 0.5 kHz and 0.25 ms."""
+
+TIMESTAMP_PATTERN = re.compile(r"(\d{8})[_-]?(\d{6})")
+"""Date and time in file names, as written by most recorders."""
+
+NIGHT_OFFSET = timedelta(hours=12)
+"""Recordings made before noon belong to the night of the previous day."""
+
+GroupBy = Union[Literal["file", "hour", "night"], Callable[[Path], str]]
+
+
+def recording_start(path: PathLike) -> datetime:
+    """Get the start time of a recording.
+
+    The time is read from the file name, in the YYYYMMDD_HHMMSS format used
+    by most recorders. If the name has no timestamp, the modification time
+    of the file is used.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+
+    Returns
+    -------
+    datetime
+
+    Raises
+    ------
+    FileNotFoundError
+        If the name has no timestamp and the file does not exist.
+
+    """
+    match = TIMESTAMP_PATTERN.search(Path(path).name)
+    if match is not None:
+        try:
+            return datetime.strptime("".join(match.groups()), "%Y%m%d%H%M%S")
+        except ValueError:
+            pass
+
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _hour(path: Path) -> str:
+    return recording_start(path).strftime("%Y-%m-%dT%H:00")
+
+
+def _night(path: Path) -> str:
+    return (recording_start(path) - NIGHT_OFFSET).date().isoformat()
+
+
+GROUP_KEYS: Dict[str, Tuple[str, Callable[[Path], str]]] = {
+    "file": ("wav", str),
+    "hour": ("hour", _hour),
+    "night": ("night", _night),
+}
+"""Name of the group column and key function of each grouping."""
+
+
+class _SparseCounts:
+    """Counts indexed by integer codes, stored as sorted arrays.
+
+    New counts are buffered and merged into the sorted arrays once the
+    buffer is as large as the arrays, so adding a batch does not cost a
+    pass over all the counts.
+    """
+
+    def __init__(self):
+        self.codes = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+
+    def add(self, codes: np.ndarray, counts: Optional[np.ndarray] = None):
+        """Buffer counts of codes, by default one for each code."""
+        if counts is None:
+            counts = np.ones(len(codes), dtype=np.int64)
+
+        self._pending.append((codes, counts))
+        self._pending_size += len(codes)
+        if self._pending_size > max(len(self.codes), 4096):
+            self.compact()
+
+    def compact(self) -> "_SparseCounts":
+        """Merge the buffered counts into the sorted arrays."""
+        if not self._pending:
+            return self
+
+        codes = np.concatenate([self.codes, *[c for c, _ in self._pending]])
+        counts = np.concatenate([self.counts, *[n for _, n in self._pending]])
+        self.codes, inverse = np.unique(codes, return_inverse=True)
+        self.counts = np.bincount(
+            inverse.ravel(), weights=counts, minlength=len(self.codes)
+        ).astype(np.int64)
+
+        self._pending = []
+        self._pending_size = 0
+        return self
+
+
+class DetectionSummary:  # pylint: disable=too-many-instance-attributes
+    """Running statistics of detections, per group.
+
+    Parameters
+    ----------
+    by : {"file", "hour", "night"} or callable, optional
+        How detections are grouped: by .wav file, by hour or by night of
+        the start of the recording (see recording_start), or by the string
+        returned by a function of the .wav file.
+    edges : dict of str to list of float, optional
+        The columns to summarize, and the edges of the histogram bins used
+        to estimate their percentiles. Values outside of the edges are
+        counted in the first or last bin. Defaults to DEFAULT_EDGES.
+    """
+
+    def __init__(
+        self,
+        by: GroupBy = "file",
+        edges: Optional[Mapping[str, Sequence[float]]] = None,
+    ):
+        if callable(by):
+            self.key_column, self.key_function = "group", by
+        elif by in GROUP_KEYS:
+            self.key_column, self.key_function = GROUP_KEYS[by]
+        else:
+            raise ValueError(
+                f"Unknown grouping {by!r}, use one of {sorted(GROUP_KEYS)} "
+                "or a function."
+            )
+
+        if edges is None:
+            edges = DEFAULT_EDGES
+
+        self.edges = {
+            column: np.asarray(values, dtype=np.float64)
+            for column, values in edges.items()
+        }
+        for column, values in self.edges.items():
+            if len(values) < 2 or np.any(np.diff(values) <= 0):
+                raise ValueError(
+                    f"The edges of {column} must be at least two increasing "
+                    "values."
+                )
+
+        self.keys: List[str] = []
+        self._index: Dict[str, int] = {}
+
+        self.files = np.zeros(0, dtype=np.int64)
+        self.calls = np.zeros(0, dtype=np.int64)
+        self.valid = {column: np.zeros(0, dtype=np.int64) for column in edges}
+        self.sums = {column: np.zeros(0) for column in edges}
+        self.minima = {column: np.zeros(0) for column in edges}
+        self.maxima = {column: np.zeros(0) for column in edges}
+        self.histograms = {column: _SparseCounts() for column in edges}
+
+    @property
+    def columns(self) -> List[str]:
+        """The summarized columns."""
+        return list(self.edges)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _group_ids(self, keys: Iterable[str]) -> np.ndarray:
+        """Get the index of each group, adding the new ones."""
+        ids = []
+        for key in keys:
+            index = self._index.get(key)
+            if index is None:
+                index = self._index[key] = len(self.keys)
+                self.keys.append(key)
+            ids.append(index)
+
+        missing = len(self.keys) - len(self.calls)
+        if missing > 0:
+            self.files = np.concatenate([self.files, np.zeros(missing, int)])
+            self.calls = np.concatenate([self.calls, np.zeros(missing, int)])
+            for column in self.edges:
+                self.valid[column] = np.concatenate(
+                    [self.valid[column], np.zeros(missing, int)]
+                )
+                self.sums[column] = np.concatenate(
+                    [self.sums[column], np.zeros(missing)]
+                )
+                self.minima[column] = np.concatenate(
+                    [self.minima[column], np.full(missing, np.inf)]
+                )
+                self.maxima[column] = np.concatenate(
+                    [self.maxima[column], np.full(missing, -np.inf)]
+                )
+
+        return np.asarray(ids, dtype=np.int64)
+
+    def add(  # pylint: disable=too-many-locals
+        self,
+        detections: "pd.DataFrame",
+        files: Iterable[PathLike] = (),
+    ):
+        """Fold detections into the summary.
+
+        Parameters
+        ----------
+        detections : pd.DataFrame
+            Detections with a "wav" column, as returned by run_tadarida.
+            Summarized columns that are missing are ignored.
+        files : list of str or os.PathLike, optional
+            The processed .wav files, including those without detections,
+            which are counted in the files of their group. By default, the
+            files of the detections are counted, so all the detections of a
+            file must be added at once.
+
+        """
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        has_rows = len(detections.columns) > 0 and len(detections) > 0
+
+        files = [Path(path) for path in files]
+        if not files and has_rows:
+            files = list(pd.unique(detections["wav"]))
+
+        file_groups = self._group_ids(self.key_function(path) for path in files)
+        np.add.at(self.files, file_groups, 1)
+
+        if not has_rows:
+            return
+
+        codes, wavs = pd.factorize(detections["wav"])
+        groups = self._group_ids(self.key_function(Path(wav)) for wav in wavs)[
+            codes
+        ]
+
+        self.calls += np.bincount(groups, minlength=len(self.calls))
+
+        for column, edges in self.edges.items():
+            if column not in detections.columns:
+                continue
+
+            values = detections[column].to_numpy(dtype=np.float64)
+            finite = np.isfinite(values)
+            values, column_groups = values[finite], groups[finite]
+
+            size = len(self.calls)
+            self.valid[column] += np.bincount(column_groups, minlength=size)
+            self.sums[column] += np.bincount(
+                column_groups, weights=values, minlength=size
+            )
+            np.minimum.at(self.minima[column], column_groups, values)
+            np.maximum.at(self.maxima[column], column_groups, values)
+
+            bins = np.clip(
+                np.searchsorted(edges, values, side="right") - 1,
+                0,
+                len(edges) - 2,
+            )
+            self.histograms[column].add(column_groups * (len(edges) - 1) + bins)
+
+    def add_result(self, result: BatchResult):
+        """Fold the result of a batch into the summary, see add."""
+        self.add(result.detections, files=result.files)
+
+    def merge(self, other: "DetectionSummary") -> "DetectionSummary":
+        """Add the statistics of another summary to this one.
+
+        The summaries must be of disjoint sets of files, with the same
+        columns and edges.
+
+        Parameters
+        ----------
+        other : DetectionSummary
+
+        Returns
+        -------
+        DetectionSummary
+            This summary, updated.
+
+        Raises
+        ------
+        ValueError
+            If the summaries have different columns or edges.
+
+        """
+        if self.key_column != other.key_column or set(self.edges) != set(
+            other.edges
+        ):
+            raise ValueError("Can not merge summaries of different columns.")
+
+        for column, edges in self.edges.items():
+            if not np.array_equal(edges, other.edges[column]):
+                raise ValueError(f"The edges of {column} are different.")
+
+        groups = self._group_ids(other.keys)
+        np.add.at(self.files, groups, other.files)
+        np.add.at(self.calls, groups, other.calls)
+
+        for column, edges in self.edges.items():
+            np.add.at(self.valid[column], groups, other.valid[column])
+            np.add.at(self.sums[column], groups, other.sums[column])
+            np.minimum.at(self.minima[column], groups, other.minima[column])
+            np.maximum.at(self.maxima[column], groups, other.maxima[column])
+
+            histogram = other.histograms[column].compact()
+            num_bins = len(edges) - 1
+            self.histograms[column].add(
+                groups[histogram.codes // num_bins] * num_bins
+                + histogram.codes % num_bins,
+                histogram.counts,
+            )
+
+        return self
+
+    def percentiles(  # pylint: disable=too-many-locals
+        self, column: str, percentile: float
+    ) -> np.ndarray:
+        """Estimate a percentile of a column in every group.
+
+        The value is interpolated linearly within the histogram bin that
+        holds the percentile, so it is accurate to the width of the bins.
+
+        Parameters
+        ----------
+        column : str
+        percentile : float
+            Between 0 and 100.
+
+        Returns
+        -------
+        np.ndarray
+            The percentile of each group, in the order of keys. NaN for
+            groups without values.
+
+        """
+        edges = self.edges[column]
+        num_bins = len(edges) - 1
+        histogram = self.histograms[column].compact()
+
+        result = np.full(len(self.keys), np.nan)
+        if not histogram.codes.size:
+            return result
+
+        cumulative = np.cumsum(histogram.counts)
+        code_groups = histogram.codes // num_bins
+
+        groups = np.arange(len(self.keys))
+        starts = np.searchsorted(code_groups, groups, side="left")
+        ends = np.searchsorted(code_groups, groups, side="right")
+        has_values = ends > starts
+
+        groups, starts, ends = (
+            groups[has_values],
+            starts[has_values],
+            ends[has_values],
+        )
+        before_group = np.where(starts > 0, cumulative[starts - 1], 0)
+        totals = cumulative[ends - 1] - before_group
+        targets = before_group + percentile / 100 * totals
+
+        positions = np.clip(
+            np.searchsorted(cumulative, targets, side="left"),
+            starts,
+            ends - 1,
+        )
+        before = np.where(positions > 0, cumulative[positions - 1], 0)
+        fraction = np.clip(
+            (targets - before) / histogram.counts[positions], 0, 1
+        )
+
+        bins = histogram.codes[positions] % num_bins
+        result[groups] = edges[bins] + fraction * (
+            edges[bins + 1] - edges[bins]
+        )
+        return result
+
+    def to_dataframe(
+        self,
+        percentiles: Sequence[float] = (5, 50, 95),
+    ) -> "pd.DataFrame":
+        """Get the summary of each group.
+
+        Parameters
+        ----------
+        percentiles : list of float, optional
+            The percentiles of each column to estimate.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per group, with the number of files and calls, and the
+            mean, minimum, maximum and percentiles of each column (for
+            instance FreqMP_mean or FreqMP_p50).
+
+        """
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        summary = {
+            self.key_column: list(self.keys),
+            "files": self.files,
+            "calls": self.calls,
+        }
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for column in self.edges:
+                has_values = self.valid[column] > 0
+                summary[f"{column}_mean"] = np.where(
+                    has_values, self.sums[column] / self.valid[column], np.nan
+                )
+                summary[f"{column}_min"] = np.where(
+                    has_values, self.minima[column], np.nan
+                )
+                summary[f"{column}_max"] = np.where(
+                    has_values, self.maxima[column], np.nan
+                )
+                for percentile in percentiles:
+                    summary[f"{column}_p{percentile:g}"] = self.percentiles(
+                        column, percentile
+                    )
+
+        return pd.DataFrame(summary)
+
+    def save(self, path: PathLike):
+        """Save the summary to a .npz file, to be merged later.
+
+        Groupings by function can not be saved, only their keys: pass the
+        function again to load.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+        """
+        arrays = {
+            "key_column": np.array(self.key_column),
+            "keys": np.array(self.keys, dtype=str),
+            "files": self.files,
+            "calls": self.calls,
+            "columns": np.array(self.columns, dtype=str),
+        }
+        for index, column in enumerate(self.edges):
+            histogram = self.histograms[column].compact()
+            arrays[f"edges_{index}"] = self.edges[column]
+            arrays[f"valid_{index}"] = self.valid[column]
+            arrays[f"sums_{index}"] = self.sums[column]
+            arrays[f"minima_{index}"] = self.minima[column]
+            arrays[f"maxima_{index}"] = self.maxima[column]
+            arrays[f"codes_{index}"] = histogram.codes
+            arrays[f"counts_{index}"] = histogram.counts
+
+        with open(path, "wb") as output:
+            np.savez(output, **arrays)
+
+    @classmethod
+    def load(
+        cls,
+        path: PathLike,
+        by: Optional[GroupBy] = None,
+    ) -> "DetectionSummary":
+        """Load a summary written by save.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+        by : {"file", "hour", "night"} or callable, optional
+            The grouping of the summary. Only needed for summaries grouped by
+            a function, to add detections to them.
+
+        Returns
+        -------
+        DetectionSummary
+
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            data = {name: np.asarray(arrays[name]) for name in arrays.files}
+
+        columns: List[str] = data["columns"].tolist()
+        key_column = str(data["key_column"])
+        if by is None:
+            by = {key: name for name, (key, _) in GROUP_KEYS.items()}.get(
+                key_column, "file"
+            )
+
+        summary = cls(
+            by=by,
+            edges={
+                column: data[f"edges_{index}"]
+                for index, column in enumerate(columns)
+            },
+        )
+        summary.key_column = key_column
+        summary.keys = data["keys"].tolist()
+        summary._index = {key: i for i, key in enumerate(summary.keys)}
+        summary.files = data["files"]
+        summary.calls = data["calls"]
+
+        for index, column in enumerate(columns):
+            summary.valid[column] = data[f"valid_{index}"]
+            summary.sums[column] = data[f"sums_{index}"]
+            summary.minima[column] = data[f"minima_{index}"]
+            summary.maxima[column] = data[f"maxima_{index}"]
+            summary.histograms[column].codes = data[f"codes_{index}"]
+            summary.histograms[column].counts = data[f"counts_{index}"]
+
+        return summary
+
+
+def summarize_tadarida(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    by: GroupBy = "file",
+    edges: Optional[Mapping[str, Sequence[float]]] = None,
+    processes: Optional[int] = None,
+    batch_size: Union[int, AdaptiveBatcher, None] = None,
+    history: Optional[TimingHistory] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    gate: Optional["EnergyGate"] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+    deduplicate: Optional["DedupMode"] = "path",
+) -> Tuple[DetectionSummary, RunStatus]:
+    """Run Tadarida-D in parallel and only keep a summary of the detections.
+
+    The detections of each batch are folded into the summary as soon as the
+    batch is done, then dropped.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    by, edges : optional
+        Grouping and summarized columns, see DetectionSummary.
+    processes, batch_size, history, priority, metrics : optional
+        Execution options, see run_tadarida_parallel.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    gate, deduplicate : optional
+        Input options, see run_tadarida_parallel.
+
+    Returns
+    -------
+    summary: DetectionSummary
+    status: RunStatus
+        The logs of all TadaridaD runs.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+
+    """
+    summary = DetectionSummary(by=by, edges=edges)
+
+    statuses = []
+    for result in iter_batch_results(
+        files,
+        processes=processes,
+        batch_size=batch_size,
+        history=history,
+        threads=threads,
+        time_expansion=time_expansion,
+        features=features,
+        frequency_band=frequency_band,
+        priority=priority,
+        gate=gate,
+        metrics=metrics,
+        deduplicate=deduplicate,
+    ):
+        summary.add_result(result)
+        statuses.append(result.status)
+
+    return summary, merge_run_status(statuses)
@@ -0,0 +1,324 @@
+"""Run Tadarida-D on zip and tar archives of recordings.
+
+Recordings often come in large zip or tar archives. Instead of extracting a
+whole archive before processing it, run_tadarida_archive extracts its .wav
+members in a background thread, a batch at a time, into a staging directory.
+Each batch is processed by TadaridaD as soon as it is extracted, while the
+next members are being extracted, and its staged files are deleted as soon
+as it is done.
+
+At most max_staged batches wait in the staging directory, so the space used
+does not depend on the size of the archive. On Linux, staging in /dev/shm
+keeps the extracted recordings in memory.
+
+Detections are keyed by the name of their member in the archive: the wav
+column holds the member path, and the Filename column its file name.
+"""
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pytadarida.configs import FILENAME_COLUMN
+from pytadarida.logs import RunStatus, merge_run_status
+from pytadarida.priority import ProcessPriority
+from pytadarida.profiling import PhaseHook
+from pytadarida.runner import run_wav_files
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pytadarida.metrics import MetricsRegistry
+    from pytadarida.screening import EnergyGate
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "iter_wav_members",
+    "run_tadarida_archive",
+]
+
+
+DEFAULT_BATCH_SIZE = 50
+"""Number of members extracted and processed together."""
+
+PUT_TIMEOUT = 0.1
+"""Time, in seconds, between checks that the run was not stopped."""
+
+
+def _is_wav(name: str) -> bool:
+    return name.lower().endswith(".wav")
+
+
+def iter_wav_members(archive: PathLike) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Iterate over the .wav files of an archive, in the order they are stored.
+
+    Tar archives, compressed or not, are read sequentially in a single pass.
+
+    Parameters
+    ----------
+    archive : str or os.PathLike
+        A zip or tar archive.
+
+    Yields
+    ------
+    name : str
+        The path of the member in the archive.
+    contents : file object
+        The contents of the member, valid until the next member is read.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If the file is not a zip or tar archive.
+
+    """
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zipped:
+            for info in zipped.infolist():
+                if info.is_dir() or not _is_wav(info.filename):
+                    continue
+
+                with zipped.open(info) as contents:
+                    yield info.filename, contents
+        return
+
+    if not os.path.exists(archive):
+        raise FileNotFoundError(f"Path {archive} does not exist.")
+
+    try:
+        tarred = tarfile.open(archive, mode="r:*")
+    except tarfile.TarError as error:
+        raise ValueError(
+            f"File {archive} is not a zip or tar archive."
+        ) from error
+
+    with tarred:
+        for info in tarred:
+            if not info.isfile() or not _is_wav(info.name):
+                continue
+
+            contents = tarred.extractfile(info)
+            if contents is not None:
+                with contents:
+                    yield info.name, contents
+
+
+def _put(
+    staged: "queue.Queue",
+    item: object,
+    stop: threading.Event,
+) -> bool:
+    """Wait for room in the queue, unless the run is stopped."""
+    while not stop.is_set():
+        try:
+            staged.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _extract(
+    archive: PathLike,
+    directory: Path,
+    batch_size: int,
+    staged: "queue.Queue",
+    stop: threading.Event,
+):
+    """Extract the members of an archive into staged batches.
+
+    Runs in a background thread. Each batch is extracted in its own
+    directory, under names made unique by the position of the member, as
+    members of different folders of the archive can have the same name.
+    Ends with None, or with the error that stopped the extraction.
+    """
+    batch: Dict[Path, str] = {}
+    batch_dir = directory / "batch-0"
+    try:
+        for index, (name, contents) in enumerate(iter_wav_members(archive)):
+            if not batch:
+                batch_dir = directory / f"batch-{index}"
+                batch_dir.mkdir()
+
+            target = batch_dir / f"{index}-{PurePosixPath(name).name}"
+            with open(target, "wb") as output:
+                shutil.copyfileobj(contents, output)
+            batch[target] = name
+
+            if len(batch) >= batch_size:
+                if not _put(staged, (batch_dir, batch), stop):
+                    return
+                batch = {}
+
+        if batch and not _put(staged, (batch_dir, batch), stop):
+            return
+    except Exception as error:  # pylint: disable=broad-except
+        _put(staged, error, stop)
+        return
+
+    _put(staged, None, stop)
+
+
+def _run_staged(
+    batch_dir: Path,
+    batch: Dict[Path, str],
+    **params,
+) -> Tuple["pd.DataFrame", RunStatus]:
+    """Process a staged batch, delete it, and key its results by member."""
+    try:
+        detections, status = run_wav_files(
+            list(batch), workdir=batch_dir, deduplicate=None, **params
+        )
+    finally:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+
+    members = {path: Path(name) for path, name in batch.items()}
+    status.skipped = [members[path] for path in status.skipped]
+
+    if len(detections.columns):
+        detections["wav"] = detections["wav"].map(members)
+        detections[FILENAME_COLUMN] = [wav.name for wav in detections["wav"]]
+
+    return detections, status
+
+
+def run_tadarida_archive(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    archive: PathLike,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    processes: int = 1,
+    max_staged: Optional[int] = None,
+    staging_dir: Optional[PathLike] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    gate: Optional["EnergyGate"] = None,
+    columns: Optional[Sequence[str]] = None,
+    hook: Optional[PhaseHook] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+) -> Tuple["pd.DataFrame", RunStatus]:
+    """Run Tadarida-D on the .wav files of a zip or tar archive.
+
+    Members are extracted in batches while the previous batches are being
+    processed, and deleted once processed.
+
+    Parameters
+    ----------
+    archive : str or os.PathLike
+        A zip or tar archive, optionally compressed with gzip, bzip2 or xz.
+    batch_size : int, optional
+        Number of members processed by each TadaridaD run.
+    processes : int, optional
+        Number of batches processed at the same time.
+    max_staged : int, optional
+        Number of extracted batches that can wait to be processed. Defaults
+        to the number of processes.
+    staging_dir : str or os.PathLike, optional
+        Directory in which members are extracted, for instance /dev/shm to
+        keep them in memory. Defaults to the temporary directory.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    priority, gate, columns, hook, metrics : optional
+        Options of each run, see run_tadarida.
+
+    Returns
+    -------
+    detections: pd.DataFrame
+        Dataframe with detected sound events, in the order of the members.
+        The wav column holds the path of the member in the archive.
+    status: RunStatus
+        The logs of all TadaridaD runs. Skipped files are given by their
+        path in the archive.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If the file is not a zip or tar archive.
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if batch_size < 1 or processes < 1:
+        raise ValueError("The batch size and processes must be positive.")
+
+    params = {
+        "threads": threads,
+        "time_expansion": time_expansion,
+        "features": features,
+        "frequency_band": frequency_band,
+        "priority": priority,
+        "gate": gate,
+        "columns": columns,
+        "hook": hook,
+        "metrics": metrics,
+    }
+
+    staged: "queue.Queue" = queue.Queue(maxsize=max_staged or processes)
+    stop = threading.Event()
+    results: List[Tuple["pd.DataFrame", RunStatus]] = []
+
+    with tempfile.TemporaryDirectory(
+        prefix="pytadarida-archive-", dir=staging_dir
+    ) as directory:
+        extractor = threading.Thread(
+            target=_extract,
+            args=(archive, Path(directory), batch_size, staged, stop),
+            name="pytadarida-extract",
+            daemon=True,
+        )
+        extractor.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=processes) as executor:
+                running: Deque[Future] = deque()
+                while True:
+                    item = staged.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+
+                    batch_dir, batch = item
+                    running.append(
+                        executor.submit(_run_staged, batch_dir, batch, **params)
+                    )
+                    # Results are gathered in the order of the members.
+                    while len(running) >= processes:
+                        results.append(running.popleft().result())
+
+                while running:
+                    results.append(running.popleft().result())
+        finally:
+            stop.set()
+            extractor.join()
+
+    frames = [frame for frame, _ in results if len(frame.columns)]
+    detections = (
+        pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    )
+    return detections, merge_run_status(status for _, status in results)
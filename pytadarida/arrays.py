@@ -0,0 +1,438 @@
+"""Read the numeric features of .ta files into NumPy arrays.
+
+Parsing .ta files with pandas (see pytadarida.parsing) is convenient but
+heavy when only the numeric features are needed. The functions in this
+module memory-map each .ta file, parse the header for the column names and
+count the rows, then parse the numeric columns with the NumPy text reader
+into a single preallocated float32 array shared by all files. No pandas
+objects are created unless a dataframe is explicitly requested. The text
+"Filename" column is replaced by the index of the file each row comes from.
+
+The features can also be written straight to a memory-mapped .npy file,
+with an index of the file and CallNum of each row, so training jobs can
+read them from disk without copies.
+"""
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from pytadarida.configs import FILENAME_COLUMN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "FeatureBlock",
+    "load_ta_features",
+    "read_ta_features",
+    "read_ta_header",
+    "write_ta_features",
+]
+
+
+CALL_NUM_COLUMN = "CallNum"
+"""Number of each detection within its file."""
+
+INDEX_DTYPE = np.dtype([("file_id", "<i4"), ("call_num", "<i4")])
+"""Row index of the feature matrices written by write_ta_features."""
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+
+@dataclass
+class FeatureBlock:
+    """Numeric features of many .ta files in a single array.
+
+    Attributes:
+        columns: Names of the columns of the data array.
+        data: A contiguous float32 array with one row per detection.
+        file_index: Index into files of the file of each row.
+        files: The file each block of rows comes from.
+        call_num: The CallNum of each row, which together with file_index
+            identifies the detection.
+    """
+
+    columns: List[str]
+    data: np.ndarray
+    file_index: np.ndarray
+    files: List[Path]
+    call_num: Optional[np.ndarray] = None
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """Build a dataframe with the features and a "wav" column."""
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        dataframe = pd.DataFrame(self.data, columns=self.columns, copy=False)
+        dataframe["wav"] = np.array(self.files, dtype=object)[self.file_index]
+        return dataframe
+
+
+def read_ta_header(path: PathLike) -> List[str]:
+    """Read the column names of a .ta file.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+
+    Returns
+    -------
+    list of str
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If the file is not a .ta file.
+
+    """
+    with open(path, "rb") as ta_file:
+        header = ta_file.readline()
+
+    return _parse_header(path, header)
+
+
+def _parse_header(path: PathLike, header: bytes) -> List[str]:
+    columns = header.decode("utf-8").rstrip("\r\n").split("\t")
+
+    if columns[0] != FILENAME_COLUMN:
+        raise ValueError(f"File {path} is not a .ta file.")
+
+    return columns
+
+
+def _count_rows(data: mmap.mmap, start: int) -> int:
+    """Count the lines after the header, skipping blank lines.
+
+    Lines that are empty, or only hold a carriage return, are skipped by the
+    NumPy text reader, so they are not rows.
+    """
+    if start >= len(data):
+        return 0
+
+    body = np.frombuffer(data, dtype=np.uint8, offset=start)
+    ends = np.flatnonzero(body == NEWLINE)
+    if body[-1] != NEWLINE:
+        ends = np.append(ends, len(body))
+
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts
+    has_return = np.zeros(len(ends), dtype=bool)
+    has_return[lengths > 0] = body[ends[lengths > 0] - 1] == CARRIAGE_RETURN
+    rows = int(np.count_nonzero(lengths - has_return > 0))
+
+    # The view must be released before the memory map is closed.
+    del body
+    return rows
+
+
+def _map_file(ta_file) -> mmap.mmap:
+    if os.fstat(ta_file.fileno()).st_size == 0:
+        raise ValueError(f"File {ta_file.name} is not a .ta file.")
+
+    return mmap.mmap(ta_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _header_end(data: mmap.mmap) -> int:
+    header_end = data.find(b"\n")
+    if header_end == -1:
+        return len(data)
+    return header_end
+
+
+def _scan_file(path: Path) -> Tuple[List[str], int]:
+    """Read the numeric column names and the number of rows of a file."""
+    with open(path, "rb") as ta_file, _map_file(ta_file) as data:
+        header_end = _header_end(data)
+        names = _parse_header(path, data[:header_end])[1:]
+        return names, _count_rows(data, header_end + 1)
+
+
+def _read_file(
+    path: Path,
+    columns: Optional[Sequence[str]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse the numeric columns and the CallNum of a single .ta file."""
+    with open(path, "rb") as ta_file, _map_file(ta_file) as data:
+        header_end = _header_end(data)
+        names = _parse_header(path, data[:header_end])[1:]
+
+        if columns is None:
+            columns = names
+
+        missing = [
+            column
+            for column in [*columns, CALL_NUM_COLUMN]
+            if column not in names
+        ]
+        if missing:
+            raise ValueError(f"File {path} is missing the columns {missing}.")
+
+        if header_end + 1 >= len(data):
+            return (
+                np.empty((0, len(columns)), dtype=np.float32),
+                np.empty(0, dtype=np.int32),
+            )
+
+        # Skip the Filename column, which comes first. CallNum is read last.
+        usecols = [
+            names.index(column) + 1 for column in [*columns, CALL_NUM_COLUMN]
+        ]
+
+        data.seek(header_end + 1)
+        try:
+            values = np.loadtxt(
+                iter(data.readline, b""),
+                dtype=np.float32,
+                delimiter="\t",
+                usecols=usecols,
+                ndmin=2,
+            )
+        except ValueError as error:
+            raise ValueError(f"File {path} has malformed rows.") from error
+
+        return values[:, :-1], values[:, -1].astype(np.int32)
+
+
+def _as_mapping(
+    files: Union[Mapping[Path, Path], Iterable[PathLike]],
+) -> Dict[Path, Path]:
+    if isinstance(files, Mapping):
+        return dict(files)
+    return {Path(path): Path(path) for path in files}
+
+
+def _scan_files(
+    mapping: Mapping[Path, Path],
+    columns: Optional[Sequence[str]],
+) -> Tuple[List[str], List[int]]:
+    """Read the headers and count the rows to size the output."""
+    num_rows = []
+    names = None
+    for ta_path in mapping.values():
+        header, rows = _scan_file(ta_path)
+        num_rows.append(rows)
+
+        if columns is None and names is not None and header != names:
+            raise ValueError(
+                f"File {ta_path} has different columns than the other files."
+            )
+        names = header
+
+    selected = list(columns) if columns is not None else names or []
+    return selected, num_rows
+
+
+def _fill_block(
+    block: FeatureBlock,
+    mapping: Mapping[Path, Path],
+    columns: Optional[Sequence[str]],
+    num_rows: List[int],
+):
+    """Parse each file into its slice of the preallocated block."""
+    start = 0
+    for file_id, (ta_path, rows) in enumerate(zip(mapping.values(), num_rows)):
+        values, call_num = _read_file(ta_path, columns)
+
+        if len(values) != rows:
+            raise ValueError(f"File {ta_path} changed while being read.")
+
+        block.data[start : start + rows] = values
+        block.file_index[start : start + rows] = file_id
+        if block.call_num is not None:
+            block.call_num[start : start + rows] = call_num
+        start += rows
+
+
+def read_ta_features(
+    files: Union[Mapping[Path, Path], Iterable[PathLike]],
+    columns: Optional[Sequence[str]] = None,
+) -> FeatureBlock:
+    """Read the numeric columns of many .ta files into a single array.
+
+    Parameters
+    ----------
+    files : dict of Path to Path or list of str or os.PathLike
+        Either a mapping of .wav files to their .ta files, as returned by
+        get_output_files, or a list of .ta files.
+    columns : list of str, optional
+        The numeric columns to read. All of them by default, in which case
+        every file must have the same columns.
+
+    Returns
+    -------
+    FeatureBlock
+        The features of all files. Rows are in the order of the files, and
+        files are referred to by their .wav file if a mapping was given.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If a file is not a valid .ta file or the files have different
+        columns.
+
+    """
+    mapping = _as_mapping(files)
+    selected, num_rows = _scan_files(mapping, columns)
+
+    total = sum(num_rows)
+    block = FeatureBlock(
+        columns=selected,
+        data=np.empty((total, len(selected)), dtype=np.float32),
+        file_index=np.empty(total, dtype=np.int32),
+        files=list(mapping),
+        call_num=np.empty(total, dtype=np.int32),
+    )
+    _fill_block(block, mapping, columns, num_rows)
+    return block
+
+
+def _sidecar_paths(path: Path) -> Tuple[Path, Path]:
+    """Paths of the row index and the metadata of a feature matrix."""
+    base = path.with_suffix("")
+    return (
+        base.with_name(f"{base.name}.index.npy"),
+        base.with_name(f"{base.name}.json"),
+    )
+
+
+def write_ta_features(
+    files: Union[Mapping[Path, Path], Iterable[PathLike]],
+    path: PathLike,
+    columns: Optional[Sequence[str]] = None,
+) -> FeatureBlock:
+    """Write the numeric columns of many .ta files to a .npy file.
+
+    The values are parsed straight into a memory-mapped float32 .npy file,
+    so the matrix never needs to fit in memory. Two files are written next
+    to it: "<name>.index.npy", with the file id and CallNum of each row, and
+    "<name>.json", with the column names and the files.
+
+    Parameters
+    ----------
+    files : dict of Path to Path or list of str or os.PathLike
+        Either a mapping of .wav files to their .ta files, as returned by
+        get_output_files, or a list of .ta files.
+    path : str or os.PathLike
+        The .npy file to write.
+    columns : list of str, optional
+        The numeric columns to write. All of them by default, in which case
+        every file must have the same columns.
+
+    Returns
+    -------
+    FeatureBlock
+        The written features, memory-mapped read-only as with
+        load_ta_features.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If a file is not a valid .ta file or the files have different
+        columns.
+
+    """
+    path = Path(path)
+    index_path, metadata_path = _sidecar_paths(path)
+
+    mapping = _as_mapping(files)
+    selected, num_rows = _scan_files(mapping, columns)
+    total = sum(num_rows)
+
+    data = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=np.float32,
+        shape=(total, len(selected)),
+    )
+    index = np.lib.format.open_memmap(
+        index_path,
+        mode="w+",
+        dtype=INDEX_DTYPE,
+        shape=(total,),
+    )
+
+    _fill_block(
+        FeatureBlock(
+            columns=selected,
+            data=data,
+            file_index=index["file_id"],
+            files=list(mapping),
+            call_num=index["call_num"],
+        ),
+        mapping,
+        columns,
+        num_rows,
+    )
+    data.flush()
+    index.flush()
+    del data, index
+
+    with open(metadata_path, "w", encoding="utf-8") as metadata:
+        json.dump(
+            {"columns": selected, "files": [str(wav) for wav in mapping]},
+            metadata,
+        )
+
+    return load_ta_features(path)
+
+
+def load_ta_features(
+    path: PathLike,
+    mmap_mode: Optional[Literal["r", "r+", "c"]] = "r",
+) -> FeatureBlock:
+    """Load a feature matrix written by write_ta_features.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The .npy file.
+    mmap_mode : {"r", "r+", "c"} or None, optional
+        How the arrays are memory-mapped, see numpy.load. If None, they are
+        read into memory.
+
+    Returns
+    -------
+    FeatureBlock
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    path = Path(path)
+    index_path, metadata_path = _sidecar_paths(path)
+
+    with open(metadata_path, "r", encoding="utf-8") as metadata_file:
+        metadata = json.load(metadata_file)
+
+    index = np.load(index_path, mmap_mode=mmap_mode)
+    return FeatureBlock(
+        columns=metadata["columns"],
+        data=np.load(path, mmap_mode=mmap_mode),
+        file_index=index["file_id"],
+        files=[Path(wav) for wav in metadata["files"]],
+        call_num=index["call_num"],
+    )
@@ -0,0 +1,192 @@
+"""Adaptive batch sizes for Tadarida-D runs.
+
+Every TadaridaD run pays a fixed cost for process startup, input validation,
+reading the logs and cleaning up, on top of the time spent on each file.
+Small batches waste time in this overhead, while large batches delay results
+and lose more work when they fail.
+
+The AdaptiveBatcher measures the time of each batch while running, fits the
+model ``elapsed = overhead + num_files * per_file`` over the most recent
+batches, and picks the batch size that meets a latency or throughput target.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+__all__ = [
+    "AdaptiveBatcher",
+    "BatcherStats",
+]
+
+
+@dataclass
+class BatcherStats:
+    """Statistics of an adaptive batcher.
+
+    Attributes:
+        sizes: The batch sizes chosen so far, in order.
+        overhead: Estimated fixed time of a batch, in seconds.
+        per_file: Estimated processing time of each file, in seconds.
+        num_files: Number of files processed.
+        elapsed: Total time of all batches, in seconds.
+    """
+
+    sizes: List[int] = field(default_factory=list)
+    overhead: Optional[float] = None
+    per_file: Optional[float] = None
+    num_files: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Files processed per second of batch time."""
+        if not self.elapsed:
+            return None
+        return self.num_files / self.elapsed
+
+
+def _ceil(value: float) -> int:
+    """Round up, ignoring floating point noise."""
+    return math.ceil(round(value, 9))
+
+
+class AdaptiveBatcher:  # pylint: disable=too-many-instance-attributes
+    """Choose batch sizes from the observed time of past batches.
+
+    Parameters
+    ----------
+    initial_size : int, optional
+        Size of the first batch.
+    min_size : int, optional
+        Smallest batch size.
+    max_size : int, optional
+        Largest batch size.
+    target_latency : float, optional
+        Maximum time, in seconds, that a batch should take.
+    target_throughput : float, optional
+        Minimum number of files per second each batch should achieve.
+    efficiency : float, optional
+        Fraction of the batch time that should be spent on files rather than
+        on the fixed overhead. Only used when no throughput target is given.
+    window : int, optional
+        Number of recent batches used to estimate the timing model.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        initial_size: int = 8,
+        min_size: int = 1,
+        max_size: int = 1024,
+        target_latency: Optional[float] = None,
+        target_throughput: Optional[float] = None,
+        efficiency: float = 0.9,
+        window: int = 20,
+    ):
+        if not 1 <= min_size <= initial_size <= max_size:
+            raise ValueError(
+                "Batch sizes must satisfy 1 <= min_size <= initial_size "
+                "<= max_size."
+            )
+
+        if not 0 < efficiency < 1:
+            raise ValueError("efficiency must be between 0 and 1.")
+
+        self.initial_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.target_throughput = target_throughput
+        self.efficiency = efficiency
+        self.stats = BatcherStats()
+        self._observations: Deque[Tuple[int, float]] = deque(maxlen=window)
+
+    def record(self, num_files: int, elapsed: float):
+        """Record the time taken by a batch.
+
+        Parameters
+        ----------
+        num_files : int
+            Number of files in the batch.
+        elapsed : float
+            Wall time of the batch, in seconds.
+        """
+        self._observations.append((num_files, elapsed))
+        self.stats.num_files += num_files
+        self.stats.elapsed += elapsed
+
+        model = self._fit()
+        if model is not None:
+            self.stats.overhead, self.stats.per_file = model
+
+    def next_size(self) -> int:
+        """Get the size of the next batch."""
+        size = self._clamp(self._choose_size())
+        self.stats.sizes.append(size)
+        return size
+
+    def _clamp(self, size: float) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def _fit(self) -> Optional[Tuple[float, float]]:
+        """Fit the timing model by least squares.
+
+        Returns None until batches of at least two different sizes have
+        been observed.
+        """
+        if len({size for size, _ in self._observations}) < 2:
+            return None
+
+        count = len(self._observations)
+        mean_size = sum(size for size, _ in self._observations) / count
+        mean_time = sum(time for _, time in self._observations) / count
+
+        covariance = sum(
+            (size - mean_size) * (time - mean_time)
+            for size, time in self._observations
+        )
+        variance = sum(
+            (size - mean_size) ** 2 for size, _ in self._observations
+        )
+
+        per_file = covariance / variance
+        overhead = max(mean_time - per_file * mean_size, 0.0)
+        return overhead, per_file
+
+    def _choose_size(self) -> float:
+        if not self._observations:
+            return self.initial_size
+
+        last_size, last_time = self._observations[-1]
+        model = self._fit()
+
+        if model is None or model[1] <= 0:
+            # Not enough information to separate the overhead from the time
+            # per file, so explore a different size.
+            if self.target_latency is not None and (
+                last_time > self.target_latency
+            ):
+                return last_size / 2
+            return last_size * 2
+
+        overhead, per_file = model
+
+        if self.target_throughput is not None:
+            if per_file * self.target_throughput >= 1:
+                # The target can not be met, get as close as possible.
+                size: float = self.max_size
+            else:
+                size = _ceil(
+                    overhead
+                    * self.target_throughput
+                    / (1 - per_file * self.target_throughput)
+                )
+        else:
+            size = _ceil(
+                self.efficiency * overhead / ((1 - self.efficiency) * per_file)
+            )
+
+        if self.target_latency is not None:
+            size = min(size, (self.target_latency - overhead) / per_file)
+
+        return size
@@ -0,0 +1,371 @@
+"""Command line interface of pytadarida.
+
+Runs Tadarida-D over many recordings with the parallel engine of
+pytadarida.parallel, writing each batch to the output as soon as it is done.
+Processed files are listed in an optional manifest, so an interrupted run
+can be resumed by running the same command again.
+
+Usage::
+
+    pytadarida /data/night1 /data/night2 -o detections.db --processes 8 \\
+        --batch-size auto --manifest night.manifest
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Set, TextIO, Union
+
+from pytadarida.batching import AdaptiveBatcher
+from pytadarida.metrics import MetricsRegistry
+from pytadarida.output import expand_wav_files
+from pytadarida.parallel import BatchResult, iter_batch_results
+from pytadarida.priority import ProcessPriority
+from pytadarida.scheduling import TimingHistory
+from pytadarida.sinks import SINKS, open_sink
+from pytadarida.validate_inputs import validate_files
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "Manifest",
+    "build_parser",
+    "main",
+]
+
+
+class Manifest:
+    """List of processed files, written as they are done.
+
+    Each line holds the absolute path of a processed file. Lines are
+    flushed to disk after every batch so they survive a crash.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.files: Set[str] = set()
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as manifest:
+                self.files = {
+                    line.rstrip("\n") for line in manifest if line.strip()
+                }
+
+        self._file: Optional[TextIO] = None
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, (str, os.PathLike)) and (
+            os.path.abspath(path) in self.files
+        )
+
+    def record(self, files: Sequence[PathLike]):
+        """Add files to the manifest."""
+        if self._file is None:
+            self._file = open(  # pylint: disable=consider-using-with
+                self.path, "a", encoding="utf-8"
+            )
+
+        paths = [os.path.abspath(path) for path in files]
+        self._file.write("".join(f"{path}\n" for path in paths))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.files.update(paths)
+
+    def close(self):
+        """Close the manifest file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Progress:
+    """Single status line on stderr, updated after every batch."""
+
+    def __init__(self, total: int, stream: Optional[TextIO] = None):
+        self.total = total
+        self.stream = sys.stderr if stream is None else stream
+        self.files = 0
+        self.detections = 0
+        self.start = time.perf_counter()
+
+    def update(self, result: BatchResult):
+        """Count the files and detections of a batch, and redraw the line."""
+        self.files += len(result.files)
+        self.detections += len(result.detections)
+
+        elapsed = time.perf_counter() - self.start
+        rate = self.files / elapsed if elapsed else 0.0
+        self.stream.write(
+            f"\r{self.files}/{self.total} files, "
+            f"{self.detections} detections, "
+            f"{elapsed:.0f} s, {rate:.1f} files/s"
+        )
+        self.stream.flush()
+
+    def finish(self):
+        """End the status line."""
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+def _batch_size(value: str) -> Union[int, AdaptiveBatcher]:
+    if value == "auto":
+        return AdaptiveBatcher()
+
+    try:
+        size = int(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(
+            f"invalid batch size: {value!r}, use a number or 'auto'"
+        ) from error
+
+    if size < 1:
+        raise argparse.ArgumentTypeError("the batch size must be at least 1")
+
+    return size
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the parser of the command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="pytadarida",
+        description=(
+            "Detect sound events in .wav files with Tadarida-D, running "
+            "several TadaridaD processes in parallel."
+        ),
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help=".wav files or directories containing .wav files",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help=(
+            "where to write the detections: a .tsv file, a directory for "
+            "Parquet files or an SQLite database (.db)"
+        ),
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(SINKS),
+        help="output format, chosen from the output suffix by default",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        help="number of TadaridaD processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-t",
+        "--threads",
+        type=int,
+        default=1,
+        help="threads of each TadaridaD process (default: 1)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=_batch_size,
+        help=(
+            "files per TadaridaD process, or 'auto' to adapt it to the "
+            "observed timings (default: one batch per process)"
+        ),
+    )
+    parser.add_argument(
+        "--time-expansion",
+        type=int,
+        choices=[1, 10],
+        default=1,
+        help="time expansion factor of the recordings (default: 1)",
+    )
+    parser.add_argument(
+        "--features",
+        type=int,
+        default=2,
+        help="set of features to extract (default: 2)",
+    )
+    parser.add_argument(
+        "--frequency-band",
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help="1 for high frequencies, 2 for low frequencies (default: 1)",
+    )
+    parser.add_argument(
+        "--manifest",
+        help=(
+            "file listing the processed files; files already in it are "
+            "skipped, so a stopped run can be resumed, and new results are "
+            "added to the output"
+        ),
+    )
+    parser.add_argument(
+        "--history",
+        help="file with the timings of past runs, used to balance batches",
+    )
+    parser.add_argument(
+        "--nice",
+        type=int,
+        help="niceness increment of the TadaridaD processes",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="file where OpenMetrics metrics are written after every batch",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve OpenMetrics metrics over HTTP on this local port",
+    )
+    parser.add_argument(
+        "--progress",
+        dest="progress",
+        action="store_true",
+        default=None,
+        help="show progress (default: when stderr is a terminal)",
+    )
+    parser.add_argument(
+        "--no-progress",
+        dest="progress",
+        action="store_false",
+        help="do not show progress",
+    )
+    return parser
+
+
+def _has_output(path: Path) -> bool:
+    """Whether an output file, or directory, already holds results."""
+    if path.is_dir():
+        return any(path.iterdir())
+    return path.exists() and path.stat().st_size > 0
+
+
+def _run(args: argparse.Namespace) -> int:  # pylint: disable=too-many-branches
+    validate_files(args.inputs)
+
+    # Without a manifest, results already in the output would be duplicated.
+    if args.manifest is None and _has_output(Path(args.output)):
+        raise ValueError(
+            f"{args.output} already holds results, remove it or give the "
+            "--manifest of the run that wrote them."
+        )
+
+    manifest = None if args.manifest is None else Manifest(args.manifest)
+
+    files: List[Path] = expand_wav_files(args.inputs)
+    if manifest is not None:
+        files = [path for path in files if path not in manifest]
+
+    if not files:
+        print("pytadarida: nothing to do, all files were processed")
+        return 0
+
+    show_progress = args.progress
+    if show_progress is None:
+        show_progress = sys.stderr.isatty()
+    progress = _Progress(len(files)) if show_progress else None
+
+    metrics = None
+    server = None
+    if args.metrics_file is not None or args.metrics_port is not None:
+        metrics = MetricsRegistry()
+
+    if args.metrics_port is not None:
+        server = metrics.serve(args.metrics_port)
+
+    errors = []
+    with open_sink(args.output, args.format) as sink:
+        try:
+            for result in iter_batch_results(
+                files,
+                processes=args.processes,
+                batch_size=args.batch_size,
+                history=(
+                    None
+                    if args.history is None
+                    else TimingHistory(args.history)
+                ),
+                threads=args.threads,
+                time_expansion=args.time_expansion,
+                features=args.features,
+                frequency_band=args.frequency_band,
+                priority=(
+                    None
+                    if args.nice is None
+                    else ProcessPriority(nice=args.nice)
+                ),
+                metrics=metrics,
+            ):
+                # The manifest is only updated once the batch is written,
+                # and not for failed batches, so that they are run again.
+                sink.write(result)
+                if result.status.error:
+                    errors.append(result.status.error)
+                elif manifest is not None:
+                    manifest.record(result.files)
+
+                if progress is not None:
+                    progress.update(result)
+
+                if args.metrics_file is not None:
+                    metrics.write_textfile(args.metrics_file)
+        finally:
+            if progress is not None:
+                progress.finish()
+
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+            if manifest is not None:
+                manifest.close()
+
+    if errors:
+        sys.stderr.write("TadaridaD reported errors:\n" + "".join(errors))
+        return 1
+
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line interface.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments, without the program name. Taken from
+        sys.argv by default.
+
+    Returns
+    -------
+    int
+        The exit status.
+
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        return _run(args)
+    except KeyboardInterrupt:
+        return 130
+    except (
+        FileNotFoundError,
+        ImportError,
+        ValueError,
+        subprocess.CalledProcessError,
+    ) as error:
+        sys.stderr.write(f"pytadarida: error: {error}\n")
+        return 1
@@ -5,55 +5,42 @@ on the given files.
 
 """
 import os
-import subprocess
-from typing import Iterable, List, Literal, Tuple, Union
-
-import pandas as pd
-
-from pytadarida.configs import TADARIDA_BINARY
-from pytadarida.logs import RunStatus, get_run_status
-from pytadarida.output import clean_output_files, get_output_files
-from pytadarida.parsing import parse_detections
-from pytadarida.validate_inputs import validate_files
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pytadarida.archives import run_tadarida_archive
+from pytadarida.logs import RunStatus, merge_run_status
+from pytadarida.monitor import ResourceUsage
+from pytadarida.normalize import DedupMode
+from pytadarida.priority import ProcessPriority
+from pytadarida.profiling import PhaseHook
+from pytadarida.runner import run_wav_files, tadarida_outputs
+from pytadarida.validate_inputs import is_archive, validate_files
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pytadarida.metrics import MetricsRegistry
+    from pytadarida.screening import EnergyGate
 
 __all__ = [
     "run_tadarida",
+    "tadarida_outputs",
 ]
 
 
 PathLike = Union[str, os.PathLike]
 
 
-def _run_command(*args: str, capture_output: bool = False):
-    result = subprocess.run(
-        [TADARIDA_BINARY, *args],
-        capture_output=capture_output,
-        check=True,
-    )
-    return result.stdout
-
-
-def _build_args(
-    threads=1,
-    time_expansion=1,
-    features=2,
-    frequency_band=1,
-):
-    args = [
-        "-t",
-        str(threads),
-        "-x",
-        str(time_expansion),
-        "-v",
-        str(features),
-        "-f",
-        str(frequency_band),
-    ]
-
-    return args
-
-
-def run_tadarida(
+def run_tadarida(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,duplicate-code
     files: Union[
         PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
     ],
@@ -61,7 +48,15 @@ def run_tadarida(
     time_expansion: Literal[10, 1] = 1,
     features=2,
     frequency_band: Literal[1, 2] = 1,
-) -> Tuple[pd.DataFrame, RunStatus]:
+    workdir: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+    gate: Optional["EnergyGate"] = None,
+    columns: Optional[Sequence[str]] = None,
+    hook: Optional[PhaseHook] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+    deduplicate: Optional[DedupMode] = "path",
+) -> Tuple["pd.DataFrame", RunStatus]:
     """Run the tadarida binary on the given files.
 
     Will run the tadarida binary on the given files, and return a dataframe
@@ -71,10 +66,15 @@ def run_tadarida(
     ----------
     files : str or list of str
         Either a directory path containing .wav files or a list of .wav files,
-        to be processed. Relative or absolute paths can be used. Audio files
-        must be short. Accepted limit depends on sound file characteristics
-        (between 6.4 and 12.8 seconds in high frequency (HF) mode, and between
-         32 and 64 seconds in low frequency (LF) mode).
+        to be processed. Relative or absolute paths can be used. Zip and tar
+        archives of .wav files are processed with run_tadarida_archive, and
+        their detections are keyed by the path of each member in the
+        archive, before those of the other files. Archive members are not
+        deduplicated, neither among themselves nor against the other files.
+        Audio files must be short.
+        Accepted limit depends on sound file characteristics (between 6.4
+        and 12.8 seconds in high frequency (HF) mode, and between 32 and 64
+        seconds in low frequency (LF) mode).
     threads : int, optional
         Allows to execute n parallel threads (1 by default).
         Note that 1 thread consumes approximately 150 MB of memory.
@@ -89,6 +89,41 @@ def run_tadarida(
         Frequency bands to be used; n = 2 allows to treat low frequencies
         (0.8 to 25 kHz) whereas n=1 (default) treats high frequencies
         (8 to 250 kHz).
+    workdir : str or os.PathLike, optional
+        Directory in which the tadarida binary is executed. Tadarida-D
+        writes its log files to a "log" directory at its working directory,
+        so concurrent runs must use different working directories. Defaults
+        to the current working directory. Can not be given with archives,
+        whose batches are run in their own directories.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD process.
+    usage : ResourceUsage, optional
+        Object updated with the memory and CPU time of the TadaridaD process
+        while it runs. Useful to follow a run from another thread. Can not
+        be given with archives, whose batches can run at the same time.
+    gate : EnergyGate, optional
+        If given, recordings are pre-screened and those without enough
+        energy in the frequency band are not processed. They are listed in
+        the skipped attribute of the returned status.
+    columns : list of str, optional
+        The .ta columns to keep, in addition to the key columns (Filename
+        and CallNum) and the wav column. Other columns are not parsed. All
+        columns are kept by default.
+    hook : PhaseHook, optional
+        Called with the name of each phase of the run (see
+        pytadarida.profiling), and entered as a context manager for its
+        duration. Useful to profile a run, see ProfileHook.
+    metrics : MetricsRegistry, optional
+        Registry updated with the counts and timings of the run, or with
+        its failure.
+    deduplicate : {"path", "content"} or None, optional
+        How recordings given more than once are found, see
+        pytadarida.normalize. Each recording is processed once and its
+        detections are copied to all the paths it was given under. By
+        default, files with the same real path are the same recording.
+        With "content", byte-identical copies are also found. None passes
+        the inputs to the binary as they are. Only applies to the files
+        that are not in archives.
 
     Returns
     -------
@@ -96,50 +131,70 @@ def run_tadarida(
         Dataframe with detected sound events.
     status: RunStatus
         A RunStatus object containing the stdout and stderr of the tadarida
-        binary.
+        binary, the peak memory and CPU time of the process, and the time
+        spent in each phase of the run.
 
     Raises
     ------
     FileNotFoundError
+    ValueError
+        If workdir or usage are given with archives.
 
     """
     if isinstance(files, (str, os.PathLike)):
         files = [files]
 
-    validate_files(files)
-
-    args = _build_args(
+    files = list(files)
+    if any(is_archive(path) for path in files):
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        validate_files(files, allow_archives=True)
+
+        if workdir is not None or usage is not None:
+            raise ValueError("workdir and usage can not be used with archives.")
+        params = {
+            "threads": threads,
+            "time_expansion": time_expansion,
+            "features": features,
+            "frequency_band": frequency_band,
+            "priority": priority,
+            "gate": gate,
+            "columns": columns,
+            "hook": hook,
+            "metrics": metrics,
+        }
+
+        # Archives are processed one by one, other inputs in a single run.
+        results = [
+            run_tadarida_archive(path, **params)
+            for path in files
+            if is_archive(path)
+        ]
+        others = [path for path in files if not is_archive(path)]
+        if others:
+            results.append(
+                run_wav_files(others, deduplicate=deduplicate, **params)
+            )
+
+        frames = [frame for frame, _ in results if len(frame.columns)]
+        return (
+            pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(),
+            merge_run_status(status for _, status in results),
+        )
+
+    return run_wav_files(
+        files,
         threads=threads,
         time_expansion=time_expansion,
         features=features,
         frequency_band=frequency_band,
+        workdir=workdir,
+        priority=priority,
+        usage=usage,
+        gate=gate,
+        columns=columns,
+        hook=hook,
+        metrics=metrics,
+        deduplicate=deduplicate,
     )
-
-    args = [*args, *files]
-
-    _run_command(*args, capture_output=False)
-
-    status = get_run_status()
-
-    try:
-        outputs = get_output_files(files)
-    except FileNotFoundError as error:
-        raise FileNotFoundError(
-            "The tadarida binary did not produce any output files.\n"
-            f"Tadarida-D Output: {status.stdout}\n"
-            f"Error: {status.error}\n"
-        ) from error
-
-    try:
-        detections = parse_detections(outputs)
-
-        # Remove the output files after parsing
-        clean_output_files(files)
-    except FileNotFoundError as error:
-        raise FileNotFoundError(
-            "Error parsing the output files.\n"
-            f"Tadarida-D Output: {status.stdout}\n"
-            f"Error: {status.error}\n"
-        ) from error
-
-    return detections, status
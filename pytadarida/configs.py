@@ -12,3 +12,12 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 TADARIDA_BINARY = os.path.join(BASE_DIR, "TadaridaD", "TadaridaD")
 """The path to the TadaridaD binary."""
+
+MEMORY_PER_THREAD = 150 * 1024**2
+"""Approximate memory used by each TadaridaD thread, in bytes."""
+
+FILENAME_COLUMN = "Filename"
+"""Name of the first column of .ta files, the only non-numeric one."""
+
+JOBS_DIR = os.path.join(os.path.expanduser("~"), ".pytadarida", "jobs")
+"""The default directory of the databases of resumable jobs."""
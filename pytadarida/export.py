@@ -0,0 +1,243 @@
+"""Export Tadarida-D detections to a single table file.
+
+Consumers that only need one big table of detections do not need to parse
+every .ta file into a dataframe and write it out again. The functions in
+this module concatenate the .ta files at the byte level: the header is
+written once, a column identifying the source file is appended to every
+row, and the data is copied in bounded chunks so that memory use does not
+depend on the size of the files.
+"""
+import os
+import re
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pytadarida.commands import tadarida_outputs
+from pytadarida.configs import FILENAME_COLUMN
+from pytadarida.logs import RunStatus
+from pytadarida.monitor import ResourceUsage
+from pytadarida.priority import ProcessPriority
+
+PathLike = Union[str, os.PathLike]
+
+BLANK_LINES = re.compile(rb"\n{2,}")
+
+
+__all__ = [
+    "merge_ta_files",
+    "run_tadarida_to_file",
+]
+
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+"""Size of the chunks copied from each .ta file, in bytes."""
+
+
+def _read_header(path: Path, ta_file: BinaryIO) -> bytes:
+    header = ta_file.readline().rstrip(b"\r\n")
+
+    if header.split(b"\t", 1)[0] != FILENAME_COLUMN.encode():
+        raise ValueError(f"File {path} is not a .ta file.")
+
+    return header
+
+
+def _encode_name(wav: Path) -> bytes:
+    name = os.fsencode(wav)
+
+    if b"\t" in name or b"\n" in name or b"\r" in name:
+        raise ValueError(f"File name {wav} can not be written to a table.")
+
+    return name
+
+
+def _copy_rows(
+    ta_file: BinaryIO,
+    output: BinaryIO,
+    suffix: bytes,
+    buffer_size: int,
+) -> int:
+    """Copy the rows of a .ta file, appending the suffix to each of them.
+
+    Blank lines, including lines that only hold a carriage return, are
+    dropped, as the parsers skip them too.
+    """
+    rows = 0
+    carry = b""
+
+    while True:
+        chunk = ta_file.read(buffer_size)
+        if not chunk:
+            break
+
+        chunk = carry + chunk
+
+        # Only complete lines are copied, the rest waits for the next chunk.
+        end = chunk.rfind(b"\n") + 1
+        carry = chunk[end:]
+        lines = chunk[:end].replace(b"\r\n", b"\n")
+        lines = BLANK_LINES.sub(b"\n", lines).lstrip(b"\n")
+
+        rows += lines.count(b"\n")
+        output.write(lines.replace(b"\n", suffix + b"\n"))
+
+    carry = carry.rstrip(b"\r")
+    if carry:
+        rows += 1
+        output.write(carry + suffix + b"\n")
+
+    return rows
+
+
+def _merge(
+    outputs: Mapping[Path, Path],
+    output: BinaryIO,
+    file_column: Literal["wav", "file_id"],
+    buffer_size: int,
+) -> int:
+    header = None
+    rows = 0
+
+    for file_id, (wav, ta_path) in enumerate(outputs.items()):
+        with open(ta_path, "rb") as ta_file:
+            file_header = _read_header(ta_path, ta_file)
+
+            if header is None:
+                header = file_header
+                output.write(header + b"\t" + file_column.encode() + b"\n")
+            elif file_header != header:
+                raise ValueError(
+                    f"File {ta_path} has different columns than the other "
+                    "files."
+                )
+
+            if file_column == "wav":
+                name = _encode_name(Path(wav))
+            else:
+                name = str(file_id).encode()
+
+            rows += _copy_rows(ta_file, output, b"\t" + name, buffer_size)
+
+    return rows
+
+
+def merge_ta_files(
+    outputs: Mapping[Path, Path],
+    destination: Union[PathLike, BinaryIO],
+    file_column: Literal["wav", "file_id"] = "wav",
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> int:
+    """Concatenate .ta files into a single tab-separated file.
+
+    The header of the first file is written once, followed by the rows of
+    every file with an extra column identifying the file they come from.
+    Files are copied in chunks of at most buffer_size bytes and rows are
+    never parsed, so the values are written exactly as TadaridaD wrote them.
+    Windows line endings are converted to Unix ones.
+
+    Parameters
+    ----------
+    outputs : dict of Path to Path
+        Mapping of .wav files to their .ta files, as returned by
+        get_output_files.
+    destination : str or os.PathLike or binary file
+        Path of the output file, or an open file in binary mode.
+    file_column : {"wav", "file_id"}, optional
+        Name and content of the extra column. "wav" writes the path of the
+        .wav file, as the "wav" column of parse_detections, and "file_id"
+        writes the position of the file in the mapping.
+    buffer_size : int, optional
+        Size of the chunks read from each .ta file, in bytes.
+
+    Returns
+    -------
+    int
+        Number of rows written, not counting the header.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If a file is not a .ta file, the files have different columns, or a
+        .wav path contains tabs or line breaks.
+
+    """
+    if file_column not in ("wav", "file_id"):
+        raise ValueError('file_column must be "wav" or "file_id".')
+
+    if buffer_size < 1:
+        raise ValueError("buffer_size must be at least 1.")
+
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, "wb") as output:
+            return _merge(outputs, output, file_column, buffer_size)
+
+    return _merge(outputs, destination, file_column, buffer_size)
+
+
+def run_tadarida_to_file(  # pylint: disable=too-many-arguments,too-many-positional-arguments,duplicate-code
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    destination: Union[PathLike, BinaryIO],
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features=2,
+    frequency_band: Literal[1, 2] = 1,
+    file_column: Literal["wav", "file_id"] = "wav",
+    workdir: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+) -> RunStatus:
+    """Run the tadarida binary and write all detections to a single file.
+
+    This is equivalent to writing the output of run_tadarida to a
+    tab-separated file, but the .ta files are merged directly with
+    merge_ta_files and no dataframe is created.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    destination : str or os.PathLike or binary file
+        Path of the output file, or an open file in binary mode.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    file_column : {"wav", "file_id"}, optional
+        Column identifying the source of each row, see merge_ta_files.
+    workdir, priority, usage : optional
+        Execution options, see run_tadarida.
+
+    Returns
+    -------
+    status: RunStatus
+        The status of the run.
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    with tadarida_outputs(
+        files,
+        threads=threads,
+        time_expansion=time_expansion,
+        features=features,
+        frequency_band=frequency_band,
+        workdir=workdir,
+        priority=priority,
+        usage=usage,
+    ) as (outputs, status):
+        merge_ta_files(outputs, destination, file_column=file_column)
+
+    return status
@@ -0,0 +1,314 @@
+"""Index detections by file, time and frequency.
+
+Selecting the detections of a file in a time window and a frequency band
+with boolean masks reads every row of the dataframe, which is slow when the
+same large set of detections is queried many times. A DetectionIndex sorts
+the detections of each file by start time once, and keeps the running
+maximum of their end times, so the detections overlapping a time window are
+found with two binary searches. The frequency band is then only checked on
+these detections.
+
+The index holds row positions in the dataframe it was built from, so it can
+be saved next to the results, for instance next to an exported file, and
+loaded with them later.
+"""
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "DetectionIndex",
+]
+
+
+INDEX_COLUMNS = ("StTime", "Dur", "Fmin", "Fmax")
+"""Columns needed to build an index, in addition to the wav column."""
+
+
+class DetectionIndex:  # pylint: disable=too-many-instance-attributes
+    """Index of detections by file, time and frequency.
+
+    Build it with from_detections, or load it with load. Queries return
+    positions of rows in the dataframe the index was built from, to be
+    selected with iloc::
+
+        index = DetectionIndex.from_detections(detections)
+        calls = detections.iloc[index.overlapping(wav, 100, 200, 30, 60)]
+
+    Time conditions use the start time (StTime) and end time (StTime plus
+    Dur) of the detections, and frequency conditions their frequency range
+    (Fmin to Fmax). All bounds are inclusive.
+
+    Parameters
+    ----------
+    files : list of str
+        The files, in the order of their detections in the arrays.
+    offsets : np.ndarray
+        Position of the first detection of each file in the arrays, followed
+        by the number of detections.
+    arrays : dict of str to np.ndarray
+        The row positions, start and end times, running maximum of the end
+        times (max_end) and frequency ranges of the detections, sorted by
+        file then start time.
+    """
+
+    def __init__(
+        self,
+        files: List[str],
+        offsets: np.ndarray,
+        arrays: Dict[str, np.ndarray],
+    ):
+        self.files = files
+        self.offsets = offsets
+        self.rows = arrays["rows"]
+        self.start = arrays["start"]
+        self.end = arrays["end"]
+        self.max_end = arrays["max_end"]
+        self.fmin = arrays["fmin"]
+        self.fmax = arrays["fmax"]
+        self._positions = {wav: index for index, wav in enumerate(files)}
+
+    @classmethod
+    def from_detections(cls, detections: "pd.DataFrame") -> "DetectionIndex":
+        """Build the index of a dataframe of detections.
+
+        Parameters
+        ----------
+        detections : pd.DataFrame
+            Detections with a "wav" column, as returned by parse_detections.
+
+        Returns
+        -------
+        DetectionIndex
+
+        Raises
+        ------
+        ValueError
+            If some of the needed columns are missing.
+
+        """
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        if detections.columns.empty:
+            detections = pd.DataFrame(columns=["wav", *INDEX_COLUMNS])
+
+        missing = [
+            column
+            for column in ["wav", *INDEX_COLUMNS]
+            if column not in detections.columns
+        ]
+        if missing:
+            raise ValueError(
+                f"The detections are missing the columns {missing}."
+            )
+
+        codes, wavs = pd.factorize(detections["wav"].map(str), sort=True)
+        start = detections["StTime"].to_numpy(dtype=np.float64)
+        rows = np.lexsort((start, codes))
+
+        start = start[rows]
+        # Detections without a duration are only at their start time.
+        end = start + np.nan_to_num(
+            detections["Dur"].to_numpy(dtype=np.float64)[rows]
+        )
+        offsets = np.searchsorted(codes[rows], np.arange(len(wavs) + 1))
+
+        max_end = np.empty_like(end)
+        for first, last in zip(offsets[:-1], offsets[1:]):
+            np.fmax.accumulate(end[first:last], out=max_end[first:last])
+
+        return cls(
+            files=list(wavs),
+            offsets=offsets,
+            arrays={
+                "rows": rows,
+                "start": start,
+                "end": end,
+                "max_end": max_end,
+                "fmin": detections["Fmin"].to_numpy(dtype=np.float64)[rows],
+                "fmax": detections["Fmax"].to_numpy(dtype=np.float64)[rows],
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, wav: PathLike) -> bool:
+        return str(wav) in self._positions
+
+    def _segments(self, wav: Optional[PathLike]) -> List[Tuple[int, int]]:
+        """Get the range of the detections of a file, or of every file."""
+        if wav is None:
+            return list(zip(self.offsets[:-1], self.offsets[1:]))
+
+        position = self._positions.get(str(wav))
+        if position is None:
+            return []
+        return [(self.offsets[position], self.offsets[position + 1])]
+
+    def _select(
+        self,
+        segments: List[Tuple[int, int]],
+        mask,
+        fmin: Optional[float],
+        fmax: Optional[float],
+    ) -> np.ndarray:
+        """Filter the candidate ranges, and get their row positions."""
+        selected = []
+        for first, last in segments:
+            if first >= last:
+                continue
+
+            keep = mask(first, last)
+            if fmin is not None:
+                keep &= self.fmax[first:last] >= fmin
+            if fmax is not None:
+                keep &= self.fmin[first:last] <= fmax
+            selected.append(self.rows[first:last][keep])
+
+        if not selected:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(selected)
+
+    def overlapping(
+        self,
+        wav: Optional[PathLike] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fmin: Optional[float] = None,
+        fmax: Optional[float] = None,
+    ) -> np.ndarray:
+        """Find the detections overlapping a time window and frequency band.
+
+        Parameters
+        ----------
+        wav : str or os.PathLike, optional
+            Only detections of this file.
+        start, end : float, optional
+            Only detections that end after start and begin before end.
+        fmin, fmax : float, optional
+            Only detections whose frequency range overlaps this range.
+
+        Returns
+        -------
+        np.ndarray
+            Row positions of the detections, by file then start time.
+
+        """
+        segments = []
+        for first, last in self._segments(wav):
+            if start is not None:
+                # Detections before this one all end before the window.
+                first += np.searchsorted(
+                    self.max_end[first:last], start, side="left"
+                )
+            if end is not None:
+                last = first + np.searchsorted(
+                    self.start[first:last], end, side="right"
+                )
+            segments.append((first, last))
+
+        def mask(first: int, last: int) -> np.ndarray:
+            if start is None:
+                return np.ones(last - first, dtype=bool)
+            return self.end[first:last] >= start
+
+        return self._select(segments, mask, fmin, fmax)
+
+    def starting(
+        self,
+        wav: Optional[PathLike] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fmin: Optional[float] = None,
+        fmax: Optional[float] = None,
+    ) -> np.ndarray:
+        """Find the detections starting in a time range, in a frequency band.
+
+        Same conditions as DetectionStore.query.
+
+        Parameters
+        ----------
+        wav : str or os.PathLike, optional
+            Only detections of this file.
+        start, end : float, optional
+            Only detections whose start time (StTime) is within this range.
+        fmin, fmax : float, optional
+            Only detections whose frequency range overlaps this range.
+
+        Returns
+        -------
+        np.ndarray
+            Row positions of the detections, by file then start time.
+
+        """
+        segments = []
+        for first, last in self._segments(wav):
+            times = self.start[first:last]
+            if end is not None:
+                last = first + np.searchsorted(times, end, side="right")
+            if start is not None:
+                first += np.searchsorted(times, start, side="left")
+            segments.append((first, last))
+
+        return self._select(
+            segments,
+            lambda first, last: np.ones(last - first, dtype=bool),
+            fmin,
+            fmax,
+        )
+
+    def save(self, path: PathLike):
+        """Save the index to a .npz file.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+        """
+        with open(path, "wb") as output:
+            np.savez(
+                output,
+                files=np.array(self.files, dtype=str),
+                offsets=self.offsets,
+                rows=self.rows,
+                start=self.start,
+                end=self.end,
+                max_end=self.max_end,
+                fmin=self.fmin,
+                fmax=self.fmax,
+            )
+
+    @classmethod
+    def load(cls, path: PathLike) -> "DetectionIndex":
+        """Load an index written by save.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+
+        Returns
+        -------
+        DetectionIndex
+
+        Raises
+        ------
+        FileNotFoundError
+
+        """
+        with np.load(Path(path), allow_pickle=False) as saved:
+            arrays = {name: np.asarray(saved[name]) for name in saved.files}
+
+        return cls(
+            files=arrays.pop("files").tolist(),
+            offsets=arrays.pop("offsets"),
+            arrays=arrays,
+        )
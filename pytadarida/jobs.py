@@ -0,0 +1,236 @@
+"""Resumable Tadarida-D jobs.
+
+A long run over a large archive keeps its results in memory until it
+returns, so a crash near the end loses all the work done. A job instead
+writes the result of every batch to its own SQLite database (see
+pytadarida.store) as soon as the batch is done, in a single transaction.
+Running the same job again skips the files that are already in the
+database, so at most the batches running at the time of the crash are
+processed again.
+
+Jobs are identified by a name chosen by the user::
+
+    detections, status = run_tadarida_job("/data/2023", "survey-2023")
+
+If the process dies, the same call resumes the job where it stopped.
+"""
+import json
+import os
+import re
+from dataclasses import asdict
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pytadarida.batching import AdaptiveBatcher
+from pytadarida.configs import JOBS_DIR
+from pytadarida.lazy import LazyDetections
+from pytadarida.logs import RunStatus, merge_run_status
+from pytadarida.output import expand_wav_files
+from pytadarida.parallel import iter_batch_results
+from pytadarida.priority import ProcessPriority
+from pytadarida.scheduling import TimingHistory
+from pytadarida.store import DetectionStore
+from pytadarida.validate_inputs import validate_files
+
+if TYPE_CHECKING:
+    from pytadarida.screening import EnergyGate
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "get_job_path",
+    "remove_job",
+    "run_tadarida_job",
+]
+
+
+PARAMETERS_KEY = "job_parameters"
+"""Metadata key of the Tadarida-D parameters a job was started with."""
+
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+def get_job_path(job_id: str, jobs_dir: Optional[PathLike] = None) -> Path:
+    """Get the path of the database of a job.
+
+    Parameters
+    ----------
+    job_id : str
+        Name of the job. Only letters, digits, ".", "_" and "-" are allowed.
+    jobs_dir : str or os.PathLike, optional
+        Directory holding the job databases. Defaults to JOBS_DIR.
+
+    Returns
+    -------
+    Path
+
+    Raises
+    ------
+    ValueError
+        If the job id is not a valid name.
+
+    """
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        raise ValueError(
+            f"Invalid job id {job_id!r}, use only letters, digits, '.', '_' "
+            "and '-'."
+        )
+
+    return Path(JOBS_DIR if jobs_dir is None else jobs_dir) / f"{job_id}.db"
+
+
+def remove_job(job_id: str, jobs_dir: Optional[PathLike] = None):
+    """Delete the database of a job.
+
+    Does not raise errors if the job does not exist.
+
+    Parameters
+    ----------
+    job_id : str
+    jobs_dir : str or os.PathLike, optional
+
+    """
+    path = get_job_path(job_id, jobs_dir)
+    for suffix in ["", "-wal", "-shm"]:
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+def _check_parameters(store: DetectionStore, job_id: str, parameters: dict):
+    """Record the parameters of a new job, or check those of a resumed one."""
+    encoded = json.dumps(parameters, sort_keys=True)
+    stored = store.get_metadata(PARAMETERS_KEY)
+
+    if stored is None:
+        store.set_metadata(PARAMETERS_KEY, encoded)
+        return
+
+    if stored != encoded:
+        raise ValueError(
+            f"Job {job_id} was started with the parameters {stored}, it can "
+            f"not be resumed with {encoded}. Use another job id or remove "
+            "the job."
+        )
+
+
+def run_tadarida_job(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,duplicate-code
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    job_id: str,
+    jobs_dir: Optional[PathLike] = None,
+    processes: Optional[int] = None,
+    batch_size: Union[int, AdaptiveBatcher, None] = None,
+    history: Optional[TimingHistory] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    pin_cpus: bool = False,
+    memory_budget: Optional[int] = None,
+    gate: Optional["EnergyGate"] = None,
+) -> Tuple[LazyDetections, RunStatus]:
+    """Run Tadarida-D as a job that can be resumed after a crash.
+
+    The result of every batch is committed to the database of the job as
+    soon as it is done. Files already in the database, from a previous run
+    of the same job, are not processed again.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    job_id : str
+        Name of the job. Running a job with the same name resumes it.
+    jobs_dir : str or os.PathLike, optional
+        Directory holding the job databases. Defaults to JOBS_DIR.
+    processes, batch_size, history, priority, pin_cpus, memory_budget : optional
+        Execution options, see run_tadarida_parallel.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    gate : EnergyGate, optional
+        Energy pre-screen, see run_tadarida_parallel.
+
+    Returns
+    -------
+    detections: LazyDetections
+        The detections of all files of the job, including those processed
+        by previous runs. Files are keyed by their absolute path.
+    status: RunStatus
+        The logs of the batches run by this call. Files skipped by the
+        pre-screen, in this or previous runs, are listed in skipped.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If the job was started with other Tadarida-D parameters.
+
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    files = list(files)
+    validate_files(files)
+
+    # Absolute paths, so the job can be resumed from another directory.
+    wav_files = [path.absolute() for path in expand_wav_files(files)]
+
+    path = get_job_path(job_id, jobs_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    store = DetectionStore(path)
+    statuses = []
+    try:
+        # Survive power losses too, not only crashes of the process.
+        store.connection.execute("PRAGMA synchronous=FULL")
+        _check_parameters(
+            store,
+            job_id,
+            {
+                "time_expansion": time_expansion,
+                "features": features,
+                "frequency_band": frequency_band,
+                "gate": None if gate is None else asdict(gate),
+            },
+        )
+
+        done = store.processed_files()
+        pending = [wav for wav in wav_files if wav not in done]
+
+        if pending:
+            for result in iter_batch_results(
+                pending,
+                processes=processes,
+                batch_size=batch_size,
+                history=history,
+                threads=threads,
+                time_expansion=time_expansion,
+                features=features,
+                frequency_band=frequency_band,
+                priority=priority,
+                pin_cpus=pin_cpus,
+                memory_budget=memory_budget,
+                gate=gate,
+            ):
+                store.add_result(result)
+                statuses.append(result.status)
+
+        skipped = store.skipped_files()
+    except BaseException:
+        store.close()
+        raise
+
+    status = merge_run_status(statuses)
+    status.skipped = [wav for wav in wav_files if wav in skipped]
+    return LazyDetections(store, wav_files), status
@@ -0,0 +1,266 @@
+"""Lazy access to the detections of a Tadarida-D run.
+
+run_tadarida returns the detections of all files in a single dataframe,
+which is wasteful when only a few files are needed. run_tadarida_lazy
+instead spills the detections to an SQLite database (see
+pytadarida.store) as the .ta files are parsed, a few files at a time, and
+returns a LazyDetections object that reads them back per file, with only
+the requested columns, when asked.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from pytadarida.commands import tadarida_outputs
+from pytadarida.logs import RunStatus
+from pytadarida.monitor import ResourceUsage
+from pytadarida.parsing import parse_detections
+from pytadarida.priority import ProcessPriority
+from pytadarida.profiling import PhaseHook, timed_phase
+from pytadarida.store import DetectionStore
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "LazyDetections",
+    "run_tadarida_lazy",
+]
+
+
+SPILL_CHUNK_SIZE = 64
+"""Number of .ta files parsed and written to the spill database at once."""
+
+
+def _with_paths(detections: pd.DataFrame) -> pd.DataFrame:
+    """Turn the wav column back into paths, as returned by run_tadarida."""
+    if "wav" in detections.columns:
+        detections["wav"] = detections["wav"].map(Path)
+    return detections
+
+
+class LazyDetections:
+    """Detections of a run, read from disk on demand.
+
+    Can be used as a context manager, which closes it on exit.
+
+    Parameters
+    ----------
+    store : DetectionStore
+        The database holding the detections.
+    files : list of Path
+        The processed .wav files, including those without detections.
+    delete : bool, optional
+        Whether to delete the database when closed.
+    """
+
+    def __init__(
+        self,
+        store: DetectionStore,
+        files: List[Path],
+        delete: bool = False,
+    ):
+        self.store = store
+        self.files = files
+        self.delete = delete
+        self._file_set = set(files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, wav: object) -> bool:
+        return isinstance(wav, (str, os.PathLike)) and Path(wav) in (
+            self._file_set
+        )
+
+    def __getitem__(self, wav: PathLike) -> pd.DataFrame:
+        return self.get(wav)
+
+    def get(
+        self,
+        wav: PathLike,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Read the detections of a single file.
+
+        Parameters
+        ----------
+        wav : str or os.PathLike
+            The .wav file, as given to the run.
+        columns : list of str, optional
+            The columns to read. All of them by default.
+
+        Returns
+        -------
+        pd.DataFrame
+
+        Raises
+        ------
+        KeyError
+            If the file was not processed in this run.
+
+        """
+        if wav not in self:
+            raise KeyError(f"File {wav} was not processed in this run.")
+
+        return _with_paths(self.store.query(wav=Path(wav), columns=columns))
+
+    def iter_files(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fmin: Optional[float] = None,
+        fmax: Optional[float] = None,
+    ) -> Iterator[Tuple[Path, pd.DataFrame]]:
+        """Iterate over the detections of each file.
+
+        Only one file is held in memory at a time. Files without matching
+        detections are skipped.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            The columns to read. All of them by default.
+        start, end, fmin, fmax : float, optional
+            Conditions on the start time and frequency range of the
+            detections, see DetectionStore.query.
+
+        Yields
+        ------
+        wav : Path
+        detections : pd.DataFrame
+
+        """
+        for wav in self.files:
+            detections = self.store.query(
+                wav=wav,
+                start=start,
+                end=end,
+                fmin=fmin,
+                fmax=fmax,
+                columns=columns,
+            )
+            if len(detections):
+                yield wav, _with_paths(detections)
+
+    def to_dataframe(
+        self,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Read the detections of all files into a single dataframe."""
+        return _with_paths(self.store.query(columns=columns))
+
+    def close(self):
+        """Close the database, and delete it if it was temporary."""
+        self.store.close()
+
+        if not self.delete:
+            return
+
+        for suffix in ["", "-wal", "-shm"]:
+            Path(f"{self.store.path}{suffix}").unlink(missing_ok=True)
+
+    def __enter__(self) -> "LazyDetections":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _chunks(items: List[Path], size: int) -> Iterable[List[Path]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def run_tadarida_lazy(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,duplicate-code
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    spill_path: Optional[PathLike] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features=2,
+    frequency_band: Literal[1, 2] = 1,
+    workdir: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+    hook: Optional[PhaseHook] = None,
+) -> Tuple[LazyDetections, RunStatus]:
+    """Run the tadarida binary and keep the detections on disk.
+
+    The .ta files are parsed a few at a time and written to an SQLite
+    database, so memory use does not grow with the number of files.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    spill_path : str or os.PathLike, optional
+        Database where the detections are written. By default a temporary
+        file is used, which is deleted when the result is closed.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    workdir, priority, usage, hook : optional
+        Execution options, see run_tadarida.
+
+    Returns
+    -------
+    detections: LazyDetections
+        Access to the detected sound events.
+    status: RunStatus
+        The status of the run.
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    delete = spill_path is None
+    if spill_path is None:
+        handle, spill_path = tempfile.mkstemp(
+            prefix="pytadarida-",
+            suffix=".db",
+        )
+        os.close(handle)
+
+    store = DetectionStore(spill_path)
+    try:
+        with tadarida_outputs(
+            files,
+            threads=threads,
+            time_expansion=time_expansion,
+            features=features,
+            frequency_band=frequency_band,
+            workdir=workdir,
+            priority=priority,
+            usage=usage,
+            hook=hook,
+        ) as (outputs, status):
+            wav_files = list(outputs)
+            for chunk in _chunks(wav_files, SPILL_CHUNK_SIZE):
+                with timed_phase("parse", status.timings, hook):
+                    detections = parse_detections(
+                        {wav: outputs[wav] for wav in chunk}
+                    )
+                    store.add_batch(detections, chunk)
+
+                status.detections += len(detections)
+    except BaseException:
+        LazyDetections(store, [], delete=delete).close()
+        raise
+
+    return LazyDetections(store, wav_files, delete=delete), status
@@ -16,12 +16,16 @@ the detected sound events and any internal processing info.
 The log files are stored in a "log" directory at the current working directory.
 """
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+PathLike = Union[str, os.PathLike]
 
 __all__ = [
     "clean_logs",
     "get_run_status",
+    "merge_run_status",
 ]
 
 
@@ -32,98 +36,168 @@ DETECT_LOG = LOG_DIR / "detec.log"
 
 
 @dataclass
-class RunStatus:
+class RunStatus:  # pylint: disable=too-many-instance-attributes
     """Class for storing the status of a run.
 
     Attributes:
         stdout: The contents of the tadarida log file.
         error: The contents of the error log file.
         detect: The contents of the detection log file.
+        peak_rss: The peak resident memory of the tadarida process, in
+            bytes.
+        cpu_time: The CPU time used by the tadarida process, in seconds.
+        skipped: The files that were not processed because they did not pass
+            the pre-screen.
+        timings: The time spent in each phase of the run, in seconds (see
+            pytadarida.profiling.PHASES).
+        files: The number of files processed by the tadarida binary.
+        detections: The number of detected sound events.
     """
 
     stdout: str
     error: str
     detect: str
+    peak_rss: int = 0
+    cpu_time: float = 0.0
+    skipped: List[Path] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    files: int = 0
+    detections: int = 0
 
 
-def read_error_log() -> str:
+def read_error_log(log_dir: PathLike = LOG_DIR) -> str:
     """Read the error log file.
 
+    Args:
+        log_dir: The directory containing the log files.
+
     Returns:
         The contents of the error log file. If the file does not exist,
         an empty string is returned.
     """
-    if not ERROR_LOG.exists():
+    path = Path(log_dir) / ERROR_LOG.name
+
+    if not path.exists():
         return ""
 
-    with open(ERROR_LOG, "r", encoding="utf-8") as logfile:
+    with open(path, "r", encoding="utf-8") as logfile:
         error_log = logfile.read()
 
     return error_log
 
 
-def read_detect_log() -> str:
+def read_detect_log(log_dir: PathLike = LOG_DIR) -> str:
     """Read the detection log file.
 
+    Args:
+        log_dir: The directory containing the log files.
+
     Returns:
         The contents of the detection log file. If the file does not exist,
         an empty string is returned.
     """
-    if not DETECT_LOG.exists():
+    path = Path(log_dir) / DETECT_LOG.name
+
+    if not path.exists():
         return ""
 
-    with open(DETECT_LOG, "r", encoding="utf-8") as logfile:
+    with open(path, "r", encoding="utf-8") as logfile:
         detect_log = logfile.read()
 
     return detect_log
 
 
-def read_tadarida_log() -> str:
+def read_tadarida_log(log_dir: PathLike = LOG_DIR) -> str:
     """Read the tadarida log file.
 
+    Args:
+        log_dir: The directory containing the log files.
+
     Returns:
         The contents of the tadarida log file. If the file does not exist,
         an empty string is returned.
     """
-    if not STDOUT_LOG.exists():
+    path = Path(log_dir) / STDOUT_LOG.name
+
+    if not path.exists():
         return ""
 
-    with open(STDOUT_LOG, "r", encoding="utf-8") as logfile:
+    with open(path, "r", encoding="utf-8") as logfile:
         tadarida_log = logfile.read()
 
     return tadarida_log
 
 
-def get_run_status() -> RunStatus:
+def get_run_status(log_dir: PathLike = LOG_DIR) -> RunStatus:
     """Get the status of a run.
 
     Clears the log files after reading them.
 
+    Args:
+        log_dir: The directory containing the log files. Tadarida-D writes
+            its logs to a "log" directory at its working directory.
+
     Returns:
         A RunStatus object containing the contents of the log files.
     """
-    tadarida_log = read_tadarida_log()
-    error_log = read_error_log()
-    detect_log = read_detect_log()
+    tadarida_log = read_tadarida_log(log_dir)
+    error_log = read_error_log(log_dir)
+    detect_log = read_detect_log(log_dir)
 
-    clean_logs()
+    clean_logs(log_dir)
 
     return RunStatus(tadarida_log, error_log, detect_log)
 
 
-def clean_logs():
+def merge_run_status(statuses: Iterable[RunStatus]) -> RunStatus:
+    """Merge the status of several runs into a single one.
+
+    The contents of each log are concatenated in the given order. The peak
+    memory is the largest of all runs, the CPU times, phase timings and counts
+    are added up and the skipped files are gathered.
+
+    Args:
+        statuses: The status of each run.
+
+    Returns:
+        A RunStatus object containing the logs of all runs.
+    """
+    statuses = list(statuses)
+
+    timings: Dict[str, float] = {}
+    for status in statuses:
+        for phase, seconds in status.timings.items():
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    return RunStatus(
+        stdout="".join(status.stdout for status in statuses),
+        error="".join(status.error for status in statuses),
+        detect="".join(status.detect for status in statuses),
+        peak_rss=max((status.peak_rss for status in statuses), default=0),
+        cpu_time=sum(status.cpu_time for status in statuses),
+        skipped=[path for status in statuses for path in status.skipped],
+        timings=timings,
+        files=sum(status.files for status in statuses),
+        detections=sum(status.detections for status in statuses),
+    )
+
+
+def clean_logs(log_dir: PathLike = LOG_DIR):
     """Remove the log files.
 
     Does not raise errors if the log files do not exist. Deletes the log
     dir if empty after removing the log files.
+
+    Args:
+        log_dir: The directory containing the log files.
     """
-    log_dir = Path("log")
+    log_dir = Path(log_dir)
 
     if not log_dir.exists():
         return
 
     for log_file in [STDOUT_LOG, ERROR_LOG, DETECT_LOG]:
-        log_file.unlink(missing_ok=True)
+        (log_dir / log_file.name).unlink(missing_ok=True)
 
     if not os.listdir(log_dir):
         log_dir.rmdir()
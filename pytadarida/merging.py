@@ -0,0 +1,218 @@
+"""Merge sorted detections of several batches into a single ordered result.
+
+Batches of a parallel run finish in any order, so their concatenated
+detections are not in a deterministic order, and sorting the whole result by
+file and start time costs O(n log n) on tens of millions of rows. Instead,
+each batch is sorted when it is done, which is cheap as batches are small,
+and the sorted batches are then merged.
+
+Files are split across batches, so the merge works on blocks of rows of the
+same file: heapq.merge orders the blocks of all the batches by file name,
+which costs O(f log k) for f files in k batches, and the rows of the blocks
+are then copied with a few vectorized takes per chunk of output. Blocks of
+the same file in several batches are merged by start time.
+
+The canonical order is by .wav file path, as a string, then by start time
+(StTime), ties keeping the order of the batches and of their rows.
+"""
+import heapq
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+__all__ = [
+    "iter_merged",
+    "merge_sorted",
+    "sort_detections",
+]
+
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+"""Number of rows in each chunk of merged detections."""
+
+_Block = Tuple[str, int, int, int]
+"""Rows of a file in a batch: its path, the batch, the first and last row."""
+
+
+def sort_detections(detections: "pd.DataFrame") -> "pd.DataFrame":
+    """Sort detections by file then start time.
+
+    Parameters
+    ----------
+    detections : pd.DataFrame
+        Detections with "wav" and "StTime" columns, as returned by
+        run_tadarida.
+
+    Returns
+    -------
+    pd.DataFrame
+        The detections in canonical order, with a new index. Detections
+        with the same file and start time keep their order.
+
+    """
+    if detections.empty:
+        return detections
+
+    # Imported here so that importing pytadarida does not load numpy and pandas.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    codes, _ = pd.factorize(detections["wav"].map(str), sort=True)
+    order = np.lexsort((detections["StTime"].to_numpy(dtype=np.float64), codes))
+    return detections.take(order).reset_index(drop=True)
+
+
+def _iter_blocks(index: int, detections: "pd.DataFrame") -> Iterator[_Block]:
+    """Get the blocks of rows of each file of a sorted batch.
+
+    Raises:
+        ValueError: If the batch is not sorted by file.
+    """
+    # Imported here so that importing pytadarida does not load numpy and pandas.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    codes, wavs = pd.factorize(detections["wav"])
+    bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], bounds])
+    stops = np.concatenate([bounds, [len(codes)]])
+
+    names = [str(wav) for wav in wavs]
+    if any(first >= second for first, second in zip(names, names[1:])):
+        raise ValueError(f"Batch {index} is not sorted by file.")
+
+    for start, stop in zip(starts, stops):
+        yield names[codes[start]], index, int(start), int(stop)
+
+
+def _ranges(starts: "np.ndarray", stops: "np.ndarray") -> "np.ndarray":
+    """Concatenate the ranges from starts to stops."""
+    # Imported here so that importing pytadarida does not load numpy.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    lengths = stops - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+def _take_blocks(  # pylint: disable=too-many-locals
+    frames: List["pd.DataFrame"],
+    blocks: List[_Block],
+) -> "pd.DataFrame":
+    """Copy the rows of consecutive blocks, in the order of the blocks."""
+    # Imported here so that importing pytadarida does not load numpy and pandas.
+    import numpy as np  # pylint: disable=import-outside-toplevel
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    wavs = [block[0] for block in blocks]
+    batches = np.array([block[1] for block in blocks])
+    starts = np.array([block[2] for block in blocks])
+    stops = np.array([block[3] for block in blocks])
+    lengths = stops - starts
+    out_starts = np.cumsum(lengths) - lengths
+    out_stops = out_starts + lengths
+
+    pieces = []
+    slots = []
+    for batch in np.unique(batches):
+        selected = batches == batch
+        pieces.append(
+            frames[batch].take(_ranges(starts[selected], stops[selected]))
+        )
+        slots.append(_ranges(out_starts[selected], out_stops[selected]))
+
+    combined = pd.concat(pieces, ignore_index=True)
+    order = np.empty(len(combined), dtype=np.int64)
+    order[np.concatenate(slots)] = np.arange(len(combined))
+
+    # Blocks of the same file from several batches, merged by start time.
+    times = combined["StTime"].to_numpy(dtype=np.float64)
+    first = 0
+    for last in range(1, len(blocks) + 1):
+        if last < len(blocks) and wavs[last] == wavs[first]:
+            continue
+
+        if last - first > 1:
+            span = order[out_starts[first] : out_stops[last - 1]]
+            span[:] = span[np.argsort(times[span], kind="stable")]
+        first = last
+
+    return combined.take(order).reset_index(drop=True)
+
+
+def iter_merged(
+    frames: Iterable["pd.DataFrame"],
+    chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+) -> Iterator["pd.DataFrame"]:
+    """Merge sorted detections, in chunks.
+
+    Parameters
+    ----------
+    frames : list of pd.DataFrame
+        Detections of each batch, each sorted with sort_detections.
+        Dataframes without columns, such as those of skipped files, are
+        ignored.
+    chunk_size : int, optional
+        Approximate number of rows of each chunk. The rows of a file are
+        never split across chunks. With None, a single chunk is returned.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive chunks of the merged detections, in canonical order.
+
+    Raises
+    ------
+    ValueError
+        If a batch is not sorted by file.
+
+    """
+    frames = [frame for frame in frames if not frame.empty]
+
+    blocks: List[_Block] = []
+    rows = 0
+    for block in heapq.merge(
+        *[_iter_blocks(index, frame) for index, frame in enumerate(frames)]
+    ):
+        if (
+            chunk_size is not None
+            and rows >= chunk_size
+            and block[0] != blocks[-1][0]
+        ):
+            yield _take_blocks(frames, blocks)
+            blocks, rows = [], 0
+
+        blocks.append(block)
+        rows += block[3] - block[2]
+
+    if blocks:
+        yield _take_blocks(frames, blocks)
+
+
+def merge_sorted(frames: Iterable["pd.DataFrame"]) -> "pd.DataFrame":
+    """Merge sorted detections into a single dataframe.
+
+    Parameters
+    ----------
+    frames : list of pd.DataFrame
+        Detections of each batch, each sorted with sort_detections.
+
+    Returns
+    -------
+    pd.DataFrame
+        All the detections, in canonical order.
+
+    Raises
+    ------
+    ValueError
+        If a batch is not sorted by file.
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    chunks = list(iter_merged(frames, chunk_size=None))
+    return chunks[0] if chunks else pd.DataFrame()
@@ -0,0 +1,340 @@
+"""Throughput metrics of Tadarida-D runs, in the OpenMetrics text format.
+
+Long running workers that call run_tadarida in a loop can pass a
+MetricsRegistry to each run. The registry counts the processed, failed and
+skipped files, the detections and the bytes of audio read, and keeps
+histograms of the time spent running the binary and parsing its output.
+
+The metrics can be written to a text file, to be collected for instance by
+the textfile collector of the Prometheus node exporter, or served over HTTP
+to be scraped directly::
+
+    metrics = MetricsRegistry()
+    metrics.serve(9464)
+
+    while True:
+        detections, status = run_tadarida(next_files(), metrics=metrics)
+
+Only the standard library is used, so no Prometheus client is needed.
+"""
+import bisect
+import math
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import (
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pytadarida.logs import RunStatus
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+]
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+"""Content type of the OpenMetrics text format."""
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+"""Upper bounds, in seconds, of the buckets of the latency histograms."""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing total.
+
+    Parameters
+    ----------
+    name : str
+        Name of the metric, without the "_total" suffix.
+    documentation : str
+        Description of the metric.
+    """
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.value: float = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        """Increase the counter.
+
+        Raises
+        ------
+        ValueError
+            If the amount is negative.
+
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be increased.")
+
+        with self._lock:
+            self.value += amount
+
+    def expose(self) -> List[str]:
+        """Lines of the metric in the OpenMetrics text format."""
+        with self._lock:
+            value = self.value
+
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+            f"{self.name}_total {_format_value(value)}",
+        ]
+
+
+class Histogram:
+    """Distribution of observed values, counted in cumulative buckets.
+
+    Parameters
+    ----------
+    name : str
+        Name of the metric.
+    documentation : str
+        Description of the metric.
+    buckets : list of float, optional
+        Upper bounds of the buckets, in increasing order. A bucket for
+        +Inf is always added.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        bounds = [float(bound) for bound in buckets]
+        if bounds != sorted(bounds):
+            raise ValueError("Buckets must be in increasing order.")
+
+        if not bounds or not math.isinf(bounds[-1]):
+            bounds.append(math.inf)
+
+        self.name = name
+        self.documentation = documentation
+        self.bounds: Tuple[float, ...] = tuple(bounds)
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Add a value to the distribution."""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def expose(self) -> List[str]:
+        """Lines of the metric in the OpenMetrics text format."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        cumulative = 0
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            lines.append(
+                f'{self.name}_bucket{{le="{_format_value(bound)}"}} '
+                f"{cumulative}"
+            )
+
+        lines.append(f"{self.name}_count {cumulative}")
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        return lines
+
+
+def _size(path: PathLike) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class MetricsRegistry:  # pylint: disable=too-many-instance-attributes
+    """Metrics of all the runs of a process.
+
+    The registry is thread safe, so it can be shared by runs in several
+    threads.
+
+    Parameters
+    ----------
+    buckets : list of float, optional
+        Upper bounds, in seconds, of the buckets of the latency histograms.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.runs = Counter("pytadarida_runs", "Runs of the TadaridaD binary.")
+        self.runs_failed = Counter(
+            "pytadarida_runs_failed",
+            "Runs of the TadaridaD binary that failed.",
+        )
+        self.files_processed = Counter(
+            "pytadarida_files_processed", "Files processed by TadaridaD."
+        )
+        self.files_failed = Counter(
+            "pytadarida_files_failed", "Files of runs that failed."
+        )
+        self.files_skipped = Counter(
+            "pytadarida_files_skipped", "Files skipped by the pre-screen."
+        )
+        self.detections = Counter(
+            "pytadarida_detections", "Sound events detected."
+        )
+        self.bytes_read = Counter(
+            "pytadarida_read_bytes", "Bytes of audio files processed."
+        )
+        self.binary_seconds = Histogram(
+            "pytadarida_binary_seconds",
+            "Wall time of each run of the TadaridaD binary, in seconds.",
+            buckets,
+        )
+        self.parse_seconds = Histogram(
+            "pytadarida_parse_seconds",
+            "Time spent parsing the output files of each run, in seconds.",
+            buckets,
+        )
+
+    @property
+    def metrics(self) -> List[Union[Counter, Histogram]]:
+        """All the metrics of the registry."""
+        return [
+            metric
+            for metric in vars(self).values()
+            if isinstance(metric, (Counter, Histogram))
+        ]
+
+    def observe(self, status: RunStatus, files: Iterable[PathLike] = ()):
+        """Record a successful run.
+
+        Parameters
+        ----------
+        status : RunStatus
+            The status returned by the run.
+        files : list of str or os.PathLike, optional
+            The .wav files processed by the binary, to count the bytes read.
+        """
+        self.files_skipped.inc(len(status.skipped))
+
+        if "run" not in status.timings:
+            # Every file was skipped, the binary did not run.
+            return
+
+        self.runs.inc()
+        self.files_processed.inc(status.files)
+        self.detections.inc(status.detections)
+        self.bytes_read.inc(sum(_size(path) for path in files))
+        self.binary_seconds.observe(status.timings["run"])
+
+        if "parse" in status.timings:
+            self.parse_seconds.observe(status.timings["parse"])
+
+    def observe_failure(self, files: Iterable[PathLike] = ()):
+        """Record a run that raised an error.
+
+        Parameters
+        ----------
+        files : list of str or os.PathLike, optional
+            The .wav files of the run.
+        """
+        self.runs_failed.inc()
+        self.files_failed.inc(len(list(files)))
+
+    def exposition(self) -> str:
+        """Get all the metrics in the OpenMetrics text format."""
+        lines = [line for metric in self.metrics for line in metric.expose()]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: PathLike):
+        """Write the metrics to a file.
+
+        The file is replaced atomically, so a collector never reads a
+        partially written file.
+
+        Parameters
+        ----------
+        path : str or os.PathLike
+        """
+        path = Path(path)
+        handle, temporary = tempfile.mkstemp(
+            dir=path.parent,
+            prefix=f".{path.name}.",
+        )
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as output:
+                output.write(self.exposition())
+            os.replace(temporary, path)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+
+    def serve(
+        self,
+        port: int = 0,
+        host: str = "127.0.0.1",
+    ) -> ThreadingHTTPServer:
+        """Serve the metrics over HTTP, from a background thread.
+
+        Parameters
+        ----------
+        port : int, optional
+            Port to listen on. By default a free port is chosen, see the
+            server_address attribute of the returned server.
+        host : str, optional
+            Address to listen on. Only local connections are accepted by
+            default.
+
+        Returns
+        -------
+        ThreadingHTTPServer
+            The running server. Call its shutdown method to stop it.
+
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answer every GET request with the metrics."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Send the metrics in the OpenMetrics text format."""
+                body = registry.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                """Do not log every scrape."""
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(
+            target=server.serve_forever,
+            name="pytadarida-metrics",
+            daemon=True,
+        )
+        thread.start()
+        return server
@@ -0,0 +1,140 @@
+"""Monitor the resource usage of TadaridaD processes.
+
+TadaridaD can use a lot of memory when running many threads on large files.
+This module samples the resident memory (RSS) and CPU time of a running
+process from the /proc filesystem, so that runs can report their peak memory
+and new runs can be delayed when memory runs short.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+__all__ = [
+    "ProcessMonitor",
+    "ResourceUsage",
+    "read_process_usage",
+]
+
+
+PROC_DIR = Path("/proc")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+MONITOR_INTERVAL = 0.1
+"""Default time between samples, in seconds."""
+
+
+@dataclass
+class ResourceUsage:
+    """Resource usage of a process.
+
+    Attributes:
+        rss: Resident memory at the last sample, in bytes. Zero once the
+            process has finished.
+        peak_rss: Largest resident memory observed, in bytes.
+        cpu_time: User and system CPU time at the last sample, in seconds.
+    """
+
+    rss: int = 0
+    peak_rss: int = 0
+    cpu_time: float = 0.0
+
+
+def read_process_usage(pid: int) -> Optional[Tuple[int, float]]:
+    """Read the current memory and CPU time of a process.
+
+    Parameters
+    ----------
+    pid : int
+
+    Returns
+    -------
+    tuple of int and float, or None
+        The resident memory in bytes and the CPU time in seconds, or None if
+        the process does not exist or /proc is not available.
+
+    """
+    try:
+        statm = (PROC_DIR / str(pid) / "statm").read_text()
+        stat = (PROC_DIR / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+
+    rss = int(statm.split()[1]) * PAGE_SIZE
+
+    # The process name can contain spaces, fields are counted after it.
+    fields = stat[stat.rindex(")") + 2 :].split()
+    utime, stime = int(fields[11]), int(fields[12])
+
+    return rss, (utime + stime) / CLOCK_TICKS
+
+
+class ProcessMonitor:
+    """Sample the resource usage of a process in a background thread.
+
+    Can be used as a context manager, which stops the sampling on exit.
+
+    Parameters
+    ----------
+    pid : int
+        The process to monitor.
+    usage : ResourceUsage, optional
+        Object updated with every sample. A new one is created if not given.
+    interval : float, optional
+        Time between samples, in seconds.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        usage: Optional[ResourceUsage] = None,
+        interval: float = MONITOR_INTERVAL,
+    ):
+        self.pid = pid
+        self.usage = ResourceUsage() if usage is None else usage
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+        self.usage.rss = 0
+
+    def sample(self):
+        """Take a single sample of the resource usage."""
+        current = read_process_usage(self.pid)
+        if current is None:
+            return
+
+        rss, cpu_time = current
+
+        # A finished process that was not reaped yet reports no memory.
+        if rss == 0 and cpu_time == 0:
+            return
+
+        self.usage.rss = rss
+        self.usage.peak_rss = max(self.usage.peak_rss, rss)
+        self.usage.cpu_time = max(self.usage.cpu_time, cpu_time)
+
+    def _loop(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> "ProcessMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,255 @@
+"""Find the unique recordings among the inputs of a run.
+
+The same recording can reach Tadarida-D more than once: a directory and a
+file inside it, relative and absolute paths, symbolic links, or copies of
+the same file in several folders. Processing it more than once wastes a
+TadaridaD process slot and produces the same detections every time.
+
+normalize_inputs resolves the real path of every input .wav file and, if
+asked, compares the contents of the files, first by size and then by
+hash. Each unique recording is processed once, under the first path given
+for it, and its detections are then copied to every other path (alias) it
+was given under, so the results are the same as if all paths had been
+processed.
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pytadarida.configs import FILENAME_COLUMN
+from pytadarida.output import expand_wav_files
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "DedupMode",
+    "NormalizedInputs",
+    "find_identical_files",
+    "normalize_inputs",
+]
+
+
+DedupMode = Literal["path", "content"]
+"""How duplicated recordings are found: by real path, or also by content."""
+
+PREFIX_SIZE = 64 * 1024
+"""Number of bytes hashed first, to tell most different files apart."""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+"""Number of bytes read at once when hashing a whole file."""
+
+
+@dataclass
+class NormalizedInputs:
+    """Unique recordings among the inputs of a run.
+
+    Attributes:
+        files: The unique recordings, each given by the first path it was
+            found under, in the order of the inputs.
+        aliases: Every path of each unique recording, in the order of the
+            inputs, keyed by the path in files.
+    """
+
+    files: List[Path]
+    aliases: Dict[Path, List[Path]]
+
+    @property
+    def has_duplicates(self) -> bool:
+        """Whether some recordings were given more than once."""
+        return any(len(paths) > 1 for paths in self.aliases.values())
+
+    def fan_out_files(self, files: Iterable[Path]) -> List[Path]:
+        """Replace each unique recording by all its paths."""
+        return [alias for path in files for alias in self.aliases[path]]
+
+    def fan_out(self, detections: "pd.DataFrame") -> "pd.DataFrame":
+        """Copy the detections of each unique recording to all its paths.
+
+        Parameters
+        ----------
+        detections : pd.DataFrame
+            Detections of the unique recordings, with a "wav" column.
+
+        Returns
+        -------
+        pd.DataFrame
+            The detections of every path, grouped by path in the order of
+            the inputs. The Filename column holds the name of each path.
+
+        """
+        if not self.has_duplicates or detections.columns.empty:
+            return detections
+
+        # Imported here so that importing pytadarida does not load numpy.
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        rows = detections.groupby("wav", sort=False).indices
+
+        positions = []
+        wavs = []
+        for path in self.files:
+            indices = rows.get(path)
+            if indices is None:
+                continue
+
+            for alias in self.aliases[path]:
+                positions.append(indices)
+                wavs.extend([alias] * len(indices))
+
+        if not positions:
+            return detections.iloc[:0]
+
+        result = detections.iloc[np.concatenate(positions)].reset_index(
+            drop=True
+        )
+        result["wav"] = wavs
+        if FILENAME_COLUMN in result.columns:
+            result[FILENAME_COLUMN] = [wav.name for wav in wavs]
+        return result
+
+
+def _hash_file(path: Path, size: Optional[int] = None) -> bytes:
+    """Hash the first size bytes of a file, or all of it."""
+    digest = hashlib.blake2b(digest_size=32)
+    remaining = size
+    with open(path, "rb") as wav:
+        while remaining is None or remaining > 0:
+            chunk = wav.read(
+                HASH_CHUNK_SIZE
+                if remaining is None
+                else min(HASH_CHUNK_SIZE, remaining)
+            )
+            if not chunk:
+                break
+
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    return digest.digest()
+
+
+def _group_by(
+    files: List[Path],
+    key,
+    workers: Optional[int],
+) -> List[List[Path]]:
+    """Group files by a key, keeping only groups of several files."""
+    if workers is None or workers <= 1:
+        keys = [key(path) for path in files]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            keys = list(executor.map(key, files))
+
+    groups: Dict[object, List[Path]] = {}
+    for path, value in zip(files, keys):
+        groups.setdefault(value, []).append(path)
+
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_identical_files(
+    files: Iterable[PathLike],
+    workers: Optional[int] = None,
+) -> List[List[Path]]:
+    """Find files with the same contents.
+
+    Files are first grouped by size. Files of the same size are compared by
+    the hash of their first bytes, and only those that still match are
+    hashed in full.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        The files to compare.
+    workers : int, optional
+        Number of threads used to hash several files at once.
+
+    Returns
+    -------
+    list of list of Path
+        Groups of identical files, in the order they were given. Files that
+        have no copy are not listed.
+
+    """
+    files = [Path(path) for path in files]
+
+    identical = []
+    for same_size in _group_by(files, os.path.getsize, None):
+        for same_prefix in _group_by(
+            same_size,
+            lambda path: _hash_file(path, PREFIX_SIZE),
+            workers,
+        ):
+            if os.path.getsize(same_prefix[0]) <= PREFIX_SIZE:
+                identical.append(same_prefix)
+                continue
+
+            identical.extend(_group_by(same_prefix, _hash_file, workers))
+
+    return identical
+
+
+def normalize_inputs(
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    mode: DedupMode = "path",
+    workers: Optional[int] = None,
+) -> NormalizedInputs:
+    """Find the unique recordings among the given files and directories.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files
+        and directories.
+    mode : {"path", "content"}, optional
+        With "path", files with the same real path, after resolving
+        symbolic links, are the same recording. With "content", files with
+        the same contents are also the same recording.
+    workers : int, optional
+        Number of threads used to hash files in "content" mode.
+
+    Returns
+    -------
+    NormalizedInputs
+
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    wav_files = expand_wav_files(files)
+
+    aliases: Dict[Path, List[Path]] = {}
+    real_paths: Dict[str, Path] = {}
+    for path in wav_files:
+        real_path = os.path.realpath(path)
+        first = real_paths.setdefault(real_path, path)
+        aliases.setdefault(first, []).append(path)
+
+    if mode == "content":
+        order = {path: index for index, path in enumerate(wav_files)}
+        for group in find_identical_files(aliases, workers=workers):
+            first = group[0]
+            for path in group[1:]:
+                aliases[first].extend(aliases.pop(path))
+            aliases[first].sort(key=order.__getitem__)
+
+    return NormalizedInputs(files=list(aliases), aliases=aliases)
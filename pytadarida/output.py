@@ -8,16 +8,20 @@ corresponding .ta files from a given audio file or a directory of audio
 files.
 """
 import os
-import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple, Union
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 PathLike = Union[str, os.PathLike]
 
 
 __all__ = [
+    "expand_wav_files",
     "get_output_files",
     "clean_output_files",
+    "remove_output_files",
+    "stage_files",
 ]
 
 
@@ -41,6 +45,71 @@ def get_wav_files(path: PathLike) -> List[Path]:
     return list(path.glob("**/*.[wW][aA][vV]"))
 
 
+def expand_wav_files(
+    files: Union[Tuple[PathLike, ...], List[PathLike], Iterable[PathLike]],
+) -> List[Path]:
+    """Expand the given paths into a list of .wav files.
+
+    Directories are replaced by all the .wav files they contain. Duplicated
+    paths are removed and the order of the inputs is preserved.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        A file can be a wav file or a directory.
+
+    Returns
+    -------
+    list of Path
+
+    """
+    wav_files: Dict[Path, None] = {}
+    for filename in files:
+        path = Path(filename)
+
+        if path.is_dir():
+            wav_files.update(dict.fromkeys(sorted(get_wav_files(path))))
+            continue
+
+        wav_files[path] = None
+
+    return list(wav_files)
+
+
+def stage_files(files: Iterable[Path], directory: Path) -> Dict[Path, Path]:
+    """Link the files into numbered subdirectories of a directory.
+
+    Each file is linked under its own name, and files with the same name
+    are linked into different subdirectories. The subdirectories can be
+    given to Tadarida-D instead of the files, and their .wav files keep
+    the names of the originals.
+
+    Parameters
+    ----------
+    files : list of Path
+    directory : Path
+        The directory in which the subdirectories are created.
+
+    Returns
+    -------
+    dict of Path to Path
+        A mapping from each staged path to the original file.
+
+    """
+    staged = {}
+    name_counts: Dict[str, int] = {}
+    for path in files:
+        count = name_counts.get(path.name, 0)
+        name_counts[path.name] = count + 1
+
+        target = directory / str(count) / path.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.symlink_to(os.path.abspath(path))
+        staged[target] = path
+
+    return staged
+
+
 def get_output_files_from_path(
     path: PathLike,
 ) -> Dict[Path, Path]:
@@ -110,7 +179,71 @@ def get_output_files(
     return output_files
 
 
-def clean_output_files(files: Iterable[PathLike]):
+def _remove_directory_outputs(directory: Path, ta_files: List[Path]):
+    """Remove the .ta files of a directory, and the directory if empty."""
+    for ta_file in ta_files:
+        try:
+            os.remove(ta_file)
+        except FileNotFoundError:
+            pass
+
+    try:
+        # Only succeeds if nothing else was left in the directory.
+        os.rmdir(directory)
+    except OSError:
+        pass
+
+
+def remove_output_files(
+    outputs: Union[Mapping[Path, Path], Iterable[PathLike]],
+    workers: Optional[int] = None,
+):
+    """Remove the given .ta files.
+
+    Files are grouped by directory, and each "txt" directory is removed
+    once all its .ta files are gone, if nothing else is left in it. Missing
+    files are ignored.
+
+    Parameters
+    ----------
+    outputs : dict of Path to Path or list of str or os.PathLike
+        Either a mapping of .wav files to their .ta files, as returned by
+        get_output_files, or a list of .ta files.
+    workers : int, optional
+        Number of threads used to clean several directories at once. By
+        default directories are cleaned one after the other.
+    """
+    if isinstance(outputs, Mapping):
+        ta_files: Iterable[PathLike] = outputs.values()
+    else:
+        ta_files = outputs
+
+    directories: Dict[Path, List[Path]] = defaultdict(list)
+    for ta_file in ta_files:
+        ta_file = Path(ta_file)
+        directories[ta_file.parent].append(ta_file)
+
+    if workers is None or workers <= 1 or len(directories) <= 1:
+        for directory, files in directories.items():
+            _remove_directory_outputs(directory, files)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results so that errors are raised.
+        list(
+            executor.map(
+                _remove_directory_outputs,
+                directories.keys(),
+                directories.values(),
+            )
+        )
+
+
+def clean_output_files(
+    files: Iterable[PathLike],
+    outputs: Optional[Mapping[Path, Path]] = None,
+    workers: Optional[int] = None,
+):
     """Clean the output files.
 
     Tadarida-D creates a subdirectory named "txt" in the directory of each
@@ -124,10 +257,13 @@ def clean_output_files(files: Iterable[PathLike]):
     files : list of str or os.PathLike
         A file can be a wav file or a directory. If it is a directory, all
         corresponding .ta files to the .wav files in the directory are deleted.
+    outputs : dict of Path to Path, optional
+        The output files of the given files, as returned by
+        get_output_files. If given, the directories are not searched again.
+    workers : int, optional
+        Number of threads used to clean several directories at once.
     """
-    output_files = get_output_files(files)
-    for ta_file in output_files.values():
-        ta_file = Path(ta_file)
-        os.remove(ta_file)
-        if not list(ta_file.parent.glob("*")):
-            shutil.rmtree(ta_file.parent)
+    if outputs is None:
+        outputs = get_output_files(files)
+
+    remove_output_files(outputs, workers=workers)
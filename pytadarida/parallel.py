@@ -0,0 +1,831 @@
+"""Run Tadarida-D in parallel over many files.
+
+This module splits the .wav files into batches, runs each batch in its own
+TadaridaD process and gathers the results. Files are assigned to batches
+according to their estimated processing cost (see pytadarida.scheduling),
+so that all processes finish at about the same time.
+
+Every batch runs in a private working directory where its .wav files are
+staged as symbolic links. Concurrent TadaridaD processes therefore never
+share log or output directories, and nothing is written next to the original
+recordings.
+"""
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pytadarida.batching import AdaptiveBatcher
+from pytadarida.configs import MEMORY_PER_THREAD
+from pytadarida.logs import RunStatus, merge_run_status
+from pytadarida.merging import merge_sorted, sort_detections
+from pytadarida.monitor import ResourceUsage
+from pytadarida.normalize import DedupMode, normalize_inputs
+from pytadarida.output import expand_wav_files, stage_files
+from pytadarida.priority import ProcessPriority, assign_cpus
+from pytadarida.profiling import timed_phase
+from pytadarida.runner import _run_outputs
+from pytadarida.scheduling import (
+    TimingHistory,
+    estimate_costs,
+    get_wav_duration,
+    lpt_schedule,
+    sort_by_cost,
+)
+from pytadarida.validate_inputs import validate_files
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pytadarida.metrics import MetricsRegistry
+    from pytadarida.screening import EnergyGate
+
+PathLike = Union[str, os.PathLike]
+
+THROTTLE_WAIT = 0.5
+"""Time, in seconds, between memory checks while new batches are on hold."""
+
+
+__all__ = [
+    "BatchResult",
+    "SweepConfig",
+    "iter_batch_results",
+    "iter_sweep_results",
+    "make_batches",
+    "run_batch",
+    "run_tadarida_parallel",
+    "run_tadarida_sweep",
+]
+
+
+@dataclass
+class BatchResult:
+    """Result of running Tadarida-D on a batch of files.
+
+    Attributes:
+        files: The .wav files of the batch.
+        detections: The detected sound events of all files in the batch.
+        status: The status of the TadaridaD run.
+        elapsed: Wall time of the run, in seconds.
+    """
+
+    files: List[Path]
+    detections: "pd.DataFrame"
+    status: RunStatus
+    elapsed: float
+
+
+@dataclass
+class _RunningBatch:
+    """Process slot options and live resource usage of a running batch."""
+
+    priority: Optional[ProcessPriority]
+    usage: ResourceUsage
+    files: List[Path]
+
+
+def _run_staged(  # pylint: disable=too-many-arguments,too-many-positional-arguments,duplicate-code
+    staged: Dict[Path, Path],
+    workdir: Path,
+    threads: int,
+    time_expansion: Literal[10, 1],
+    features: int,
+    frequency_band: Literal[1, 2],
+    priority: Optional[ProcessPriority],
+    usage: Optional[ResourceUsage],
+) -> BatchResult:
+    """Run Tadarida-D on staged files and map the results to the originals.
+
+    The files were validated and deduplicated before they were staged, so
+    the binary is run on the staging directories directly.
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    from pytadarida.parsing import (  # pylint: disable=import-outside-toplevel
+        parse_detections,
+    )
+
+    start = time.perf_counter()
+
+    with _run_outputs(
+        sorted({path.parent for path in staged}),
+        threads=threads,
+        time_expansion=time_expansion,
+        features=features,
+        frequency_band=frequency_band,
+        workdir=workdir,
+        priority=priority,
+        usage=usage,
+        hook=None,
+        timings={},
+    ) as (outputs, status):
+        with timed_phase("parse", status.timings):
+            detections = parse_detections(
+                {path: outputs[path] for path in staged}
+            )
+
+    detections["wav"] = detections["wav"].map(staged)
+    status.detections = len(detections)
+
+    return BatchResult(
+        files=list(staged.values()),
+        detections=detections,
+        status=status,
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def run_batch(  # pylint: disable=too-many-arguments,too-many-positional-arguments,duplicate-code
+    files: List[Path],
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+) -> BatchResult:
+    """Run Tadarida-D on a batch of .wav files in a private directory.
+
+    The files are run as they are given: they are expected to have been
+    validated, and duplicates are not removed.
+
+    Parameters
+    ----------
+    files : list of Path
+        The .wav files to process.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD process.
+    usage : ResourceUsage, optional
+        Object updated with the memory and CPU time of the TadaridaD process
+        while it runs.
+
+    Returns
+    -------
+    BatchResult
+
+    """
+    with tempfile.TemporaryDirectory(prefix="pytadarida-") as workdir:
+        return _run_staged(
+            stage_files(files, Path(workdir) / "audio"),
+            workdir=Path(workdir),
+            threads=threads,
+            time_expansion=time_expansion,
+            features=features,
+            frequency_band=frequency_band,
+            priority=priority,
+            usage=usage,
+        )
+
+
+def make_batches(
+    costs: Dict[Path, float],
+    processes: int = 1,
+    batch_size: Optional[int] = None,
+) -> List[List[Path]]:
+    """Split files into batches according to their processing cost.
+
+    If no batch size is given, the files are split into one batch per
+    process using longest-processing-time-first scheduling. Otherwise the
+    files are sorted from the most to the least expensive and cut into
+    batches of at most batch_size files. These are run in order by the first
+    available process, so the longest batches start first.
+
+    Parameters
+    ----------
+    costs : dict of Path to float
+        Estimated cost of each file.
+    processes : int, optional
+        Number of parallel TadaridaD processes.
+    batch_size : int, optional
+        Maximum number of files per batch.
+
+    Returns
+    -------
+    list of list of Path
+
+    """
+    if batch_size is None:
+        return lpt_schedule(costs, processes)
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    ordered = sort_by_cost(costs)
+    return [
+        ordered[start : start + batch_size]
+        for start in range(0, len(ordered), batch_size)
+    ]
+
+
+def _iter_batches(
+    costs: Dict[Path, float],
+    processes: int,
+    batch_size: Union[int, AdaptiveBatcher, None],
+) -> Iterator[List[Path]]:
+    """Generate batches, asking an adaptive batcher for each batch size."""
+    if not isinstance(batch_size, AdaptiveBatcher):
+        yield from make_batches(costs, processes, batch_size)
+        return
+
+    ordered = deque(sort_by_cost(costs))
+    while ordered:
+        size = min(batch_size.next_size(), len(ordered))
+        yield [ordered.popleft() for _ in range(size)]
+
+
+def _record_timings(
+    history: TimingHistory,
+    result: BatchResult,
+    costs: Dict[Path, float],
+):
+    """Split the time of a batch among its files by their estimated cost."""
+    total = sum(costs[path] for path in result.files) or 1.0
+    for path in result.files:
+        try:
+            duration = get_wav_duration(path)
+        except (OSError, ValueError):
+            continue
+
+        history.record(path, result.elapsed * costs[path] / total, duration)
+
+
+def iter_batch_results(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches,too-many-statements
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    processes: Optional[int] = None,
+    batch_size: Union[int, AdaptiveBatcher, None] = None,
+    history: Optional[TimingHistory] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    pin_cpus: bool = False,
+    memory_budget: Optional[int] = None,
+    gate: Optional["EnergyGate"] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+    deduplicate: Optional[DedupMode] = "path",
+    ordered: bool = False,
+) -> Iterator[BatchResult]:
+    """Run Tadarida-D in parallel and yield the result of each batch.
+
+    Results are yielded as soon as each batch is done, so they do not come
+    in the order of the input files.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    processes : int, optional
+        Number of TadaridaD processes to run at the same time. Defaults to
+        the number of CPUs.
+    batch_size : int or AdaptiveBatcher, optional
+        Maximum number of files processed by each TadaridaD process, or an
+        AdaptiveBatcher that chooses the size of each batch from the timings
+        of the previous ones. By default the files are split into one batch
+        per process.
+    history : TimingHistory, optional
+        Processing times of past runs, used to estimate the cost of each
+        file. It is updated with the timings of this run.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD processes.
+    pin_cpus : bool, optional
+        Whether to pin each process to its own set of CPUs, within a single
+        NUMA node. Overrides the CPUs set in priority.
+    memory_budget : int, optional
+        Memory, in bytes, that all running TadaridaD processes may use.
+        A new batch is only started when the memory of the running batches
+        plus the largest peak memory of previous batches fits in the
+        budget. Running batches count for at least that peak, as they may
+        not have reached theirs yet. A batch always starts when no other
+        batch is running. No limit by default.
+    gate : EnergyGate, optional
+        If given, recordings are pre-screened and those without enough
+        energy in the frequency band are not processed. They are reported
+        first, in a result without detections whose status lists them in
+        its skipped attribute.
+    metrics : MetricsRegistry, optional
+        Registry updated with the counts and timings of every batch.
+    deduplicate : {"path", "content"} or None, optional
+        How recordings given more than once are found, see run_tadarida.
+        Each recording is processed once, and its detections are copied to
+        all the paths it was given under in the result of its batch.
+    ordered : bool, optional
+        Whether to sort the detections of each batch by file then start
+        time, see sort_detections.
+
+    Yields
+    ------
+    BatchResult
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    files = list(files)
+    validate_files(files)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    inputs = None
+    if deduplicate is None:
+        wav_files = expand_wav_files(files)
+    else:
+        inputs = normalize_inputs(files, mode=deduplicate, workers=processes)
+        wav_files = inputs.files
+
+    if gate is not None:
+        # Imported here so that importing pytadarida does not load pandas.
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        from pytadarida.screening import (  # pylint: disable=import-outside-toplevel
+            apply_gate,
+        )
+
+        wav_files, skipped = apply_gate(
+            wav_files,
+            gate,
+            time_expansion=time_expansion,
+            frequency_band=frequency_band,
+            workers=processes,
+        )
+
+        if inputs is not None:
+            skipped = inputs.fan_out_files(skipped)
+
+        if skipped:
+            status = RunStatus("", "", "", skipped=skipped)
+            if metrics is not None:
+                metrics.observe(status)
+
+            yield BatchResult(
+                files=skipped,
+                detections=pd.DataFrame(),
+                status=status,
+                elapsed=0.0,
+            )
+
+    costs = estimate_costs(wav_files, history)
+    batches = _iter_batches(costs, processes, batch_size)
+
+    # Each running batch takes the priority options of a free process slot.
+    slots = [priority] * processes
+    if pin_cpus:
+        slots = [
+            replace(priority or ProcessPriority(), cpus=cpus)
+            for cpus in assign_cpus(processes)
+        ]
+
+    # Largest peak memory of the finished batches.
+    largest_peak = 0
+
+    def fits_budget(running: Dict[Future, _RunningBatch]) -> bool:
+        if memory_budget is None or not running:
+            return True
+
+        # Until a batch reports its peak, the memory is estimated. Running
+        # batches may not have reached their peak yet.
+        expected_memory = largest_peak or threads * MEMORY_PER_THREAD
+        in_use = sum(
+            max(batch.usage.rss, expected_memory) for batch in running.values()
+        )
+        return in_use + expected_memory <= memory_budget
+
+    with ThreadPoolExecutor(max_workers=processes) as executor:
+        running: Dict[Future, _RunningBatch] = {}
+
+        try:
+            while True:
+                # Batches are only created when a process is free, so an
+                # adaptive batcher can use the timings of finished batches.
+                while len(running) < processes and fits_budget(running):
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+
+                    slot = slots.pop()
+                    usage = ResourceUsage()
+                    future = executor.submit(
+                        run_batch,
+                        batch,
+                        threads=threads,
+                        time_expansion=time_expansion,
+                        features=features,
+                        frequency_band=frequency_band,
+                        priority=slot,
+                        usage=usage,
+                    )
+                    running[future] = _RunningBatch(slot, usage, batch)
+
+                if not running:
+                    break
+
+                # With a memory budget, check the memory in use regularly.
+                done, _ = wait(
+                    running,
+                    timeout=None if memory_budget is None else THROTTLE_WAIT,
+                    return_when=FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    finished = running.pop(future)
+                    slots.append(finished.priority)
+
+                    try:
+                        result = future.result()
+                    except Exception:
+                        if metrics is not None:
+                            metrics.observe_failure(finished.files)
+                        raise
+
+                    if metrics is not None:
+                        metrics.observe(result.status, files=result.files)
+
+                    if result.status.peak_rss:
+                        largest_peak = max(largest_peak, result.status.peak_rss)
+
+                    if isinstance(batch_size, AdaptiveBatcher):
+                        batch_size.record(len(result.files), result.elapsed)
+
+                    if history is not None:
+                        _record_timings(history, result, costs)
+
+                    if inputs is not None and inputs.has_duplicates:
+                        result = replace(
+                            result,
+                            files=inputs.fan_out_files(result.files),
+                            detections=inputs.fan_out(result.detections),
+                        )
+
+                    if ordered:
+                        result = replace(
+                            result,
+                            detections=sort_detections(result.detections),
+                        )
+
+                    yield result
+        finally:
+            for future in running:
+                future.cancel()
+
+            if history is not None:
+                history.save()
+
+
+def run_tadarida_parallel(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,duplicate-code
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    processes: Optional[int] = None,
+    batch_size: Union[int, AdaptiveBatcher, None] = None,
+    history: Optional[TimingHistory] = None,
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features: int = 2,
+    frequency_band: Literal[1, 2] = 1,
+    priority: Optional[ProcessPriority] = None,
+    pin_cpus: bool = False,
+    memory_budget: Optional[int] = None,
+    gate: Optional["EnergyGate"] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+    deduplicate: Optional[DedupMode] = "path",
+    ordered: bool = False,
+) -> Tuple["pd.DataFrame", RunStatus]:
+    """Run Tadarida-D on the given files with several parallel processes.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    processes : int, optional
+        Number of TadaridaD processes to run at the same time. Defaults to
+        the number of CPUs.
+    batch_size : int or AdaptiveBatcher, optional
+        Maximum number of files processed by each TadaridaD process, or an
+        AdaptiveBatcher that chooses the size of each batch from the timings
+        of the previous ones. By default the files are split into one batch
+        per process.
+    history : TimingHistory, optional
+        Processing times of past runs, used to estimate the cost of each
+        file. It is updated with the timings of this run.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD processes.
+    pin_cpus : bool, optional
+        Whether to pin each process to its own set of CPUs, within a single
+        NUMA node. Overrides the CPUs set in priority.
+    memory_budget : int, optional
+        Memory, in bytes, that all running TadaridaD processes may use.
+        A new batch is only started when the memory of the running batches
+        plus the largest peak memory of previous batches fits in the
+        budget. Running batches count for at least that peak, as they may
+        not have reached theirs yet. A batch always starts when no other
+        batch is running. No limit by default.
+    gate : EnergyGate, optional
+        If given, recordings are pre-screened and those without enough
+        energy in the frequency band are not processed. They are listed in
+        the skipped attribute of the returned status.
+    metrics : MetricsRegistry, optional
+        Registry updated with the counts and timings of every batch.
+    deduplicate : {"path", "content"} or None, optional
+        How recordings given more than once are found, see run_tadarida.
+    ordered : bool, optional
+        Whether to return the detections in a deterministic order, by file
+        then start time. Each batch is sorted when it is done, and the
+        sorted batches are merged, see merge_sorted. By default detections
+        come in the order the batches finished.
+
+    Returns
+    -------
+    detections: pd.DataFrame
+        Dataframe with detected sound events.
+    status: RunStatus
+        The logs of all TadaridaD runs.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    results = list(
+        iter_batch_results(
+            files,
+            processes=processes,
+            batch_size=batch_size,
+            history=history,
+            threads=threads,
+            time_expansion=time_expansion,
+            features=features,
+            frequency_band=frequency_band,
+            priority=priority,
+            pin_cpus=pin_cpus,
+            memory_budget=memory_budget,
+            gate=gate,
+            metrics=metrics,
+            deduplicate=deduplicate,
+            ordered=ordered,
+        )
+    )
+
+    if not results:
+        return pd.DataFrame(), RunStatus("", "", "")
+
+    # Skipped files come in a result without any columns.
+    frames = [
+        result.detections
+        for result in results
+        if len(result.detections.columns)
+    ]
+    if ordered:
+        detections = merge_sorted(frames)
+    else:
+        detections = (
+            pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        )
+    status = merge_run_status(result.status for result in results)
+    return detections, status
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """Tadarida-D parameters of one configuration of a parameter sweep.
+
+    Attributes:
+        time_expansion: Time expansion factor, see run_tadarida.
+        features: Set of features to extract, see run_tadarida.
+        frequency_band: Frequency band to analyse, see run_tadarida.
+    """
+
+    time_expansion: Literal[10, 1] = 1
+    features: int = 2
+    frequency_band: Literal[1, 2] = 1
+
+
+def iter_sweep_results(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    configs: Iterable[SweepConfig],
+    processes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    threads: int = 1,
+    priority: Optional[ProcessPriority] = None,
+) -> Iterator[Tuple[SweepConfig, BatchResult]]:
+    """Run Tadarida-D on the same files with several configurations.
+
+    The files are validated, split into batches and staged only once. Every
+    (configuration, batch) pair is then run on a shared pool of processes.
+    Runs of different configurations on the same batch never overlap, since
+    TadaridaD writes its outputs next to the staged files.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    configs : list of SweepConfig
+        The configurations to run.
+    processes : int, optional
+        Number of TadaridaD processes to run at the same time. Defaults to
+        the number of CPUs.
+    batch_size : int, optional
+        Maximum number of files processed by each TadaridaD process. By
+        default the files are split into one batch per process.
+    threads : int, optional
+        Number of threads of each TadaridaD process.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD processes.
+
+    Yields
+    ------
+    config : SweepConfig
+    result : BatchResult
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    files = list(files)
+    validate_files(files)
+
+    configs = list(dict.fromkeys(configs))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    batches = make_batches(
+        estimate_costs(expand_wav_files(files)),
+        processes,
+        batch_size,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="pytadarida-") as root:
+        staged = [
+            stage_files(batch, Path(root) / "audio" / str(index))
+            for index, batch in enumerate(batches)
+        ]
+
+        with ThreadPoolExecutor(max_workers=processes) as executor:
+            pending = deque(
+                (config, index)
+                for config in configs
+                for index in range(len(staged))
+            )
+            running: Dict[Future, Tuple[SweepConfig, int]] = {}
+
+            def next_pair() -> Optional[Tuple[SweepConfig, int]]:
+                busy = {index for _, index in running.values()}
+                for pair in pending:
+                    if pair[1] not in busy:
+                        pending.remove(pair)
+                        return pair
+                return None
+
+            try:
+                while True:
+                    while len(running) < processes:
+                        pair = next_pair()
+                        if pair is None:
+                            break
+
+                        config, index = pair
+                        future = executor.submit(
+                            _run_staged,
+                            staged[index],
+                            workdir=Path(tempfile.mkdtemp(dir=root)),
+                            threads=threads,
+                            time_expansion=config.time_expansion,
+                            features=config.features,
+                            frequency_band=config.frequency_band,
+                            priority=priority,
+                            usage=None,
+                        )
+                        running[future] = pair
+
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        config, _ = running.pop(future)
+                        yield config, future.result()
+            finally:
+                for future in running:
+                    future.cancel()
+
+
+def run_tadarida_sweep(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    configs: Iterable[SweepConfig],
+    processes: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    threads: int = 1,
+    priority: Optional[ProcessPriority] = None,
+) -> Dict[SweepConfig, Tuple["pd.DataFrame", RunStatus]]:
+    """Run Tadarida-D on the same files with several configurations.
+
+    See iter_sweep_results for how the runs are scheduled.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    configs : list of SweepConfig
+        The configurations to run.
+    processes : int, optional
+        Number of TadaridaD processes to run at the same time. Defaults to
+        the number of CPUs.
+    batch_size : int, optional
+        Maximum number of files processed by each TadaridaD process.
+    threads : int, optional
+        Number of threads of each TadaridaD process.
+    priority : ProcessPriority, optional
+        CPU affinity and scheduling priority of the TadaridaD processes.
+
+    Returns
+    -------
+    dict of SweepConfig to tuple of pd.DataFrame and RunStatus
+        The detections and the status of the runs of each configuration.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    configs = list(dict.fromkeys(configs))
+    results: Dict[SweepConfig, List[BatchResult]] = {
+        config: [] for config in configs
+    }
+
+    for config, result in iter_sweep_results(
+        files,
+        configs,
+        processes=processes,
+        batch_size=batch_size,
+        threads=threads,
+        priority=priority,
+    ):
+        results[config].append(result)
+
+    sweep = {}
+    for config, config_results in results.items():
+        if not config_results:
+            sweep[config] = (pd.DataFrame(), RunStatus("", "", ""))
+            continue
+
+        detections = pd.concat(
+            [result.detections for result in config_results],
+            ignore_index=True,
+        )
+        status = merge_run_status(result.status for result in config_results)
+        sweep[config] = (detections, status)
+
+    return sweep
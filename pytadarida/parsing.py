@@ -1,10 +1,12 @@
 """Parsing functions for .ta files."""
 import os
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, List, Optional, Sequence, Union
 
 import pandas as pd
 
+from pytadarida.shared import parse_detections_shared
+
 PathLike = Union[str, os.PathLike]
 
 
@@ -14,12 +16,31 @@ __all__ = [
 ]
 
 
-def parse_ta_file(path: PathLike) -> pd.DataFrame:
+KEY_COLUMNS = ["Filename", "CallNum"]
+"""Columns that identify each detection, always kept when projecting."""
+
+
+def _usecols(columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """Add the key columns to the requested ones."""
+    if columns is None:
+        return None
+    return list(dict.fromkeys([*KEY_COLUMNS, *columns]))
+
+
+def parse_ta_file(
+    path: PathLike,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
     """Parse a .ta file into a pandas dataframe.
 
     Parameters
     ----------
     path : str or os.PathLike
+    columns : list of str, optional
+        The columns to parse, in addition to the key columns (Filename and
+        CallNum). Other columns are skipped while reading, and the kept
+        columns are in the order of the file. All columns are parsed by
+        default.
 
     Returns
     -------
@@ -29,9 +50,11 @@ def parse_ta_file(path: PathLike) -> pd.DataFrame:
     Raises
     ------
     FileNotFoundError
+    ValueError
+        If some of the requested columns are not in the file.
 
     """
-    dataframe = pd.read_csv(str(path), sep="\t")
+    dataframe = pd.read_csv(str(path), sep="\t", usecols=_usecols(columns))
 
     # Check that the output is a dataframe
     if not isinstance(dataframe, pd.DataFrame):
@@ -40,7 +63,11 @@ def parse_ta_file(path: PathLike) -> pd.DataFrame:
     return dataframe
 
 
-def parse_detections(mapping: Dict[Path, Path]) -> pd.DataFrame:
+def parse_detections(
+    mapping: Dict[Path, Path],
+    columns: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
     """Parse all .ta files in the given file mapping.
 
     The mapping is a dictionary of .wav files and their corresponding .ta
@@ -51,6 +78,13 @@ def parse_detections(mapping: Dict[Path, Path]) -> pd.DataFrame:
     ----------
     mapping : dict of str or os.PathLike
         Mapping of .wav files and their corresponding .ta files.
+    columns : list of str, optional
+        The columns to parse, in addition to the key columns. All columns
+        are parsed by default.
+    workers : int, optional
+        If more than one, the files are parsed by this number of worker
+        processes into shared memory, see
+        pytadarida.shared.parse_detections_shared.
 
     Returns
     -------
@@ -60,11 +94,18 @@ def parse_detections(mapping: Dict[Path, Path]) -> pd.DataFrame:
     Raises
     ------
     FileNotFoundError
+    ValueError
+        If some of the requested columns are not in the files.
 
     """
+    if workers is not None and workers > 1:
+        return parse_detections_shared(
+            mapping, columns=columns, workers=workers
+        )
+
     dfs = []
     for wav, ta_file in mapping.items():
-        detections_df = parse_ta_file(ta_file)
+        detections_df = parse_ta_file(ta_file, columns=columns)
         detections_df["wav"] = wav
         dfs.append(detections_df)
     return pd.concat(dfs, ignore_index=True)
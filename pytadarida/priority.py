@@ -0,0 +1,233 @@
+"""CPU affinity and scheduling priority of TadaridaD processes.
+
+On shared machines TadaridaD processes compete with other services for the
+CPUs and the disks. This module provides the ProcessPriority options, which
+pin a process to a set of CPUs and lower its CPU (nice) and I/O (ionice)
+priority, and helpers to split the CPUs of the machine among several
+processes while keeping each process within a single NUMA node.
+"""
+import ctypes
+import os
+import platform
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+
+__all__ = [
+    "ProcessPriority",
+    "assign_cpus",
+    "get_numa_nodes",
+    "parse_cpu_list",
+]
+
+
+NODE_DIR = Path("/sys/devices/system/node")
+
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "arm64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+    "riscv64": 30,
+}
+"""Number of the ioprio_set system call on each architecture."""
+
+
+IOPRIO_SET = IOPRIO_SET_SYSCALLS.get(platform.machine())
+"""Number of the ioprio_set system call on this machine, if known."""
+
+TASK_DIR = "/proc/{pid}/task"
+"""Directory listing the threads of a process."""
+
+_LIBC = ctypes.CDLL(None, use_errno=True) if os.name == "posix" else None
+
+
+def _ioprio_set(tid: int, ioprio_class: int, level: int):
+    """Set the I/O priority of a thread."""
+    if IOPRIO_SET is None or _LIBC is None:
+        raise OSError(
+            f"Setting the I/O priority is not supported on "
+            f"{platform.machine()}."
+        )
+
+    ioprio = (ioprio_class << IOPRIO_CLASS_SHIFT) | level
+    if _LIBC.syscall(IOPRIO_SET, IOPRIO_WHO_PROCESS, tid, ioprio) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def _threads(pid: int) -> List[int]:
+    """List the threads of a process, or only the process if unknown."""
+    try:
+        return sorted(int(tid) for tid in os.listdir(TASK_DIR.format(pid=pid)))
+    except (OSError, ValueError):
+        return [pid]
+
+
+@dataclass
+class ProcessPriority:
+    """Scheduling options for a TadaridaD process.
+
+    Attributes:
+        cpus: The CPUs the process is allowed to run on. If None, the
+            process can run on any CPU.
+        nice: Increment added to the niceness of the process. Higher values
+            give the process a lower CPU priority.
+        ionice_class: I/O scheduling class of the process: 1 (realtime),
+            2 (best-effort) or 3 (idle). If None, the class is not changed.
+        ionice_level: Priority within the I/O scheduling class, from 0
+            (highest) to 7 (lowest). Ignored for the idle class.
+    """
+
+    cpus: Optional[Set[int]] = None
+    nice: Optional[int] = None
+    ionice_class: Optional[int] = None
+    ionice_level: int = 4
+
+    def __post_init__(self):
+        if self.cpus is not None and not self.cpus:
+            raise ValueError("The set of CPUs can not be empty.")
+
+        if self.ionice_class not in (None, 1, 2, 3):
+            raise ValueError("ionice_class must be 1, 2 or 3.")
+
+        if not 0 <= self.ionice_level <= 7:
+            raise ValueError("ionice_level must be between 0 and 7.")
+
+        if self.ionice_class is not None and IOPRIO_SET is None:
+            raise OSError(
+                f"Setting the I/O priority is not supported on "
+                f"{platform.machine()}."
+            )
+
+    def apply(self, pid: int):
+        """Apply the options to a running process.
+
+        This is called from the parent right after the TadaridaD process is
+        started, rather than in the child before exec, where only
+        async-signal-safe calls can be made when other threads are running.
+        The options are set on each thread of the process, and the threads
+        it creates later inherit them.
+
+        Args:
+            pid: The id of the process.
+        """
+        for tid in _threads(pid):
+            if self.cpus is not None:
+                os.sched_setaffinity(tid, self.cpus)
+
+            if self.nice is not None:
+                niceness = os.getpriority(os.PRIO_PROCESS, tid) + self.nice
+                os.setpriority(os.PRIO_PROCESS, tid, min(niceness, 19))
+
+            if self.ionice_class is not None:
+                level = 0 if self.ionice_class == 3 else self.ionice_level
+                _ioprio_set(tid, self.ionice_class, level)
+
+
+def parse_cpu_list(cpu_list: str) -> Set[int]:
+    """Parse a Linux CPU list such as "0-3,8,10-11".
+
+    Parameters
+    ----------
+    cpu_list : str
+
+    Returns
+    -------
+    set of int
+
+    """
+    cpus: Set[int] = set()
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.update(range(int(start), int(end) + 1))
+            continue
+
+        cpus.add(int(part))
+
+    return cpus
+
+
+def get_numa_nodes() -> List[Set[int]]:
+    """Get the CPUs of each NUMA node available to this process.
+
+    If the NUMA topology is not available, all the CPUs available to this
+    process are returned as a single node.
+
+    Returns
+    -------
+    list of set of int
+        The CPUs of each node. Nodes without available CPUs are omitted.
+
+    """
+    available = os.sched_getaffinity(0)
+
+    nodes = []
+    for node_dir in sorted(
+        NODE_DIR.glob("node[0-9]*"),
+        key=lambda path: int(path.name[4:]),
+    ):
+        try:
+            cpus = parse_cpu_list((node_dir / "cpulist").read_text())
+        except (OSError, ValueError):
+            continue
+
+        cpus &= available
+        if cpus:
+            nodes.append(cpus)
+
+    if not nodes:
+        return [set(available)]
+
+    return nodes
+
+
+def assign_cpus(num_processes: int) -> List[Set[int]]:
+    """Split the available CPUs among several processes.
+
+    Processes are spread over the NUMA nodes in turn, and the CPUs of each
+    node are split evenly among the processes assigned to it, so that no
+    process spans more than one node. If a node has fewer CPUs than
+    processes, some processes share CPUs.
+
+    Parameters
+    ----------
+    num_processes : int
+
+    Returns
+    -------
+    list of set of int
+        The CPUs of each process.
+
+    """
+    if num_processes < 1:
+        raise ValueError("num_processes must be at least 1.")
+
+    nodes = [sorted(cpus) for cpus in get_numa_nodes()]
+
+    per_node: List[List[int]] = [[] for _ in nodes]
+    for index in range(num_processes):
+        per_node[index % len(nodes)].append(index)
+
+    assignment: List[Set[int]] = [set() for _ in range(num_processes)]
+    for cpus, processes in zip(nodes, per_node):
+        for position, index in enumerate(processes):
+            if len(processes) >= len(cpus):
+                assignment[index] = {cpus[position % len(cpus)]}
+                continue
+
+            start = position * len(cpus) // len(processes)
+            end = (position + 1) * len(cpus) // len(processes)
+            assignment[index] = set(cpus[start:end])
+
+    return assignment
@@ -0,0 +1,154 @@
+"""Time and profile the phases of a Tadarida-D run.
+
+run_tadarida goes through several phases: validating the inputs, finding
+duplicated recordings, the optional pre-screen, running the binary,
+collecting and parsing its output files, and cleaning them up. The time
+spent in each phase is recorded in the timings attribute of the returned
+RunStatus.
+
+A hook can also be given to wrap every phase, for instance to profile it
+with cProfile or to report its duration to a monitoring system. A hook is
+any callable that takes the name of a phase and returns a context manager,
+which is entered for the duration of the phase.
+"""
+import cProfile
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, Optional
+
+__all__ = [
+    "PHASES",
+    "PhaseCallback",
+    "PhaseHook",
+    "ProfileHook",
+    "timed_phase",
+]
+
+
+PHASES = (
+    "validate",
+    "normalize",
+    "screen",
+    "run",
+    "collect",
+    "parse",
+    "clean",
+)
+"""Phases of run_tadarida, in the order they run."""
+
+PhaseHook = Callable[[str], ContextManager]
+"""Callable wrapping each phase of a run in a context manager."""
+
+
+@contextmanager
+def timed_phase(
+    phase: str,
+    timings: Dict[str, float],
+    hook: Optional[PhaseHook] = None,
+) -> Iterator[None]:
+    """Time a phase of a run, and wrap it in the hook if one is given.
+
+    Parameters
+    ----------
+    phase : str
+        Name of the phase.
+    timings : dict of str to float
+        The duration of the phase, in seconds, is added to this mapping.
+    hook : PhaseHook, optional
+        Hook entered for the duration of the phase.
+
+    """
+    start = time.perf_counter()
+    try:
+        if hook is None:
+            yield
+        else:
+            with hook(phase):
+                yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + (time.perf_counter() - start)
+
+
+class PhaseCallback:  # pylint: disable=too-few-public-methods
+    """Hook calling a function with the duration of every phase.
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the name of the phase and its duration, in seconds, when
+        the phase ends, even if it failed.
+    """
+
+    def __init__(self, callback: Callable[[str, float], None]):
+        self.callback = callback
+
+    @contextmanager
+    def __call__(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.callback(phase, time.perf_counter() - start)
+
+
+class ProfileHook:
+    """Hook profiling the phases of runs with cProfile.
+
+    Profiles accumulate over all the runs given the same hook. As cProfile
+    only profiles the thread it runs in, a hook should not be shared by runs
+    in several threads.
+
+    Parameters
+    ----------
+    phases : list of str, optional
+        The phases to profile. All of them by default.
+    """
+
+    def __init__(self, phases: Optional[Iterable[str]] = None):
+        self.phases = None if phases is None else set(phases)
+        self.profiles: Dict[str, cProfile.Profile] = {}
+
+    @contextmanager
+    def __call__(self, phase: str) -> Iterator[None]:
+        if self.phases is not None and phase not in self.phases:
+            yield
+            return
+
+        profile = self.profiles.setdefault(phase, cProfile.Profile())
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def stats(self, phase: Optional[str] = None) -> pstats.Stats:
+        """Get the profiling statistics.
+
+        Parameters
+        ----------
+        phase : str, optional
+            Only the statistics of this phase. By default those of all the
+            profiled phases are combined.
+
+        Returns
+        -------
+        pstats.Stats
+
+        Raises
+        ------
+        KeyError
+            If the phase was not profiled.
+
+        """
+        if phase is not None:
+            return pstats.Stats(self.profiles[phase])
+
+        if not self.profiles:
+            raise KeyError("No phase was profiled.")
+
+        profiles = list(self.profiles.values())
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
@@ -0,0 +1,433 @@
+"""Run the tadarida binary on .wav files.
+
+This module contains the functions that run the tadarida binary on .wav
+files and directories of .wav files. Archives are routed to
+pytadarida.archives by run_tadarida, in pytadarida.commands, and each of
+their extracted batches is then processed here.
+
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pytadarida.configs import TADARIDA_BINARY
+from pytadarida.logs import (
+    LOG_DIR,
+    RunStatus,
+    get_run_status,
+)
+from pytadarida.monitor import ProcessMonitor, ResourceUsage
+from pytadarida.normalize import DedupMode, NormalizedInputs, normalize_inputs
+from pytadarida.output import (
+    clean_output_files,
+    expand_wav_files,
+    get_output_files,
+    stage_files,
+)
+from pytadarida.priority import ProcessPriority
+from pytadarida.profiling import PhaseHook, timed_phase
+from pytadarida.validate_inputs import validate_files
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from pytadarida.metrics import MetricsRegistry
+    from pytadarida.screening import EnergyGate
+
+__all__ = [
+    "run_wav_files",
+    "tadarida_outputs",
+]
+
+
+PathLike = Union[str, os.PathLike]
+
+
+def _run_command(
+    *args: str,
+    capture_output: bool = False,
+    cwd: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+):
+    with subprocess.Popen(
+        [TADARIDA_BINARY, *args],
+        stdout=subprocess.PIPE if capture_output else None,
+        stderr=subprocess.PIPE if capture_output else None,
+        cwd=cwd,
+    ) as process:
+        if priority is not None:
+            try:
+                priority.apply(process.pid)
+            except BaseException:
+                process.kill()
+                raise
+
+        with ProcessMonitor(process.pid, usage):
+            stdout, stderr = process.communicate()
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode,
+            process.args,
+            output=stdout,
+            stderr=stderr,
+        )
+
+    return stdout
+
+
+def _build_args(
+    threads=1,
+    time_expansion=1,
+    features=2,
+    frequency_band=1,
+):
+    args = [
+        "-t",
+        str(threads),
+        "-x",
+        str(time_expansion),
+        "-v",
+        str(features),
+        "-f",
+        str(frequency_band),
+    ]
+
+    return args
+
+
+@contextmanager
+def tadarida_outputs(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features=2,
+    frequency_band: Literal[1, 2] = 1,
+    workdir: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+    hook: Optional[PhaseHook] = None,
+) -> Iterator[Tuple[Dict[Path, Path], RunStatus]]:
+    """Run the tadarida binary and give access to its raw output files.
+
+    This is the first half of run_tadarida, for consumers that read the .ta
+    files themselves instead of parsing them into a dataframe. The output
+    files are removed when the context exits.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    workdir, priority, usage, hook : optional
+        Execution options, see run_tadarida.
+
+    Yields
+    ------
+    outputs: dict of Path to Path
+        Mapping of each .wav file to its .ta file.
+    status: RunStatus
+        The status of the run. The duration of the clean phase is added to
+        its timings when the context exits.
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    files = list(files)
+
+    timings: Dict[str, float] = {}
+    with timed_phase("validate", timings, hook):
+        validate_files(files)
+
+    with _run_outputs(
+        files,
+        threads=threads,
+        time_expansion=time_expansion,
+        features=features,
+        frequency_band=frequency_band,
+        workdir=workdir,
+        priority=priority,
+        usage=usage,
+        hook=hook,
+        timings=timings,
+    ) as (outputs, status):
+        yield outputs, status
+
+
+@contextmanager
+def _run_outputs(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    files: List[PathLike],
+    threads: int,
+    time_expansion: Literal[10, 1],
+    features: int,
+    frequency_band: Literal[1, 2],
+    workdir: Optional[PathLike],
+    priority: Optional[ProcessPriority],
+    usage: Optional[ResourceUsage],
+    hook: Optional[PhaseHook],
+    timings: Dict[str, float],
+) -> Iterator[Tuple[Dict[Path, Path], RunStatus]]:
+    """Run the tadarida binary on validated inputs, see tadarida_outputs.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        The validated .wav files and directories of .wav files.
+    threads, time_expansion, features, frequency_band : int
+        Tadarida-D parameters, see run_tadarida.
+    workdir, priority, usage, hook : optional
+        Execution options, see run_tadarida.
+    timings : dict of str to float
+        The durations of the phases before the run, to which those of the
+        run are added. Used as the timings of the status.
+
+    Yields
+    ------
+    outputs: dict of Path to Path
+        Mapping of each .wav file to its .ta file.
+    status: RunStatus
+        The status of the run.
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    if workdir is not None:
+        files = [os.path.abspath(path) for path in files]
+
+    args = _build_args(
+        threads=threads,
+        time_expansion=time_expansion,
+        features=features,
+        frequency_band=frequency_band,
+    )
+
+    args = [*args, *files]
+
+    if usage is None:
+        usage = ResourceUsage()
+
+    with timed_phase("run", timings, hook):
+        _run_command(
+            *args,
+            capture_output=False,
+            cwd=workdir,
+            priority=priority,
+            usage=usage,
+        )
+
+        if workdir is None:
+            status = get_run_status()
+        else:
+            status = get_run_status(Path(workdir) / LOG_DIR)
+
+    status.peak_rss = usage.peak_rss
+    status.cpu_time = usage.cpu_time
+    status.timings = timings
+
+    try:
+        with timed_phase("collect", timings, hook):
+            outputs = get_output_files(files)
+    except FileNotFoundError as error:
+        raise FileNotFoundError(
+            "The tadarida binary did not produce any output files.\n"
+            f"Tadarida-D Output: {status.stdout}\n"
+            f"Error: {status.error}\n"
+        ) from error
+
+    status.files = len(outputs)
+
+    try:
+        yield outputs, status
+    finally:
+        # Remove the output files once they have been consumed
+        with timed_phase("clean", timings, hook):
+            clean_output_files(files, outputs=outputs)
+
+
+def run_wav_files(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches,too-many-statements,duplicate-code
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    threads: int = 1,
+    time_expansion: Literal[10, 1] = 1,
+    features=2,
+    frequency_band: Literal[1, 2] = 1,
+    workdir: Optional[PathLike] = None,
+    priority: Optional[ProcessPriority] = None,
+    usage: Optional[ResourceUsage] = None,
+    gate: Optional["EnergyGate"] = None,
+    columns: Optional[Sequence[str]] = None,
+    hook: Optional[PhaseHook] = None,
+    metrics: Optional["MetricsRegistry"] = None,
+    deduplicate: Optional[DedupMode] = "path",
+) -> Tuple["pd.DataFrame", RunStatus]:
+    """Run the tadarida binary on .wav files and directories of .wav files.
+
+    This is run_tadarida without the support for archives, which are
+    processed in batches of .wav files by this function.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    workdir, priority, usage, gate, columns, hook, metrics : optional
+        Execution options, see run_tadarida.
+    deduplicate : {"path", "content"} or None, optional
+        How recordings given more than once are found, see run_tadarida.
+
+    Returns
+    -------
+    detections: pd.DataFrame
+        Dataframe with detected sound events.
+    status: RunStatus
+        The status of the run, see run_tadarida.
+
+    Raises
+    ------
+    FileNotFoundError
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    from pytadarida.parsing import (  # pylint: disable=import-outside-toplevel
+        parse_detections,
+    )
+
+    # The inputs are read by several phases, and again if the run fails.
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    files = list(files)
+
+    skipped: List[Path] = []
+    timings: Dict[str, float] = {}
+    staged: Dict[Path, Path] = {}
+    staging_dir: Optional[str] = None
+
+    inputs: Optional[NormalizedInputs] = None
+
+    try:
+        with timed_phase("validate", timings, hook):
+            validate_files(files)
+
+        if deduplicate is not None:
+            with timed_phase("normalize", timings, hook):
+                inputs = normalize_inputs(files, mode=deduplicate)
+
+            if inputs.has_duplicates:
+                files = inputs.files
+            else:
+                # Directories are passed as they are, to keep commands short.
+                inputs = None
+
+        if gate is not None:
+            # Imported here so that importing pytadarida does not load numpy.
+            from pytadarida.screening import (  # pylint: disable=import-outside-toplevel
+                apply_gate,
+            )
+
+            with timed_phase("screen", timings, hook):
+                files, skipped = apply_gate(
+                    expand_wav_files(files),
+                    gate,
+                    time_expansion=time_expansion,
+                    frequency_band=frequency_band,
+                )
+
+            if inputs is not None:
+                skipped = inputs.fan_out_files(skipped)
+
+            if not files:
+                status = RunStatus("", "", "", skipped=skipped, timings=timings)
+                if metrics is not None:
+                    metrics.observe(status)
+                return pd.DataFrame(), status
+
+        if gate is not None or inputs is not None:
+            # The kept or unique files are linked into a few directories,
+            # which are given to the binary instead of the files to keep the
+            # command short.
+            staging_dir = os.path.abspath(
+                tempfile.mkdtemp(prefix="pytadarida-", dir=workdir)
+            )
+            staged = stage_files(files, Path(staging_dir))
+
+        with _run_outputs(
+            sorted({path.parent for path in staged}) if staged else files,
+            threads=threads,
+            time_expansion=time_expansion,
+            features=features,
+            frequency_band=frequency_band,
+            workdir=workdir,
+            priority=priority,
+            usage=usage,
+            hook=hook,
+            timings=timings,
+        ) as (outputs, status):
+            if staged:
+                # In the order of the kept files, not of the directories.
+                outputs = {path: outputs[path] for path in staged}
+
+            try:
+                with timed_phase("parse", status.timings, hook):
+                    detections = parse_detections(outputs, columns=columns)
+            except FileNotFoundError as error:
+                raise FileNotFoundError(
+                    "Error parsing the output files.\n"
+                    f"Tadarida-D Output: {status.stdout}\n"
+                    f"Error: {status.error}\n"
+                ) from error
+    except Exception:
+        if metrics is not None:
+            metrics.observe_failure(expand_wav_files(files))
+        raise
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    if staged:
+        detections["wav"] = detections["wav"].map(staged)
+
+    if inputs is not None:
+        detections = inputs.fan_out(detections)
+
+    status.skipped = skipped
+    status.detections = len(detections)
+
+    if metrics is not None:
+        metrics.observe(
+            status, files=[staged.get(path, path) for path in outputs]
+        )
+
+    return detections, status
@@ -0,0 +1,227 @@
+"""Distribute .wav files across parallel Tadarida-D runs.
+
+Processing time of a recording is roughly proportional to its duration, so
+splitting files in equal counts leaves some processes with the long
+recordings while the others sit idle. This module estimates the cost of each
+file, from the header of the .wav file or from the timings of past runs, and
+uses longest-processing-time-first (LPT) scheduling to balance the load.
+"""
+import heapq
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "TimingHistory",
+    "get_wav_duration",
+    "estimate_costs",
+    "lpt_schedule",
+    "sort_by_cost",
+]
+
+
+def get_wav_duration(path: PathLike) -> float:
+    """Get the duration of a .wav file from its header.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+
+    Returns
+    -------
+    float
+        Duration of the recording in seconds.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid .wav file.
+
+    """
+    with open(path, "rb") as wav:
+        header = wav.read(12)
+        if (
+            len(header) < 12
+            or header[:4] not in (b"RIFF", b"RF64")
+            or header[8:12] != b"WAVE"
+        ):
+            raise ValueError(f"File {path} is not a valid .wav file.")
+
+        byte_rate = 0
+        while True:
+            chunk = wav.read(8)
+            if len(chunk) < 8:
+                break
+
+            chunk_id = chunk[:4]
+            (size,) = struct.unpack("<I", chunk[4:])
+
+            if chunk_id == b"data":
+                if not byte_rate:
+                    break
+
+                # Some recorders do not fill in the size of the data chunk.
+                remaining = os.fstat(wav.fileno()).st_size - wav.tell()
+                if size == 0 or size > remaining:
+                    size = remaining
+
+                return size / byte_rate
+
+            if chunk_id == b"fmt ":
+                fmt = wav.read(size + size % 2)
+                (byte_rate,) = struct.unpack("<I", fmt[8:12])
+                continue
+
+            wav.seek(size + size % 2, os.SEEK_CUR)
+
+    raise ValueError(f"File {path} is not a valid .wav file.")
+
+
+class TimingHistory:
+    """Processing times of files in past runs.
+
+    Timings are stored as a JSON file so they can be reused across runs.
+
+    Parameters
+    ----------
+    path : str or os.PathLike, optional
+        JSON file where the timings are stored. If not given, the timings
+        are only kept in memory.
+    """
+
+    def __init__(self, path: Optional[PathLike] = None):
+        self.path = None if path is None else Path(path)
+        self.timings: Dict[str, List[float]] = {}
+
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as history:
+                self.timings = json.load(history)
+
+    def get(self, path: PathLike) -> Optional[float]:
+        """Get the last processing time of a file, in seconds."""
+        timing = self.timings.get(os.path.abspath(path))
+        if timing is None:
+            return None
+        return timing[0]
+
+    def record(self, path: PathLike, seconds: float, duration: float):
+        """Record the processing time and duration of a file."""
+        self.timings[os.path.abspath(path)] = [seconds, duration]
+
+    @property
+    def seconds_per_second(self) -> Optional[float]:
+        """Processing time per second of audio over all recorded files."""
+        seconds = sum(timing[0] for timing in self.timings.values())
+        duration = sum(timing[1] for timing in self.timings.values())
+
+        if not duration:
+            return None
+
+        return seconds / duration
+
+    def save(self):
+        """Write the timings to the history file."""
+        if self.path is None:
+            return
+
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as history:
+            json.dump(self.timings, history)
+        os.replace(tmp_path, self.path)
+
+
+def estimate_costs(
+    files: Iterable[PathLike],
+    history: Optional[TimingHistory] = None,
+) -> Dict[Path, float]:
+    """Estimate the processing cost of each file.
+
+    The cost of a file is its processing time in a past run if it is in the
+    history. Otherwise it is the duration of the recording, converted into
+    processing time with the average rate of the history if available.
+    Files whose header can not be read get the average cost.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        The .wav files to process.
+    history : TimingHistory, optional
+        Processing times of past runs.
+
+    Returns
+    -------
+    dict of Path to float
+
+    """
+    rate = None if history is None else history.seconds_per_second
+
+    costs: Dict[Path, Optional[float]] = {}
+    for path in files:
+        path = Path(path)
+
+        if history is not None:
+            timing = history.get(path)
+            if timing is not None:
+                costs[path] = timing
+                continue
+
+        try:
+            duration = get_wav_duration(path)
+        except (OSError, ValueError):
+            costs[path] = None
+            continue
+
+        costs[path] = duration if rate is None else duration * rate
+
+    known = [cost for cost in costs.values() if cost is not None]
+    default = sum(known) / len(known) if known else 1.0
+
+    return {
+        path: default if cost is None else cost for path, cost in costs.items()
+    }
+
+
+def sort_by_cost(costs: Dict[Path, float]) -> List[Path]:
+    """Sort files from the most to the least expensive."""
+    return sorted(costs, key=lambda path: costs[path], reverse=True)
+
+
+def lpt_schedule(
+    costs: Dict[Path, float],
+    num_shards: int,
+) -> List[List[Path]]:
+    """Split files into shards with longest-processing-time-first.
+
+    Files are taken from the most to the least expensive, and each one is
+    assigned to the shard with the lowest total cost so far.
+
+    Parameters
+    ----------
+    costs : dict of Path to float
+        Estimated cost of each file.
+    num_shards : int
+        Number of shards to create.
+
+    Returns
+    -------
+    list of list of Path
+        The files of each shard. Empty shards are omitted.
+
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1.")
+
+    shards: List[List[Path]] = [[] for _ in range(num_shards)]
+    loads = [(0.0, index) for index in range(num_shards)]
+
+    for path in sort_by_cost(costs):
+        load, index = heapq.heappop(loads)
+        shards[index].append(path)
+        heapq.heappush(loads, (load + costs[path], index))
+
+    return [shard for shard in shards if shard]
@@ -0,0 +1,309 @@
+"""Pre-screen recordings to skip those without sound events.
+
+Most triggered recordings in bat monitoring hold no calls, yet each of them
+takes a TadaridaD process slot. This module provides a cheap energy gate
+that can run before Tadarida-D: the energy of each recording is computed in
+short frames, within the frequency band that Tadarida-D analyses, and files
+where no frame stands out from the background are skipped.
+
+Recordings are kept when in doubt: files that can not be read by the gate
+are always passed on to Tadarida-D, and skipped files are reported in the
+status of the run, so no recording is dropped silently.
+"""
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "EnergyGate",
+    "ScreeningResult",
+    "apply_gate",
+    "band_energy",
+    "read_wav_samples",
+    "screen_file",
+    "screen_files",
+]
+
+
+FREQUENCY_BANDS: Dict[int, Tuple[float, float]] = {
+    1: (8_000.0, 250_000.0),
+    2: (800.0, 25_000.0),
+}
+"""Frequency range, in Hz, analysed by Tadarida-D in each band mode."""
+
+LEVEL_FLOOR = 1e-12
+"""Smallest frame energy, so digital silence has a finite level (-120 dB)."""
+
+
+@dataclass
+class EnergyGate:
+    """Options of the energy pre-screen.
+
+    Attributes:
+        threshold: Minimum contrast, in dB, between the level of a
+            recording and its median frame. Recordings with only steady
+            noise have a low contrast.
+        min_level: Minimum level of a recording, in dB relative to full
+            scale. Recordings below it are considered silent.
+        frame_size: Number of samples of each analysis frame.
+        percentile: Percentile of the frame energies taken as the level of
+            the recording. By default the loudest frame is used, so that a
+            single short call is enough for a recording to pass.
+    """
+
+    threshold: float = 6.0
+    min_level: float = -90.0
+    frame_size: int = 512
+    percentile: float = 100.0
+
+    def __post_init__(self):
+        if self.frame_size < 2:
+            raise ValueError("frame_size must be at least 2.")
+
+        if not 0 < self.percentile <= 100:
+            raise ValueError("percentile must be between 0 and 100.")
+
+
+@dataclass
+class ScreeningResult:
+    """Result of the energy pre-screen of a recording.
+
+    Attributes:
+        path: The .wav file.
+        passed: Whether the file should be processed by Tadarida-D.
+        contrast: Contrast between the level and the median frame, in dB.
+            None if the file could not be screened.
+        level: Level of the recording, in dB relative to full scale.
+            None if the file could not be screened.
+    """
+
+    path: Path
+    passed: bool
+    contrast: Optional[float] = None
+    level: Optional[float] = None
+
+
+def read_wav_samples(path: PathLike) -> Tuple[np.ndarray, int]:
+    """Read the first channel of a PCM .wav file.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+
+    Returns
+    -------
+    samples : np.ndarray
+        float32 samples scaled to the range [-1, 1].
+    sample_rate : int
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If the file is not a PCM .wav file.
+
+    """
+    try:
+        with wave.open(str(path), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            sample_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as error:
+        raise ValueError(f"File {path} is not a PCM .wav file.") from error
+
+    raw = np.frombuffer(frames, dtype=np.uint8)
+    raw = raw[: len(raw) - len(raw) % (width * channels)]
+    raw = raw.reshape(-1, channels, width)[:, 0, :]
+
+    if width == 1:
+        # 8 bit samples are unsigned.
+        samples = raw[:, 0].astype(np.float32) - 128
+    else:
+        # Place the little endian bytes at the top of a 32 bit integer.
+        padded = np.zeros((len(raw), 4), dtype=np.uint8)
+        padded[:, 4 - width :] = raw
+        samples = padded.view("<i4")[:, 0].astype(np.float32)
+        samples /= 2 ** (8 * (4 - width))
+
+    samples /= 2 ** (8 * width - 1)
+    return samples, sample_rate
+
+
+def band_energy(
+    samples: np.ndarray,
+    sample_rate: float,
+    band: Tuple[float, float],
+    frame_size: int = 512,
+) -> np.ndarray:
+    """Compute the energy of each frame within a frequency band.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        Audio samples scaled to the range [-1, 1].
+    sample_rate : float
+        Sample rate of the recording, in Hz.
+    band : tuple of float
+        Lowest and highest frequency of the band, in Hz.
+    frame_size : int, optional
+        Number of samples of each frame.
+
+    Returns
+    -------
+    np.ndarray
+        Mean power of each frame within the band, relative to full scale.
+
+    """
+    num_frames = max(1, len(samples) // frame_size)
+    frames = np.zeros((num_frames, frame_size), dtype=np.float32)
+    used = min(len(samples), num_frames * frame_size)
+    frames.reshape(-1)[:used] = samples[:used]
+
+    window = np.hanning(frame_size).astype(np.float32)
+    spectrum = np.fft.rfft(frames * window, axis=1)
+    power = spectrum.real**2 + spectrum.imag**2
+
+    frequencies = np.fft.rfftfreq(frame_size, d=1 / sample_rate)
+    in_band = (frequencies >= band[0]) & (frequencies <= band[1])
+
+    # Parseval scaling, so a full scale sine in the band has a power of 0.5.
+    scale = 2 / (frame_size * np.sum(window**2))
+    return power[:, in_band].sum(axis=1) * scale
+
+
+def screen_file(
+    path: PathLike,
+    gate: EnergyGate,
+    time_expansion: Literal[10, 1] = 1,
+    frequency_band: Literal[1, 2] = 1,
+) -> ScreeningResult:
+    """Check whether a recording has enough energy to be processed.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The .wav file.
+    gate : EnergyGate
+        Options of the pre-screen.
+    time_expansion : int, optional
+        Time expansion factor of the recording, see run_tadarida.
+    frequency_band : int, optional
+        Frequency band analysed by Tadarida-D, see run_tadarida.
+
+    Returns
+    -------
+    ScreeningResult
+
+    """
+    path = Path(path)
+
+    try:
+        samples, sample_rate = read_wav_samples(path)
+    except (OSError, ValueError):
+        # Leave files the gate can not read to Tadarida-D.
+        return ScreeningResult(path=path, passed=True)
+
+    energy = band_energy(
+        samples,
+        sample_rate * time_expansion,
+        FREQUENCY_BANDS[frequency_band],
+        frame_size=gate.frame_size,
+    )
+
+    levels = 10 * np.log10(np.maximum(energy, LEVEL_FLOOR))
+
+    level = float(np.percentile(levels, gate.percentile))
+    contrast = level - float(np.median(levels))
+    return ScreeningResult(
+        path=path,
+        passed=level >= gate.min_level and contrast >= gate.threshold,
+        contrast=contrast,
+        level=level,
+    )
+
+
+def screen_files(
+    files: Iterable[PathLike],
+    gate: EnergyGate,
+    time_expansion: Literal[10, 1] = 1,
+    frequency_band: Literal[1, 2] = 1,
+    workers: Optional[int] = None,
+) -> List[ScreeningResult]:
+    """Pre-screen many recordings.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        The .wav files.
+    gate : EnergyGate
+        Options of the pre-screen.
+    time_expansion, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    workers : int, optional
+        Number of threads used to screen several files at once.
+
+    Returns
+    -------
+    list of ScreeningResult
+        The result of each file, in the given order.
+
+    """
+    files = list(files)
+
+    def screen(path: PathLike) -> ScreeningResult:
+        return screen_file(path, gate, time_expansion, frequency_band)
+
+    if workers is None or workers <= 1:
+        return [screen(path) for path in files]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(screen, files))
+
+
+def apply_gate(
+    files: Iterable[PathLike],
+    gate: EnergyGate,
+    time_expansion: Literal[10, 1] = 1,
+    frequency_band: Literal[1, 2] = 1,
+    workers: Optional[int] = None,
+) -> Tuple[List[Path], List[Path]]:
+    """Split recordings into those to process and those to skip.
+
+    Parameters
+    ----------
+    files : list of str or os.PathLike
+        The .wav files.
+    gate : EnergyGate
+        Options of the pre-screen.
+    time_expansion, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+    workers : int, optional
+        Number of threads used to screen several files at once.
+
+    Returns
+    -------
+    kept : list of Path
+        The files that passed the pre-screen, in the given order.
+    skipped : list of Path
+        The files that did not pass the pre-screen.
+
+    """
+    results = screen_files(
+        files,
+        gate,
+        time_expansion=time_expansion,
+        frequency_band=frequency_band,
+        workers=workers,
+    )
+    kept = [result.path for result in results if result.passed]
+    skipped = [result.path for result in results if not result.passed]
+    return kept, skipped
@@ -0,0 +1,552 @@
+"""Local job server for Tadarida-D.
+
+Several processes that call run_tadarida on the same machine each start their
+own TadaridaD processes and end up oversubscribing the CPUs. This module
+provides a server that listens on a Unix domain socket and runs Tadarida-D on
+behalf of many clients. Files submitted by different clients with the same
+parameters are merged into batches, and the number of concurrent TadaridaD
+processes and their memory usage, estimated from the peak memory of the
+finished processes, are kept within a global budget.
+
+The protocol is newline-delimited JSON. A client sends a single request with
+the files to process and the Tadarida-D parameters::
+
+    {"files": ["/path/to/file.wav"], "threads": 1, "time_expansion": 1,
+     "features": 2, "frequency_band": 1}
+
+The server streams back one message per processed batch, as soon as the batch
+is done, and a final message once all the files of the request have been
+processed::
+
+    {"type": "batch", "files": [...], "detections": [...], "status": {...}}
+    {"type": "error", "files": [...], "message": "..."}
+    {"type": "done"}
+
+Each batch is run by parallel.run_batch in its own directory, in which its
+files are linked, so concurrent batches of files from the same directory do
+not share their output files.
+"""
+import json
+import math
+import os
+import queue
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from pytadarida.configs import MEMORY_PER_THREAD
+from pytadarida.logs import RunStatus
+from pytadarida.output import expand_wav_files
+from pytadarida.parallel import run_batch
+from pytadarida.validate_inputs import validate_files
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "TadaridaServer",
+    "serve",
+    "submit",
+]
+
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "pytadarida.sock")
+"""Default path of the server socket."""
+
+PARAMETERS = {
+    "threads": 1,
+    "time_expansion": 1,
+    "features": 2,
+    "frequency_band": 1,
+}
+"""Tadarida-D parameters accepted by the server and their default values."""
+
+
+Message = Dict[str, Any]
+Batch = List[Tuple["_Job", Path]]
+
+
+def _run_batch(files: List[Path], **params) -> Tuple[pd.DataFrame, RunStatus]:
+    """Run a batch of files in its own staged directory."""
+    result = run_batch(files, **params)
+    return result.detections, result.status
+
+
+def _parse_request(request: Any) -> Tuple[List[Path], Dict[str, int]]:
+    """Check a client request and return its files and parameters."""
+    if not isinstance(request, dict):
+        raise ValueError("The request must be a JSON object.")
+
+    unknown = set(request) - {"files", *PARAMETERS}
+    if unknown:
+        raise ValueError(f"Unknown request fields: {sorted(unknown)}.")
+
+    files = request.get("files")
+    if not isinstance(files, list):
+        raise ValueError("The request must contain a list of files.")
+
+    validate_files(files)
+
+    params = {
+        name: int(request.get(name, default))
+        for name, default in PARAMETERS.items()
+    }
+
+    files = expand_wav_files(os.path.abspath(path) for path in files)
+    return files, params
+
+
+class _Job:  # pylint: disable=too-few-public-methods
+    """Files submitted by a single client and its outgoing messages."""
+
+    def __init__(self, num_files: int):
+        self.messages: "queue.Queue[Message]" = queue.Queue()
+        self._pending = num_files
+        self._lock = threading.Lock()
+
+        if num_files == 0:
+            self.messages.put({"type": "done"})
+
+    def report(self, message: Message, num_files: int):
+        """Send a message concerning some of the files of the job."""
+        self.messages.put(message)
+
+        with self._lock:
+            self._pending -= num_files
+            finished = self._pending <= 0
+
+        if finished:
+            self.messages.put({"type": "done"})
+
+
+class _Dispatcher:  # pylint: disable=too-many-instance-attributes
+    """Merge the files of all jobs into batches and run them."""
+
+    def __init__(
+        self,
+        runner: Callable[..., Tuple[pd.DataFrame, RunStatus]],
+        max_processes: int,
+        memory_budget: Optional[int],
+        batch_size: int,
+        batch_wait: float,
+    ):
+        if max_processes < 1:
+            raise ValueError("max_processes must be at least 1.")
+
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        self.runner = runner
+        self.max_processes = max_processes
+        self.memory_budget = memory_budget
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        self._pending: Dict[Tuple[int, ...], Batch] = {}
+        self._condition = threading.Condition()
+        self._running = 0
+        self._memory_in_use = 0
+        # Largest peak memory per thread of the finished batches.
+        self._memory_per_thread = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_processes)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        """Start dispatching batches."""
+        self._thread.start()
+
+    def close(self):
+        """Stop dispatching and fail all jobs that have not started."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+        with self._condition:
+            pending = self._pending
+            self._pending = {}
+
+        for batch in pending.values():
+            self._report_error(batch, "The server was shut down.")
+
+    def submit(self, job: _Job, files: List[Path], params: Dict[str, int]):
+        """Queue the files of a job."""
+        key = tuple(params[name] for name in PARAMETERS)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The server was shut down.")
+
+            self._pending.setdefault(key, []).extend(
+                (job, path) for path in files
+            )
+            self._condition.notify_all()
+
+    def _can_start(self, memory: int) -> bool:
+        if self._closed:
+            return True
+
+        if self._running >= self.max_processes:
+            return False
+
+        if self.memory_budget is None or self._running == 0:
+            # A batch that exceeds the budget on its own still runs, alone.
+            return True
+
+        return self._memory_in_use + memory <= self.memory_budget
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed
+                    or (self._pending and self._running < self.max_processes)
+                )
+
+                if self._closed:
+                    return
+
+                items = next(iter(self._pending.values()))
+                wait = len(items) < self.batch_size
+
+            if wait:
+                # Give other clients a chance to join the batch.
+                time.sleep(self.batch_wait)
+
+            with self._condition:
+                if self._closed:
+                    return
+
+                key, items = next(iter(self._pending.items()))
+                batch = items[: self.batch_size]
+                del items[: self.batch_size]
+
+                # Parameter sets take turns, so that a large job does not
+                # hold back the jobs submitted with other parameters.
+                del self._pending[key]
+                if items:
+                    self._pending[key] = items
+
+                # Until a batch has finished, the usual memory per thread is
+                # assumed.
+                memory = key[0] * (self._memory_per_thread or MEMORY_PER_THREAD)
+                self._condition.wait_for(partial(self._can_start, memory))
+
+                if self._closed:
+                    self._pending.setdefault(key, []).extend(batch)
+                    return
+
+                self._running += 1
+                self._memory_in_use += memory
+
+            self._executor.submit(self._run_batch, key, batch, memory)
+
+    def _run_batch(
+        self,
+        key: Tuple[int, ...],
+        batch: Batch,
+        memory: int,
+    ):
+        params = dict(zip(PARAMETERS, key))
+        files = list(dict.fromkeys(path for _, path in batch))
+        peak_rss = 0
+
+        try:
+            detections, status = self.runner(files, **params)
+        except Exception as error:  # pylint: disable=broad-except
+            self._report_error(batch, str(error))
+        else:
+            peak_rss = status.peak_rss
+            self._report_results(batch, detections, status)
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._memory_in_use -= memory
+                self._memory_per_thread = max(
+                    self._memory_per_thread,
+                    math.ceil(peak_rss / max(params["threads"], 1)),
+                )
+                self._condition.notify_all()
+
+    @staticmethod
+    def _group_by_job(batch: Batch) -> Dict[_Job, List[Path]]:
+        jobs: Dict[_Job, List[Path]] = {}
+        for job, path in batch:
+            jobs.setdefault(job, []).append(path)
+        return jobs
+
+    def _report_error(self, batch: Batch, message: str):
+        for job, paths in self._group_by_job(batch).items():
+            job.report(
+                {
+                    "type": "error",
+                    "files": [str(path) for path in paths],
+                    "message": message,
+                },
+                len(paths),
+            )
+
+    def _report_results(
+        self,
+        batch: Batch,
+        detections: pd.DataFrame,
+        status: RunStatus,
+    ):
+        if "wav" in detections:
+            detections = detections.assign(wav=detections["wav"].astype(str))
+
+        for job, paths in self._group_by_job(batch).items():
+            names = [str(path) for path in paths]
+
+            if "wav" in detections:
+                selected = detections[detections["wav"].isin(names)]
+            else:
+                selected = detections
+
+            job.report(
+                {
+                    "type": "batch",
+                    "files": names,
+                    "detections": selected.to_dict(orient="records"),
+                    "status": asdict(status),
+                },
+                len(paths),
+            )
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle a single client connection."""
+
+    server: "TadaridaServer"
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            files, params = _parse_request(request)
+            job = _Job(len(files))
+            self.server.dispatcher.submit(job, files, params)
+        except (
+            ValueError,
+            TypeError,
+            FileNotFoundError,
+            RuntimeError,
+        ) as error:
+            self._send({"type": "error", "files": [], "message": str(error)})
+            self._send({"type": "done"})
+            return
+
+        while True:
+            message = job.messages.get()
+
+            try:
+                self._send(message)
+            except OSError:
+                # The client went away; the remaining batches still run.
+                return
+
+            if message["type"] == "done":
+                return
+
+    def _send(self, message: Message):
+        line = json.dumps(message, default=str).encode("utf-8")
+        self.wfile.write(line + b"\n")
+        self.wfile.flush()
+
+
+class TadaridaServer(socketserver.ThreadingUnixStreamServer):
+    """Server running Tadarida-D jobs submitted over a Unix socket.
+
+    Parameters
+    ----------
+    socket_path : str or os.PathLike, optional
+        Path of the Unix domain socket to listen on.
+    max_processes : int, optional
+        Maximum number of TadaridaD processes running at the same time.
+    memory_budget : int, optional
+        Maximum estimated memory, in bytes, used by all running TadaridaD
+        processes. Each thread is assumed to use the largest peak memory per
+        thread measured in the finished batches, or about 150 MB until a
+        batch has finished. No limit by default.
+    batch_size : int, optional
+        Maximum number of files processed by a single TadaridaD process.
+    batch_wait : float, optional
+        Time, in seconds, to wait for more files before starting an
+        incomplete batch.
+    runner : callable, optional
+        Function used to process each batch. Called with the list of files
+        and the Tadarida-D parameters, it must return the same values as
+        run_tadarida. By default, each batch is run by parallel.run_batch
+        in its own directory.
+    """
+
+    daemon_threads = True
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        socket_path: PathLike = DEFAULT_SOCKET,
+        max_processes: int = 1,
+        memory_budget: Optional[int] = None,
+        batch_size: int = 32,
+        batch_wait: float = 0.1,
+        runner: Callable[..., Tuple[pd.DataFrame, RunStatus]] = _run_batch,
+    ):
+        self.dispatcher = _Dispatcher(
+            runner=runner,
+            max_processes=max_processes,
+            memory_budget=memory_budget,
+            batch_size=batch_size,
+            batch_wait=batch_wait,
+        )
+
+        socket_path = Path(socket_path)
+        if socket_path.exists():
+            if _is_listening(socket_path):
+                raise OSError(f"A server is already listening on {socket_path}")
+
+            # Stale socket left behind by a server that did not shut down.
+            socket_path.unlink()
+
+        super().__init__(str(socket_path), _RequestHandler)
+        self.dispatcher.start()
+
+    def server_close(self):
+        """Stop the server and remove its socket."""
+        super().server_close()
+        self.dispatcher.close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def _is_listening(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def serve(
+    socket_path: PathLike = DEFAULT_SOCKET,
+    max_processes: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+    batch_size: int = 32,
+    batch_wait: float = 0.1,
+):
+    """Run a Tadarida-D job server until interrupted.
+
+    Parameters
+    ----------
+    socket_path : str or os.PathLike, optional
+        Path of the Unix domain socket to listen on.
+    max_processes : int, optional
+        Maximum number of TadaridaD processes running at the same time.
+        Defaults to the number of CPUs.
+    memory_budget : int, optional
+        Maximum estimated memory, in bytes, used by all running TadaridaD
+        processes.
+    batch_size : int, optional
+        Maximum number of files processed by a single TadaridaD process.
+    batch_wait : float, optional
+        Time, in seconds, to wait for more files before starting an
+        incomplete batch.
+    """
+    if max_processes is None:
+        max_processes = os.cpu_count() or 1
+
+    with TadaridaServer(
+        socket_path=socket_path,
+        max_processes=max_processes,
+        memory_budget=memory_budget,
+        batch_size=batch_size,
+        batch_wait=batch_wait,
+    ) as server:
+        server.serve_forever()
+
+
+def submit(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    files: Union[
+        PathLike, List[PathLike], Tuple[PathLike, ...], Iterable[PathLike]
+    ],
+    socket_path: PathLike = DEFAULT_SOCKET,
+    threads: int = 1,
+    time_expansion: int = 1,
+    features: int = 2,
+    frequency_band: int = 1,
+) -> Iterator[Tuple[pd.DataFrame, RunStatus]]:
+    """Submit files to a running job server and stream back the results.
+
+    Parameters
+    ----------
+    files : str or list of str
+        Either a directory path containing .wav files or a list of .wav files,
+        to be processed.
+    socket_path : str or os.PathLike, optional
+        Path of the server socket.
+    threads, time_expansion, features, frequency_band : int, optional
+        Tadarida-D parameters, see run_tadarida.
+
+    Yields
+    ------
+    detections: pd.DataFrame
+        Detected sound events of a processed batch of files.
+    status: RunStatus
+        The status of the TadaridaD run that processed the batch.
+
+    Raises
+    ------
+    RuntimeError
+        If the server could not process some of the files.
+    """
+    if isinstance(files, (str, os.PathLike)):
+        files = [files]
+
+    request = {
+        "files": [os.path.abspath(path) for path in files],
+        "threads": threads,
+        "time_expansion": time_expansion,
+        "features": features,
+        "frequency_band": frequency_band,
+    }
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        with sock.makefile("rb") as stream:
+            for line in stream:
+                message = json.loads(line)
+
+                if message["type"] == "done":
+                    return
+
+                if message["type"] == "error":
+                    raise RuntimeError(message["message"])
+
+                yield (
+                    pd.DataFrame.from_records(message["detections"]),
+                    RunStatus(**message["status"]),
+                )
+
+    raise RuntimeError("The server closed the connection unexpectedly.")
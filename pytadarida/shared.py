@@ -0,0 +1,347 @@
+"""Parse .ta files in worker processes, without copying the results back.
+
+Parsing .ta files with pandas runs in a single thread, and returning
+dataframes from worker processes would pickle them, which doubles the memory
+used and costs as much time as the parsing itself. Instead, the parser in
+this module first scans the files to count their rows, then allocates a
+single block of shared memory for all the numeric values. Worker processes
+parse a share of the files each, straight into their slice of the block,
+and only send back the Filename values of their rows, run-length encoded,
+and which columns hold integers.
+
+Columns are stored one after the other in the block (Fortran order), so each
+column of the dataframe is a contiguous view on the block, which stays
+mapped until the dataframe and every view of it are deleted. Integer
+columns, such as CallNum, are parsed as floats and converted once all the
+files are read.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from pytadarida.arrays import (
+    _header_end,
+    _map_file,
+    _parse_header,
+    _scan_file,
+)
+from pytadarida.configs import FILENAME_COLUMN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "parse_detections_shared",
+]
+
+
+CHUNKS_PER_WORKER = 4
+"""Number of tasks per worker process, to even out files of unequal size."""
+
+FIRST_FIELD = re.compile(rb"^([^\t\r\n]*)\t", re.MULTILINE)
+"""First field (Filename) of each row with data."""
+
+_Task = Tuple[int, Path, int, int]
+"""A file to parse: its id, its path, its first row and its number of rows."""
+
+
+def _scan(
+    mapping: Mapping[Path, Path],
+    columns: Optional[Sequence[str]],
+) -> Tuple[List[str], List[int]]:
+    """Choose the numeric columns and count the rows of each file.
+
+    Returns:
+        The numeric columns, in the order of the first file, and the number
+        of rows of each file.
+    """
+    names: Optional[List[str]] = None
+    num_rows = []
+    for ta_path in mapping.values():
+        header, rows = _scan_file(ta_path)
+        num_rows.append(rows)
+
+        if names is None:
+            names = header
+        elif columns is None and header != names:
+            raise ValueError(
+                f"File {ta_path} has different columns than the other files."
+            )
+
+    names = names or []
+    if columns is None:
+        return names, num_rows
+
+    missing = [column for column in columns if column not in names]
+    if missing:
+        raise ValueError(
+            f"File {next(iter(mapping.values()))} is missing the columns "
+            f"{missing}."
+        )
+
+    # Same columns as parse_ta_file: the key columns and the requested ones,
+    # in the order of the file.
+    requested = {"CallNum", *columns}
+    return [name for name in names if name in requested], num_rows
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    return shared_memory.SharedMemory(name=name)
+
+
+class _BlockOwner:  # pylint: disable=too-few-public-methods
+    """Keep a shared memory block mapped while arrays use it.
+
+    Arrays made from this object have it as their base, as do all their
+    views, so the block is closed once the last of them is deleted, when
+    no buffer of the block is exported anymore.
+    """
+
+    def __init__(
+        self, block: shared_memory.SharedMemory, shape: Tuple[int, int]
+    ):
+        self._block = block
+        itemsize = np.dtype(np.float64).itemsize
+        address = np.frombuffer(block.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "version": 3,
+            "shape": shape,
+            "typestr": np.dtype(np.float64).str,
+            "strides": (itemsize, itemsize * shape[0]),
+            "data": (address, False),
+        }
+
+    def __del__(self):
+        self._block.close()
+
+
+def _integer_columns(values: np.ndarray, first_row: List[bytes]) -> List[bool]:
+    """Find the columns of a file that hold integers.
+
+    A column holds integers if all its values are finite whole numbers and
+    it is written without a decimal point, as the columns of a .ta file are
+    all written with the same format.
+    """
+    whole = np.all(np.isfinite(values) & (values == np.trunc(values)), axis=0)
+    return [
+        bool(is_whole) and token.lstrip(b"+-").isdigit()
+        for is_whole, token in zip(whole, first_row)
+    ]
+
+
+def _parse_files(  # pylint: disable=too-many-locals
+    name: str,
+    shape: Tuple[int, int],
+    columns: List[str],
+    tasks: List[_Task],
+) -> List[Tuple[int, List[Tuple[str, int]], List[bool]]]:
+    """Parse files into their rows of the shared block.
+
+    Runs in a worker process. The values of each file are parsed into a
+    temporary array, the size of the file, and copied into the block.
+
+    Returns:
+        For each file with detections, its id, the values of its Filename
+        column as (value, number of rows) runs, and whether each column
+        holds integers.
+    """
+    block = _attach(name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=block.buf, order="F")
+        results = []
+        for file_id, ta_path, start, rows in tasks:
+            if not rows:
+                continue
+
+            with open(ta_path, "rb") as ta_file, _map_file(ta_file) as text:
+                header_end = _header_end(text)
+                header = _parse_header(ta_path, text[:header_end])
+
+                missing = [column for column in columns if column not in header]
+                if missing:
+                    raise ValueError(
+                        f"File {ta_path} is missing the columns {missing}."
+                    )
+
+                usecols = [header.index(column) for column in columns]
+                filenames = FIRST_FIELD.findall(text, header_end + 1)
+
+                text.seek(header_end + 1)
+                first_row = text.readline().rstrip(b"\r\n").split(b"\t")
+                text.seek(header_end + 1)
+                try:
+                    values = np.loadtxt(
+                        iter(text.readline, b""),
+                        dtype=np.float64,
+                        delimiter="\t",
+                        usecols=usecols,
+                        ndmin=2,
+                    )
+                except ValueError as error:
+                    raise ValueError(
+                        f"File {ta_path} has malformed rows."
+                    ) from error
+
+            if len(values) != rows or len(filenames) != rows:
+                raise ValueError(f"File {ta_path} changed while being read.")
+
+            data[start : start + rows] = values
+            results.append(
+                (
+                    file_id,
+                    [
+                        (filename.decode("utf-8"), len(list(run)))
+                        for filename, run in groupby(filenames)
+                    ],
+                    _integer_columns(
+                        values, [first_row[index] for index in usecols]
+                    ),
+                )
+            )
+            del values
+
+        del data
+        return results
+    finally:
+        block.close()
+
+
+def _make_tasks(
+    ta_files: List[Path],
+    num_rows: List[int],
+    num_chunks: int,
+) -> List[List[_Task]]:
+    """Split the files into contiguous chunks with similar numbers of rows."""
+    total = sum(num_rows)
+    target = max(1, -(-total // num_chunks))
+
+    chunks: List[List[_Task]] = [[]]
+    start = 0
+    in_chunk = 0
+    for file_id, (ta_path, rows) in enumerate(zip(ta_files, num_rows)):
+        if in_chunk >= target:
+            chunks.append([])
+            in_chunk = 0
+
+        chunks[-1].append((file_id, ta_path, start, rows))
+        start += rows
+        in_chunk += rows
+
+    return chunks
+
+
+def parse_detections_shared(  # pylint: disable=too-many-locals
+    mapping: Dict[Path, Path],
+    columns: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+) -> "pd.DataFrame":
+    """Parse all .ta files in the given file mapping in worker processes.
+
+    Gives the same dataframe as parse_detections, except that the float
+    columns are views on a single block of shared memory, which is released
+    once the dataframe and every view of it are deleted. Unless columns are
+    given, every file must have the same columns.
+
+    Parameters
+    ----------
+    mapping : dict of str or os.PathLike
+        Mapping of .wav files and their corresponding .ta files.
+    columns : list of str, optional
+        The columns to parse, in addition to the key columns. All columns
+        are parsed by default.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with detected sound events.
+
+    Raises
+    ------
+    FileNotFoundError
+    ValueError
+        If no file is given, a file is not a valid .ta file, the files have
+        different columns, or some of the requested columns are not in the
+        files.
+
+    """
+    # Imported here so that importing pytadarida does not load pandas.
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if not mapping:
+        raise ValueError("No .ta files were given.")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    wavs = list(mapping)
+    ta_files = [Path(path) for path in mapping.values()]
+    names, num_rows = _scan(mapping, columns)
+    shape = (sum(num_rows), len(names))
+
+    block = shared_memory.SharedMemory(
+        create=True,
+        size=max(1, shape[0] * shape[1] * np.dtype(np.float64).itemsize),
+    )
+    try:
+        tasks = _make_tasks(ta_files, num_rows, workers * CHUNKS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_files, block.name, shape, names, chunk)
+                for chunk in tasks
+            ]
+            results = [item for future in futures for item in future.result()]
+    except BaseException:
+        block.close()
+        raise
+    finally:
+        # The memory stays mapped in this process until it is closed.
+        block.unlink()
+
+    data = np.asarray(_BlockOwner(block, shape))
+
+    filenames: List[List[Tuple[str, int]]] = [[] for _ in wavs]
+    integer = [True] * len(names)
+    for file_id, runs, flags in results:
+        filenames[file_id] = runs
+        integer = [old and new for old, new in zip(integer, flags)]
+
+    detections: Dict[str, object] = {
+        FILENAME_COLUMN: np.array(
+            [
+                filename
+                for runs in filenames
+                for filename, count in runs
+                for _ in range(count)
+            ],
+            dtype=object,
+        ),
+    }
+    for index, column in enumerate(names):
+        values = data[:, index]
+        detections[column] = (
+            values.astype(np.int64) if integer[index] else values
+        )
+
+    counts = np.array(num_rows)
+    detections["wav"] = np.repeat(np.array(wavs, dtype=object), counts)
+    return pd.DataFrame(detections, copy=False)
@@ -0,0 +1,219 @@
+"""Write batch results to files as they are produced.
+
+Long runs produce results one batch at a time (see
+pytadarida.parallel.iter_batch_results). The sinks in this module write each
+batch as soon as it is available, so results do not pile up in memory and
+a run that stops halfway keeps the batches written so far.
+
+Three formats are supported: a single tab-separated file, a directory of
+Parquet files (one per batch, requires pyarrow) and an SQLite database (see
+pytadarida.store).
+"""
+import importlib.util
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Type, Union
+
+from pytadarida.parallel import BatchResult
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "ParquetSink",
+    "SqliteSink",
+    "TsvSink",
+    "open_sink",
+]
+
+
+SinkFormat = Literal["tsv", "parquet", "sqlite"]
+
+SUFFIX_FORMATS: Dict[str, SinkFormat] = {
+    ".tsv": "tsv",
+    ".txt": "tsv",
+    ".parquet": "parquet",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+"""Format used for each output suffix when none is given."""
+
+
+def _prepare(detections: "pd.DataFrame") -> "pd.DataFrame":
+    """Write the wav paths as text."""
+    return detections.assign(wav=detections["wav"].astype(str))
+
+
+class TsvSink:
+    """Append the detections of each batch to a tab-separated file.
+
+    The header is written once, with the columns of the first batch. If
+    the file already exists, new rows are appended under its header.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.columns: Optional[List[str]] = None
+
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "r", encoding="utf-8") as output:
+                self.columns = output.readline().rstrip("\r\n").split("\t")
+
+    def write(self, result: BatchResult):
+        """Write the detections of a batch."""
+        if result.detections.columns.empty:
+            return
+
+        detections = _prepare(result.detections)
+
+        header = self.columns is None
+        if self.columns is None:
+            self.columns = [str(column) for column in detections.columns]
+
+        detections.reindex(columns=self.columns).to_csv(
+            self.path,
+            sep="\t",
+            index=False,
+            header=header,
+            mode="w" if header else "a",
+        )
+
+    def close(self):
+        """Nothing to close, every batch is written when received."""
+
+    def __enter__(self) -> "TsvSink":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ParquetSink:
+    """Write the detections of each batch to its own Parquet file.
+
+    The files are written to a directory as "part-<n>.parquet", which can
+    be read as a single dataset by pandas or pyarrow. New parts are numbered
+    after the existing ones.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The output directory. It is created if it does not exist.
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    """
+
+    def __init__(self, path: PathLike):
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError(
+                "Writing Parquet files requires pyarrow. Install it with "
+                "pip install pytadarida[parquet]."
+            )
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.parts = len(list(self.path.glob("part-*.parquet")))
+
+    def write(self, result: BatchResult):
+        """Write the detections of a batch."""
+        if result.detections.columns.empty:
+            return
+
+        part = self.path / f"part-{self.parts:05d}.parquet"
+        _prepare(result.detections).to_parquet(part, index=False)
+        self.parts += 1
+
+    def close(self):
+        """Nothing to close, every batch is written when received."""
+
+    def __enter__(self) -> "ParquetSink":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SqliteSink:
+    """Write each batch to a DetectionStore in its own transaction.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The database file. It is created if it does not exist.
+    """
+
+    def __init__(self, path: PathLike):
+        # The store imports pandas, which is only needed once results come.
+        from pytadarida.store import (  # pylint: disable=import-outside-toplevel
+            DetectionStore,
+        )
+
+        self.store = DetectionStore(path)
+
+    def write(self, result: BatchResult):
+        """Write the detections and files of a batch."""
+        self.store.add_result(result)
+
+    def close(self):
+        """Close the database."""
+        self.store.close()
+
+    def __enter__(self) -> "SqliteSink":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+SINKS: Dict[SinkFormat, Type[Union[TsvSink, ParquetSink, SqliteSink]]] = {
+    "tsv": TsvSink,
+    "parquet": ParquetSink,
+    "sqlite": SqliteSink,
+}
+
+
+def open_sink(
+    path: PathLike,
+    sink_format: Optional[SinkFormat] = None,
+) -> Union[TsvSink, ParquetSink, SqliteSink]:
+    """Open a sink of the given format.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The output file, or directory for Parquet.
+    sink_format : {"tsv", "parquet", "sqlite"}, optional
+        The output format. By default it is chosen from the suffix of the
+        path.
+
+    Returns
+    -------
+    TsvSink, ParquetSink or SqliteSink
+
+    Raises
+    ------
+    ValueError
+        If no format is given and the suffix is not known.
+
+    """
+    if sink_format is None:
+        sink_format = SUFFIX_FORMATS.get(Path(path).suffix.lower())
+
+    if sink_format not in SINKS:
+        raise ValueError(
+            f"Can not choose an output format for {path}, use one of the "
+            f"suffixes {sorted(SUFFIX_FORMATS)} or give a format."
+        )
+
+    return SINKS[sink_format](path)
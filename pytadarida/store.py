@@ -0,0 +1,305 @@
+"""Store Tadarida-D detections in an SQLite database.
+
+Detections of long monitoring campaigns do not fit comfortably in a single
+dataframe. The DetectionStore keeps them in an SQLite database instead, with
+one row per detection and one column per .ta column, plus indexes to query
+them by file, start time and frequency.
+
+Every batch of results is written in a single transaction, together with
+the list of files it covers, so a crash never leaves a batch half written.
+The database uses write-ahead logging (WAL), so it can be read from other
+processes while a run is still writing to it.
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Set, Union
+
+import pandas as pd
+
+from pytadarida.parallel import BatchResult
+
+PathLike = Union[str, os.PathLike]
+
+
+__all__ = [
+    "DetectionStore",
+]
+
+
+DETECTIONS_TABLE = "detections"
+FILES_TABLE = "files"
+METADATA_TABLE = "metadata"
+
+INDEXED_COLUMNS = {
+    "wav": ["wav"],
+    "time": ["StTime"],
+    "frequency": ["Fmin", "Fmax"],
+}
+"""Indexes of the detections table, created when their columns exist."""
+
+BUSY_TIMEOUT = 30.0
+"""Time, in seconds, to wait for a lock held by another connection."""
+
+
+def _quote(name: str) -> str:
+    """Quote an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if dtype.kind in "iub":
+        return "INTEGER"
+    if dtype.kind == "f":
+        return "REAL"
+    return "TEXT"
+
+
+class DetectionStore:
+    """SQLite database of detections.
+
+    The schema of the detections table is derived from the columns of the
+    first batch of detections, and new columns are added when later batches
+    have them (for instance .ta files of a different version).
+
+    Can be used as a context manager, which closes the database on exit.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        The database file. It is created if it does not exist.
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.connection = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {FILES_TABLE} ("
+            "wav TEXT PRIMARY KEY, "
+            "detections INTEGER NOT NULL, "
+            "skipped INTEGER NOT NULL DEFAULT 0, "
+            "processed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {METADATA_TABLE} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of the detections table, empty if it does not exist."""
+        rows = self.connection.execute(
+            f"PRAGMA table_info({DETECTIONS_TABLE})"
+        ).fetchall()
+        return [row[1] for row in rows]
+
+    def _ensure_columns(self, detections: pd.DataFrame):
+        """Create the detections table or add the missing columns."""
+        existing = self.columns
+
+        if not existing:
+            columns = ["wav TEXT NOT NULL"] + [
+                f"{_quote(str(name))} {_sql_type(dtype)}"
+                for name, dtype in detections.dtypes.items()
+                if name != "wav"
+            ]
+            self.connection.execute(
+                f"CREATE TABLE {DETECTIONS_TABLE} ({', '.join(columns)})"
+            )
+            existing = self.columns
+
+        for name, dtype in detections.dtypes.items():
+            if name not in existing:
+                self.connection.execute(
+                    f"ALTER TABLE {DETECTIONS_TABLE} ADD COLUMN "
+                    f"{_quote(str(name))} {_sql_type(dtype)}"
+                )
+
+        for index, index_columns in INDEXED_COLUMNS.items():
+            if not set(index_columns) <= set(self.columns):
+                continue
+
+            quoted = ", ".join(_quote(column) for column in index_columns)
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"{DETECTIONS_TABLE}_{index} ON {DETECTIONS_TABLE} ({quoted})"
+            )
+
+    def add_batch(
+        self,
+        detections: pd.DataFrame,
+        files: Iterable[PathLike],
+        skipped: Iterable[PathLike] = (),
+    ):
+        """Write the detections of a batch of files in one transaction.
+
+        Detections previously stored for the same files are replaced, so a
+        batch can be written again after a failed run.
+
+        Parameters
+        ----------
+        detections : pd.DataFrame
+            Detections of the batch, with a "wav" column as returned by
+            run_tadarida.
+        files : list of str or os.PathLike
+            All the files processed in the batch, including those without
+            detections.
+        skipped : list of str or os.PathLike, optional
+            Files of the batch that were skipped by the pre-screen.
+        """
+        files = [str(path) for path in files]
+        skipped = [str(path) for path in skipped]
+
+        # Batches where every file was skipped have no columns at all.
+        has_columns = len(detections.columns) > 0
+
+        counts = {}
+        if has_columns:
+            detections = detections.assign(wav=detections["wav"].astype(str))
+            counts = detections["wav"].value_counts().to_dict()
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            if has_columns:
+                self._ensure_columns(detections)
+
+            if self.columns:
+                self.connection.executemany(
+                    f"DELETE FROM {DETECTIONS_TABLE} WHERE wav = ?",
+                    [(path,) for path in files + skipped],
+                )
+
+            if len(detections):
+                columns = ", ".join(
+                    _quote(str(name)) for name in detections.columns
+                )
+                placeholders = ", ".join("?" * len(detections.columns))
+                values = detections.astype(object).where(
+                    detections.notna(), None
+                )
+                self.connection.executemany(
+                    f"INSERT INTO {DETECTIONS_TABLE} ({columns}) "
+                    f"VALUES ({placeholders})",
+                    values.itertuples(index=False, name=None),
+                )
+
+            now = time.time()
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {FILES_TABLE} "
+                "(wav, detections, skipped, processed_at) VALUES (?, ?, ?, ?)",
+                [(path, counts.get(path, 0), 0, now) for path in files]
+                + [(path, 0, 1, now) for path in skipped],
+            )
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        self.connection.execute("COMMIT")
+
+    def add_result(self, result: BatchResult):
+        """Write the result of a parallel batch, see add_batch."""
+        skipped = set(result.status.skipped)
+        self.add_batch(
+            result.detections,
+            [path for path in result.files if path not in skipped],
+            skipped=result.status.skipped,
+        )
+
+    def processed_files(self) -> Set[Path]:
+        """Get the files whose results are in the store."""
+        rows = self.connection.execute(f"SELECT wav FROM {FILES_TABLE}")
+        return {Path(row[0]) for row in rows}
+
+    def skipped_files(self) -> Set[Path]:
+        """Get the files that were skipped by the pre-screen."""
+        rows = self.connection.execute(
+            f"SELECT wav FROM {FILES_TABLE} WHERE skipped"
+        )
+        return {Path(row[0]) for row in rows}
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        """Get a value stored with set_metadata, None if it is not set."""
+        row = self.connection.execute(
+            f"SELECT value FROM {METADATA_TABLE} WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def set_metadata(self, key: str, value: str):
+        """Store a value along with the detections."""
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {METADATA_TABLE} (key, value) "
+            "VALUES (?, ?)",
+            (key, value),
+        )
+
+    def query(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        wav: Optional[PathLike] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        fmin: Optional[float] = None,
+        fmax: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Get the detections matching all the given conditions.
+
+        Parameters
+        ----------
+        wav : str or os.PathLike, optional
+            Only detections of this file.
+        start, end : float, optional
+            Only detections whose start time (StTime) is within this range.
+        fmin, fmax : float, optional
+            Only detections whose frequency range (Fmin to Fmax) overlaps
+            this range.
+        columns : list of str, optional
+            The columns to read. All of them by default.
+
+        Returns
+        -------
+        pd.DataFrame
+
+        """
+        if not self.columns:
+            return pd.DataFrame(columns=columns)
+
+        conditions = []
+        params: List[Union[str, float]] = []
+        for condition, value in [
+            ("wav = ?", None if wav is None else str(wav)),
+            ('"StTime" >= ?', start),
+            ('"StTime" <= ?', end),
+            ('"Fmax" >= ?', fmin),
+            ('"Fmin" <= ?', fmax),
+        ]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        selected = (
+            "*"
+            if columns is None
+            else ", ".join(_quote(column) for column in columns)
+        )
+        sql = f"SELECT {selected} FROM {DETECTIONS_TABLE}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> "DetectionStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -10,11 +10,34 @@ PathLike = Union[str, os.PathLike]
 
 
 __all__ = [
+    "ARCHIVE_SUFFIXES",
+    "is_archive",
     "validate_files",
 ]
 
 
-def _validate_single_path(path: PathLike) -> None:
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+"""Suffixes of the zip and tar archives of recordings."""
+
+
+def is_archive(path: PathLike) -> bool:
+    """Check whether a path is a zip or tar archive, from its suffix."""
+    return Path(path).name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _validate_single_path(
+    path: PathLike,
+    allow_archives: bool = False,
+) -> None:
     """Check that the given path is valid.
 
     If path is a directory, it must exist. If path is a file, it must exist
@@ -27,6 +50,8 @@ def _validate_single_path(path: PathLike) -> None:
     ----------
     path : str or os.PathLike
         A path to a file or directory. Relative or absolute paths can be used.
+    allow_archives : bool, optional
+        Whether zip and tar archives are accepted as well as .wav files.
 
     Raises
     ------
@@ -42,12 +67,16 @@ def _validate_single_path(path: PathLike) -> None:
     if path.is_dir():
         return
 
+    if allow_archives and is_archive(path):
+        return
+
     if path.suffix not in [".wav", ".WAV"]:
         raise ValueError(f"File {path} is not a .wav file.")
 
 
 def validate_files(
     files: Union[List[PathLike], Tuple[PathLike], Iterable[PathLike]],
+    allow_archives: bool = False,
 ):
     """Check that the given files are valid.
 
@@ -63,6 +92,9 @@ def validate_files(
     files : list of str or os.PathLike
         Either a directory path containing .wav files or a list of .wav files,
         to be processed. Relative or absolute paths can be used.
+    allow_archives : bool, optional
+        Whether zip and tar archives of .wav files are accepted, see
+        pytadarida.archives.
     """
     if not files:
         raise ValueError("No files were given.")
@@ -74,4 +106,4 @@ def validate_files(
         if not isinstance(file, (str, os.PathLike)):
             raise TypeError(f"File {file} is not a valid type.")
 
-        _validate_single_path(file)
+        _validate_single_path(file, allow_archives=allow_archives)
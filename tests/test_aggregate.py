@@ -0,0 +1,122 @@
+"""Tests for pytadarida.aggregate"""
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytadarida import aggregate
+from pytadarida.aggregate import (
+    DetectionSummary,
+    recording_start,
+    summarize_tadarida,
+)
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import BatchResult
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+EVENING = Path("/survey/site_20230501_213000.wav")
+MORNING = Path("/survey/site_20230502_013000.wav")
+NEXT_EVENING = Path("/survey/site_20230502_220000.wav")
+
+
+@pytest.fixture
+def detections() -> pd.DataFrame:
+    """Detections of three recordings over two nights."""
+    return parse_detections(
+        {path: TEST_FILE_VERSION1 for path in (EVENING, MORNING, NEXT_EVENING)}
+    )
+
+
+def test_recording_start_reads_file_names():
+    """Test the start time is read from the name of the recording."""
+    assert recording_start(EVENING) == datetime(2023, 5, 1, 21, 30)
+
+
+def test_summary_per_file_matches_exact_statistics(detections):
+    """Test counts and extremes are exact, percentiles within a bin."""
+    summary = DetectionSummary(by="file")
+    for wav, events in detections.groupby("wav", sort=False):
+        summary.add(events, files=[wav])
+
+    result = summary.to_dataframe(percentiles=(50,)).set_index("wav")
+    expected = detections.groupby("wav")["FreqMP"].agg(
+        ["count", "mean", "min", "max", "median"]
+    )
+    expected.index = expected.index.map(str)
+
+    assert result["files"].tolist() == [1, 1, 1]
+    assert (result["calls"] == expected["count"]).all()
+    assert np.allclose(result["FreqMP_mean"], expected["mean"])
+    assert (result["FreqMP_min"] == expected["min"]).all()
+    assert (result["FreqMP_max"] == expected["max"]).all()
+    assert np.allclose(result["FreqMP_p50"], expected["median"], atol=0.5)
+
+
+def test_summary_per_night_counts_files_without_detections(detections):
+    """Test recordings after midnight belong to the previous night."""
+    quiet = Path("/survey/site_20230502_230000.wav")
+    summary = DetectionSummary(by="night")
+    summary.add(detections, files=[EVENING, MORNING, NEXT_EVENING, quiet])
+
+    result = summary.to_dataframe().set_index("night")
+
+    assert result["files"].to_dict() == {"2023-05-01": 2, "2023-05-02": 2}
+    assert result["calls"].to_dict() == {
+        "2023-05-01": 2 * len(detections) // 3,
+        "2023-05-02": len(detections) // 3,
+    }
+
+
+def test_merge_equals_single_summary(tmp_path, detections):
+    """Test summaries of shards, saved and loaded, merge into the whole."""
+    whole = DetectionSummary(by="hour")
+    whole.add(detections)
+
+    first, second = DetectionSummary(by="hour"), DetectionSummary(by="hour")
+    first.add(detections[detections["wav"] == MORNING])
+    second.add(detections[detections["wav"] != MORNING])
+    second.save(tmp_path / "second.npz")
+
+    merged = first.merge(DetectionSummary.load(tmp_path / "second.npz"))
+
+    pd.testing.assert_frame_equal(
+        merged.to_dataframe().sort_values("hour", ignore_index=True),
+        whole.to_dataframe().sort_values("hour", ignore_index=True),
+    )
+
+
+def test_merge_rejects_different_edges(detections):
+    """Test summaries with different bins can not be merged."""
+    summary = DetectionSummary(edges={"FreqMP": [0, 100, 200]})
+
+    with pytest.raises(ValueError):
+        summary.merge(DetectionSummary(edges={"FreqMP": [0, 50, 200]}))
+
+
+def test_summarize_tadarida_folds_every_batch(monkeypatch):
+    """Test the detections of every batch are summarized."""
+
+    def fake_iter_batch_results(files, **_):
+        for path in files:
+            yield BatchResult(
+                files=[path],
+                detections=parse_detections({path: TEST_FILE_VERSION1}),
+                status=RunStatus("", "", ""),
+                elapsed=0.0,
+            )
+
+    monkeypatch.setattr(
+        aggregate, "iter_batch_results", fake_iter_batch_results
+    )
+
+    summary, _ = summarize_tadarida([EVENING, MORNING], by="night")
+
+    result = summary.to_dataframe()
+    assert result["night"].tolist() == ["2023-05-01"]
+    assert result["files"].tolist() == [2]
@@ -0,0 +1,112 @@
+"""Tests for pytadarida.archives"""
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida import archives
+from pytadarida.archives import iter_wav_members, run_tadarida_archive
+from pytadarida.commands import run_tadarida
+from pytadarida.logs import RunStatus
+from pytadarida.monitor import ResourceUsage
+from pytadarida.parsing import parse_detections
+from pytadarida.screening import EnergyGate
+from pytadarida.validate_inputs import validate_files
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+MEMBERS = ["night1/a.wav", "night1/b.wav", "night2/a.wav", "notes.txt"]
+
+
+@pytest.fixture(params=["zip", "tar.gz"])
+def archive(request, tmp_path: Path) -> Path:
+    """A zip or compressed tar archive of recordings, and a text file."""
+    path = tmp_path / f"recordings.{request.param}"
+    if request.param == "zip":
+        with zipfile.ZipFile(path, "w") as zipped:
+            for member in MEMBERS:
+                zipped.write(TEST_WAV, member)
+    else:
+        with tarfile.open(path, "w:gz") as tarred:
+            for member in MEMBERS:
+                tarred.add(TEST_WAV, member)
+    return path
+
+
+def test_iter_wav_members_lists_wav_files(archive):
+    """Test only .wav members are read, with their contents."""
+    members = [
+        (name, len(contents.read()))
+        for name, contents in iter_wav_members(archive)
+    ]
+
+    size = TEST_WAV.stat().st_size
+    assert members == [(name, size) for name in MEMBERS[:3]]
+
+
+def test_validate_files_accepts_archives_when_asked(archive):
+    """Test archives are only valid inputs when allowed."""
+    with pytest.raises(ValueError):
+        validate_files([archive])
+
+    validate_files([archive], allow_archives=True)
+
+
+def test_run_tadarida_archive_keys_results_by_member(
+    monkeypatch, tmp_path, archive
+):
+    """Test batches are staged, keyed by member and deleted once done."""
+    staged = []
+
+    def fake_run_wav_files(files, workdir=None, **_):
+        assert all(path.exists() for path in files)
+        staged.extend(files)
+        detections = parse_detections(
+            {path: TEST_FILE_VERSION1 for path in files}
+        )
+        return detections, RunStatus("", "", "", files=len(files))
+
+    monkeypatch.setattr(archives, "run_wav_files", fake_run_wav_files)
+
+    detections, status = run_tadarida_archive(
+        archive, batch_size=2, staging_dir=tmp_path
+    )
+
+    assert status.files == 3
+    assert list(detections["wav"].unique()) == [Path(m) for m in MEMBERS[:3]]
+    assert set(detections["Filename"]) == {"a.wav", "b.wav"}
+    assert not any(path.exists() for path in staged)
+    assert [path.name for path in tmp_path.iterdir()] == [archive.name]
+
+
+def test_run_tadarida_accepts_archives(archive):
+    """Test archives given to run_tadarida report members as skipped."""
+    detections, status = run_tadarida(
+        [archive, TEST_WAV], gate=EnergyGate(min_level=100)
+    )
+
+    assert isinstance(detections, pd.DataFrame)
+    assert status.skipped == [Path(m) for m in MEMBERS[:3]] + [TEST_WAV]
+
+
+def test_run_tadarida_rejects_workdir_with_archives(tmp_path, archive):
+    """Test options that can not apply to archive batches are rejected."""
+    with pytest.raises(ValueError):
+        run_tadarida([archive], workdir=tmp_path)
+
+    with pytest.raises(ValueError):
+        run_tadarida([archive], usage=ResourceUsage())
+
+
+def test_run_tadarida_archive_rejects_invalid_archives(tmp_path):
+    """Test extraction errors are raised by the run."""
+    path = tmp_path / "broken.zip"
+    path.write_bytes(b"not an archive")
+
+    with pytest.raises(ValueError):
+        run_tadarida_archive(path, staging_dir=tmp_path)
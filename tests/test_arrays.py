@@ -0,0 +1,161 @@
+"""Test the pytadarida arrays module."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytadarida.arrays import (
+    load_ta_features,
+    read_ta_features,
+    read_ta_header,
+    write_ta_features,
+)
+from pytadarida.parsing import parse_ta_file
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+TEST_FILE_VERSION2 = DATA_DIR / "ta_file_version_2.ta"
+
+
+def test_read_ta_header():
+    """Test the header contains the same columns as the parsed file."""
+    header = read_ta_header(TEST_FILE_VERSION1)
+
+    assert header == list(parse_ta_file(TEST_FILE_VERSION1).columns)
+
+
+def test_read_ta_features_matches_pandas_parser():
+    """Test the numeric values match those parsed with pandas."""
+    block = read_ta_features([TEST_FILE_VERSION1])
+    expected = parse_ta_file(TEST_FILE_VERSION1).drop(columns="Filename")
+
+    assert block.columns == list(expected.columns)
+    assert block.data.dtype == np.float32
+    np.testing.assert_allclose(
+        block.data,
+        expected.to_numpy(dtype=np.float32),
+        rtol=1e-6,
+    )
+
+
+def test_read_ta_features_concatenates_files_in_one_buffer(tmp_path: Path):
+    """Test rows of all files are stored in a single contiguous array."""
+    mapping = {
+        tmp_path / "first.wav": TEST_FILE_VERSION2,
+        tmp_path / "second.wav": TEST_FILE_VERSION2,
+    }
+
+    block = read_ta_features(mapping)
+
+    assert block.data.shape == (6, 153)
+    assert block.data.flags["C_CONTIGUOUS"]
+    assert block.files == list(mapping)
+    assert list(block.file_index) == [0, 0, 0, 1, 1, 1]
+
+
+def test_read_ta_features_selects_columns():
+    """Test only the requested columns are returned, in order."""
+    block = read_ta_features(
+        [TEST_FILE_VERSION1, TEST_FILE_VERSION2],
+        columns=["StTime", "Fmin", "CallNum"],
+    )
+    expected = parse_ta_file(TEST_FILE_VERSION2)
+
+    assert block.columns == ["StTime", "Fmin", "CallNum"]
+    assert block.data.shape == (6, 3)
+    np.testing.assert_allclose(
+        block.data[3:],
+        expected[["StTime", "Fmin", "CallNum"]].to_numpy(dtype=np.float32),
+    )
+
+
+def test_read_ta_features_raises_on_different_columns():
+    """Test files with different columns can not be read together."""
+    with pytest.raises(ValueError):
+        read_ta_features([TEST_FILE_VERSION1, TEST_FILE_VERSION2])
+
+
+def test_read_ta_features_raises_on_missing_columns():
+    """Test requesting a column that does not exist raises."""
+    with pytest.raises(ValueError):
+        read_ta_features([TEST_FILE_VERSION2], columns=["Fmax"])
+
+
+def test_read_ta_features_raises_if_not_ta_file(tmp_path: Path):
+    """Test a ValueError is raised if the file is not a .ta file."""
+    path = tmp_path / "file.txt"
+    path.write_text("not\ta\tta file\n")
+
+    with pytest.raises(ValueError):
+        read_ta_features([path])
+
+
+def test_read_ta_features_raises_on_malformed_rows(tmp_path: Path):
+    """Test rows with non-numeric values are reported."""
+    path = tmp_path / "file.ta"
+    path.write_text("Filename\tCallNum\tStTime\nfile.wav\t0\tabc\n")
+
+    with pytest.raises(ValueError):
+        read_ta_features([path])
+
+
+def test_read_ta_features_skips_blank_lines(tmp_path: Path):
+    """Test blank lines are not counted as rows."""
+    path = tmp_path / "file.ta"
+    path.write_bytes(
+        b"Filename\tCallNum\tStTime\r\n"
+        b"file.wav\t0\t1.5\r\n\r\n"
+        b"file.wav\t1\t2.5\n\n"
+    )
+
+    block = read_ta_features([path])
+
+    np.testing.assert_array_equal(
+        block.data[:, block.columns.index("StTime")], [1.5, 2.5]
+    )
+
+
+def test_feature_block_to_dataframe(tmp_path: Path):
+    """Test the dataframe has the features and the wav of each row."""
+    wav = tmp_path / "file.wav"
+    block = read_ta_features({wav: TEST_FILE_VERSION2})
+
+    dataframe = block.to_dataframe()
+
+    assert isinstance(dataframe, pd.DataFrame)
+    assert list(dataframe.columns) == [*block.columns, "wav"]
+    assert list(dataframe["wav"]) == [wav, wav, wav]
+
+
+def test_read_ta_features_returns_call_numbers():
+    """Test each row is indexed by its CallNum."""
+    block = read_ta_features([TEST_FILE_VERSION1])
+    expected = parse_ta_file(TEST_FILE_VERSION1)
+
+    assert list(block.call_num) == list(expected["CallNum"])
+
+
+def test_write_ta_features_to_npy(tmp_path: Path):
+    """Test the features written to disk match those read in memory."""
+    mapping = {
+        tmp_path / "first.wav": TEST_FILE_VERSION2,
+        tmp_path / "second.wav": TEST_FILE_VERSION2,
+    }
+    path = tmp_path / "features.npy"
+
+    written = write_ta_features(mapping, path, columns=["StTime", "Fmin"])
+    expected = read_ta_features(mapping, columns=["StTime", "Fmin"])
+
+    assert isinstance(written.data, np.memmap)
+    assert written.data.dtype == np.float32
+    assert (tmp_path / "features.index.npy").exists()
+    np.testing.assert_array_equal(written.data, expected.data)
+    np.testing.assert_array_equal(written.file_index, expected.file_index)
+    np.testing.assert_array_equal(written.call_num, expected.call_num)
+
+    loaded = load_ta_features(path, mmap_mode=None)
+    assert loaded.columns == ["StTime", "Fmin"]
+    assert loaded.files == list(mapping)
+    np.testing.assert_array_equal(loaded.data, expected.data)
@@ -0,0 +1,88 @@
+"""Test the pytadarida batching module."""
+import pytest
+
+from pytadarida.batching import AdaptiveBatcher
+
+
+def _simulate(batcher: AdaptiveBatcher, overhead: float, per_file: float):
+    """Run a few batches with a known timing model."""
+    for _ in range(10):
+        size = batcher.next_size()
+        batcher.record(size, overhead + size * per_file)
+
+
+def test_first_batch_uses_initial_size():
+    """Test the first batch has the initial size."""
+    batcher = AdaptiveBatcher(initial_size=4)
+    assert batcher.next_size() == 4
+
+
+def test_batcher_explores_until_model_is_known():
+    """Test the batcher tries a different size after the first batch."""
+    batcher = AdaptiveBatcher(initial_size=4)
+    batcher.record(batcher.next_size(), 10.0)
+
+    assert batcher.next_size() == 8
+    assert batcher.stats.overhead is None
+
+
+def test_batcher_estimates_overhead_and_time_per_file():
+    """Test the timing model is recovered from the observations."""
+    batcher = AdaptiveBatcher(initial_size=2)
+    _simulate(batcher, overhead=2.0, per_file=0.5)
+
+    assert batcher.stats.overhead == pytest.approx(2.0)
+    assert batcher.stats.per_file == pytest.approx(0.5)
+
+
+def test_batcher_meets_efficiency_target():
+    """Test the chosen size amortises the overhead."""
+    batcher = AdaptiveBatcher(initial_size=2, efficiency=0.8)
+    _simulate(batcher, overhead=2.0, per_file=0.5)
+
+    # 80% of the time on files: 0.5 * n >= 0.8 * (2 + 0.5 * n)
+    assert batcher.next_size() == 16
+
+
+def test_batcher_meets_throughput_target():
+    """Test the chosen size reaches the throughput target."""
+    batcher = AdaptiveBatcher(initial_size=2, target_throughput=1.5)
+    _simulate(batcher, overhead=2.0, per_file=0.5)
+
+    size = batcher.next_size()
+    assert size / (2.0 + 0.5 * size) >= 1.5
+    assert (size - 1) / (2.0 + 0.5 * (size - 1)) < 1.5
+
+
+def test_batcher_respects_latency_target():
+    """Test batches do not exceed the latency target."""
+    batcher = AdaptiveBatcher(initial_size=2, target_latency=5.0)
+    _simulate(batcher, overhead=2.0, per_file=0.5)
+
+    assert batcher.next_size() == 6
+
+
+def test_batcher_sizes_are_clamped():
+    """Test batch sizes stay within the given bounds."""
+    batcher = AdaptiveBatcher(initial_size=2, max_size=10)
+    _simulate(batcher, overhead=100.0, per_file=0.01)
+
+    assert max(batcher.stats.sizes) == 10
+
+
+def test_batcher_stats_record_chosen_sizes():
+    """Test the stats expose the sizes and throughput."""
+    batcher = AdaptiveBatcher(initial_size=2)
+    _simulate(batcher, overhead=1.0, per_file=1.0)
+
+    assert len(batcher.stats.sizes) == 10
+    assert batcher.stats.num_files == sum(batcher.stats.sizes)
+    assert batcher.stats.throughput == pytest.approx(
+        batcher.stats.num_files / batcher.stats.elapsed
+    )
+
+
+def test_batcher_rejects_invalid_sizes():
+    """Test invalid size bounds raise a ValueError."""
+    with pytest.raises(ValueError):
+        AdaptiveBatcher(initial_size=10, max_size=5)
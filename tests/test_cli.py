@@ -0,0 +1,168 @@
+"""Tests for the pytadarida command line interface."""
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida import cli
+from pytadarida.batching import AdaptiveBatcher
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import BatchResult
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_DIR_WAVS = DATA_DIR / "dir_of_wavs"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+@pytest.fixture
+def wav_dir(tmp_path: Path) -> Path:
+    """A copy of the test .wav files."""
+    return Path(shutil.copytree(TEST_DIR_WAVS, tmp_path / "wavs"))
+
+
+def fake_iter_batch_results(files, **_):
+    """Yield one result per file, with the detections of a test file."""
+    for path in files:
+        yield BatchResult(
+            files=[path],
+            detections=parse_detections({path: TEST_FILE_VERSION1}),
+            status=RunStatus("", "", ""),
+            elapsed=0.0,
+        )
+
+
+def test_parser_accepts_automatic_batch_size():
+    """Test 'auto' creates an adaptive batcher."""
+    args = cli.build_parser().parse_args(["in", "-o", "out.tsv", "-b", "auto"])
+
+    assert isinstance(args.batch_size, AdaptiveBatcher)
+
+
+def test_parser_rejects_invalid_batch_size():
+    """Test invalid batch sizes are rejected."""
+    with pytest.raises(SystemExit):
+        cli.build_parser().parse_args(["in", "-o", "out.tsv", "-b", "0"])
+
+
+def test_main_writes_results_and_manifest(monkeypatch, tmp_path, wav_dir):
+    """Test every batch is written to the output and the manifest."""
+    monkeypatch.setattr(cli, "iter_batch_results", fake_iter_batch_results)
+    output = tmp_path / "detections.tsv"
+    manifest = tmp_path / "run.manifest"
+
+    status = cli.main(
+        [str(wav_dir), "-o", str(output), "--manifest", str(manifest)]
+    )
+
+    wavs = {str(path) for path in wav_dir.glob("*.wav")}
+    assert status == 0
+    assert set(pd.read_csv(output, sep="\t")["wav"]) == wavs
+    assert set(manifest.read_text().splitlines()) == wavs
+
+
+def test_main_resumes_from_manifest(monkeypatch, tmp_path, wav_dir, capsys):
+    """Test files in the manifest are not processed again."""
+    monkeypatch.setattr(cli, "iter_batch_results", fake_iter_batch_results)
+    manifest = tmp_path / "run.manifest"
+    manifest.write_text("".join(f"{path}\n" for path in wav_dir.glob("*.wav")))
+
+    status = cli.main(
+        [
+            str(wav_dir),
+            "-o",
+            str(tmp_path / "detections.tsv"),
+            "--manifest",
+            str(manifest),
+        ]
+    )
+
+    assert status == 0
+    assert "nothing to do" in capsys.readouterr().out
+    assert not (tmp_path / "detections.tsv").exists()
+
+
+def test_main_does_not_record_failed_batches(
+    monkeypatch, tmp_path, wav_dir, capsys
+):
+    """Test batches with errors are left out of the manifest."""
+
+    def failing_iter_batch_results(files, **params):
+        for result in fake_iter_batch_results(files, **params):
+            result.status.error = "failed\n"
+            yield result
+
+    monkeypatch.setattr(cli, "iter_batch_results", failing_iter_batch_results)
+    manifest = tmp_path / "run.manifest"
+
+    status = cli.main(
+        [
+            str(wav_dir),
+            "-o",
+            str(tmp_path / "detections.tsv"),
+            "--manifest",
+            str(manifest),
+        ]
+    )
+
+    assert status == 1
+    assert "TadaridaD reported errors" in capsys.readouterr().err
+    assert not manifest.exists()
+
+
+def test_main_does_not_append_without_manifest(
+    monkeypatch, tmp_path, wav_dir, capsys
+):
+    """Test an existing output is only added to when resuming a run."""
+    monkeypatch.setattr(cli, "iter_batch_results", fake_iter_batch_results)
+    output = tmp_path / "detections.tsv"
+
+    assert cli.main([str(wav_dir), "-o", str(output)]) == 0
+    rows = output.read_text()
+
+    assert cli.main([str(wav_dir), "-o", str(output)]) == 1
+    assert "already holds results" in capsys.readouterr().err
+    assert output.read_text() == rows
+
+
+def test_main_reports_missing_inputs(tmp_path, capsys):
+    """Test missing inputs exit with an error message."""
+    status = cli.main([str(tmp_path / "missing"), "-o", "out.tsv"])
+
+    assert status == 1
+    assert "error" in capsys.readouterr().err
+
+
+def test_module_can_be_run():
+    """Test python -m pytadarida shows the help."""
+    process = subprocess.run(
+        [sys.executable, "-m", "pytadarida", "--help"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    assert "usage: pytadarida" in process.stdout
+
+
+def test_main_writes_metrics_file(monkeypatch, tmp_path, wav_dir):
+    """Test the metrics file is written during the run."""
+    monkeypatch.setattr(cli, "iter_batch_results", fake_iter_batch_results)
+    metrics = tmp_path / "pytadarida.prom"
+
+    status = cli.main(
+        [
+            str(wav_dir),
+            "-o",
+            str(tmp_path / "detections.tsv"),
+            "--metrics-file",
+            str(metrics),
+        ]
+    )
+
+    assert status == 0
+    assert metrics.read_text().endswith("# EOF\n")
@@ -61,3 +61,18 @@ def test_output_files_are_cleared_after_run_tadarida():
     assert TEST_WAV.exists()
     run_tadarida(TEST_WAV)
     assert not (TEST_WAV.parent / "txt").exists()
+
+
+def test_run_tadarida_records_phase_timings():
+    """Test the status holds the time of each phase and the counts."""
+    detections, status = run_tadarida(TEST_WAV)
+    assert set(status.timings) == {
+        "validate",
+        "normalize",
+        "run",
+        "collect",
+        "parse",
+        "clean",
+    }
+    assert status.files == 1
+    assert status.detections == len(detections)
@@ -0,0 +1,96 @@
+"""Test the pytadarida export module."""
+import io
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida.export import merge_ta_files
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+TEST_FILE_VERSION2 = DATA_DIR / "ta_file_version_2.ta"
+
+
+def test_merge_ta_files_matches_parse_detections(tmp_path: Path):
+    """Test the merged file has the same content as parse_detections."""
+    second = tmp_path / "second.ta"
+    shutil.copy(TEST_FILE_VERSION1, second)
+    outputs = {
+        Path("/data/first.wav"): TEST_FILE_VERSION1,
+        Path("/data/second.wav"): second,
+    }
+    destination = tmp_path / "detections.tsv"
+
+    rows = merge_ta_files(outputs, destination)
+
+    merged = pd.read_csv(destination, sep="\t")
+    expected = parse_detections(outputs)
+    expected["wav"] = expected["wav"].astype(str)
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_merge_ta_files_with_small_buffer(tmp_path: Path):
+    """Test lines split across chunks and CRLF line endings are handled."""
+    crlf = tmp_path / "crlf.ta"
+    crlf.write_bytes(
+        TEST_FILE_VERSION1.read_bytes().replace(b"\n", b"\r\n").rstrip()
+    )
+    outputs = {Path("a.wav"): TEST_FILE_VERSION1, Path("b.wav"): crlf}
+
+    small = io.BytesIO()
+    large = io.BytesIO()
+    merge_ta_files(outputs, small, file_column="file_id", buffer_size=7)
+    merge_ta_files(outputs, large, file_column="file_id")
+
+    assert small.getvalue() == large.getvalue()
+    assert b"\r" not in small.getvalue()
+
+    merged = pd.read_csv(io.BytesIO(small.getvalue()), sep="\t")
+    assert list(merged["file_id"].unique()) == [0, 1]
+
+
+def test_merge_ta_files_skips_blank_lines(tmp_path: Path):
+    """Test blank lines are neither copied nor counted as rows."""
+    path = tmp_path / "file.ta"
+    path.write_bytes(
+        b"Filename\tCallNum\tStTime\r\n"
+        b"\nfile.wav\t0\t1.5\r\n\r\n"
+        b"file.wav\t1\t2.5\n\n\r"
+    )
+
+    for buffer_size in (3, 1024):
+        output = io.BytesIO()
+        rows = merge_ta_files(
+            {Path("a.wav"): path}, output, buffer_size=buffer_size
+        )
+
+        assert rows == 2
+        assert output.getvalue() == (
+            b"Filename\tCallNum\tStTime\twav\n"
+            b"file.wav\t0\t1.5\ta.wav\n"
+            b"file.wav\t1\t2.5\ta.wav\n"
+        )
+
+
+def test_merge_ta_files_rejects_different_columns(tmp_path: Path):
+    """Test files with different headers can not be merged."""
+    outputs = {
+        Path("a.wav"): TEST_FILE_VERSION1,
+        Path("b.wav"): TEST_FILE_VERSION2,
+    }
+
+    with pytest.raises(ValueError):
+        merge_ta_files(outputs, tmp_path / "detections.tsv")
+
+
+def test_merge_ta_files_rejects_tabs_in_names(tmp_path: Path):
+    """Test .wav paths that would break the table are rejected."""
+    outputs = {Path("bad\tname.wav"): TEST_FILE_VERSION1}
+
+    with pytest.raises(ValueError):
+        merge_ta_files(outputs, tmp_path / "detections.tsv")
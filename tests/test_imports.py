@@ -0,0 +1,46 @@
+"""Test importing pytadarida is fast."""
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["numpy", "pandas"]
+"""Modules that must only be imported when they are used."""
+
+IMPORT_TIME_BUDGET = 0.25
+"""Maximum time, in seconds, to import pytadarida."""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter, so no module is imported already."""
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+@pytest.mark.parametrize("module", ["pytadarida", "pytadarida.export"])
+def test_import_does_not_load_heavy_modules(module: str):
+    """Test pandas and numpy are not imported with pytadarida."""
+    process = run_python(
+        "-c",
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+    )
+
+    assert process.stdout.strip() == ""
+
+
+def test_import_time_is_within_budget():
+    """Test the time to import pytadarida is within the budget."""
+    process = run_python("-X", "importtime", "-c", "import pytadarida")
+
+    # The last line is the top level package, with the cumulative time of
+    # all its imports in microseconds.
+    last_line = process.stderr.strip().splitlines()[-1]
+    _, cumulative, name = last_line.split("|")
+
+    assert name.strip() == "pytadarida"
+    assert int(cumulative) / 1e6 < IMPORT_TIME_BUDGET
@@ -0,0 +1,100 @@
+"""Tests for pytadarida.index"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytadarida.index import DetectionIndex
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+@pytest.fixture
+def detections() -> pd.DataFrame:
+    """Random detections of a few files, in no particular order."""
+    rng = np.random.default_rng(0)
+    size = 2000
+    fmin = rng.uniform(10, 100, size)
+    return pd.DataFrame(
+        {
+            "wav": rng.choice(["a.wav", "b.wav", "c.wav"], size),
+            "StTime": rng.uniform(0, 10000, size),
+            "Dur": rng.uniform(0, 200, size),
+            "Fmin": fmin,
+            "Fmax": fmin + rng.uniform(0, 50, size),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "start,end,fmin,fmax",
+    [
+        (1000, 1500, None, None),
+        (1000, 1500, 30, 60),
+        (None, 500, 80, None),
+        (9990, None, None, None),
+    ],
+)
+def test_overlapping_matches_masks(detections, start, end, fmin, fmax):
+    """Test overlap queries find the same rows as boolean masks."""
+    index = DetectionIndex.from_detections(detections)
+
+    mask = detections["wav"] == "b.wav"
+    if start is not None:
+        mask &= detections["StTime"] + detections["Dur"] >= start
+    if end is not None:
+        mask &= detections["StTime"] <= end
+    if fmin is not None:
+        mask &= detections["Fmax"] >= fmin
+    if fmax is not None:
+        mask &= detections["Fmin"] <= fmax
+
+    positions = index.overlapping("b.wav", start, end, fmin, fmax)
+
+    assert sorted(positions) == list(np.flatnonzero(mask))
+    assert detections["StTime"].iloc[positions].is_monotonic_increasing
+
+
+def test_starting_matches_masks(detections):
+    """Test range queries over all files find the same rows as masks."""
+    index = DetectionIndex.from_detections(detections)
+
+    mask = detections["StTime"].between(2000, 2100) & (detections["Fmin"] <= 40)
+
+    positions = index.starting(start=2000, end=2100, fmax=40)
+
+    assert sorted(positions) == list(np.flatnonzero(mask))
+
+
+def test_index_of_unknown_file_is_empty(detections):
+    """Test files without detections match nothing."""
+    index = DetectionIndex.from_detections(detections)
+
+    assert "d.wav" not in index
+    assert len(index.overlapping("d.wav")) == 0
+
+
+def test_save_and_load(tmp_path):
+    """Test a saved index answers queries like the original one."""
+    wav = Path("/recordings/a.wav")
+    detections = parse_detections({wav: TEST_FILE_VERSION1})
+    index = DetectionIndex.from_detections(detections)
+
+    index.save(tmp_path / "detections.index.npz")
+    loaded = DetectionIndex.load(tmp_path / "detections.index.npz")
+
+    assert wav in loaded
+    assert len(loaded) == len(detections)
+    assert list(loaded.overlapping(wav, start=0, fmin=30)) == list(
+        index.overlapping(wav, start=0, fmin=30)
+    )
+
+
+def test_missing_columns_are_rejected():
+    """Test an index needs the time and frequency columns."""
+    with pytest.raises(ValueError):
+        DetectionIndex.from_detections(pd.DataFrame({"wav": ["a.wav"]}))
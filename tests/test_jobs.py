@@ -0,0 +1,108 @@
+"""Tests for pytadarida.jobs"""
+from pathlib import Path
+
+import pytest
+
+from pytadarida import jobs
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import BatchResult
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_DIR_WAVS = DATA_DIR / "dir_of_wavs"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+class FakeBatches:
+    """Replacement of iter_batch_results, with one batch per file."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.files = []
+
+    def __call__(self, files, **_):
+        for count, path in enumerate(files):
+            if count == self.fail_after:
+                raise RuntimeError("Simulated crash.")
+
+            self.files.append(path)
+            yield BatchResult(
+                files=[path],
+                detections=parse_detections({path: TEST_FILE_VERSION1}),
+                status=RunStatus("", "", ""),
+                elapsed=0.0,
+            )
+
+
+def test_run_tadarida_job_resumes_after_crash(monkeypatch, tmp_path):
+    """Test a resumed job only processes the files left over."""
+    wavs = sorted(path.absolute() for path in TEST_DIR_WAVS.glob("*.wav"))
+
+    crashing = FakeBatches(fail_after=1)
+    monkeypatch.setattr(jobs, "iter_batch_results", crashing)
+    with pytest.raises(RuntimeError):
+        jobs.run_tadarida_job(TEST_DIR_WAVS, "survey", jobs_dir=tmp_path)
+
+    resumed = FakeBatches()
+    monkeypatch.setattr(jobs, "iter_batch_results", resumed)
+    detections, _ = jobs.run_tadarida_job(
+        TEST_DIR_WAVS, "survey", jobs_dir=tmp_path
+    )
+
+    with detections:
+        assert crashing.files + resumed.files == wavs
+        assert set(detections.to_dataframe()["wav"]) == set(wavs)
+
+
+def test_run_tadarida_job_skips_finished_job(monkeypatch, tmp_path):
+    """Test nothing is processed again once a job is done."""
+    monkeypatch.setattr(jobs, "iter_batch_results", FakeBatches())
+    detections, _ = jobs.run_tadarida_job(
+        TEST_DIR_WAVS, "survey", jobs_dir=tmp_path
+    )
+    detections.close()
+
+    again = FakeBatches()
+    monkeypatch.setattr(jobs, "iter_batch_results", again)
+    detections, _ = jobs.run_tadarida_job(
+        TEST_DIR_WAVS, "survey", jobs_dir=tmp_path
+    )
+    detections.close()
+
+    assert again.files == []
+
+
+def test_run_tadarida_job_rejects_other_parameters(monkeypatch, tmp_path):
+    """Test a job can not be resumed with other Tadarida-D parameters."""
+    monkeypatch.setattr(jobs, "iter_batch_results", FakeBatches())
+    detections, _ = jobs.run_tadarida_job(
+        TEST_DIR_WAVS, "survey", jobs_dir=tmp_path
+    )
+    detections.close()
+
+    with pytest.raises(ValueError):
+        jobs.run_tadarida_job(
+            TEST_DIR_WAVS, "survey", jobs_dir=tmp_path, frequency_band=2
+        )
+
+
+def test_get_job_path_rejects_invalid_ids(tmp_path):
+    """Test job ids can not point outside the jobs directory."""
+    assert jobs.get_job_path("survey", tmp_path) == tmp_path / "survey.db"
+
+    with pytest.raises(ValueError):
+        jobs.get_job_path("../survey", tmp_path)
+
+
+def test_remove_job(monkeypatch, tmp_path):
+    """Test the database of a job is deleted."""
+    monkeypatch.setattr(jobs, "iter_batch_results", FakeBatches())
+    detections, _ = jobs.run_tadarida_job(
+        TEST_DIR_WAVS, "survey", jobs_dir=tmp_path
+    )
+    detections.close()
+
+    jobs.remove_job("survey", tmp_path)
+
+    assert list(tmp_path.iterdir()) == []
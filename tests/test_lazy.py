@@ -0,0 +1,75 @@
+"""Tests for pytadarida.lazy"""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida.lazy import LazyDetections, run_tadarida_lazy
+from pytadarida.parsing import parse_detections
+from pytadarida.store import DetectionStore
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+@pytest.fixture
+def detections() -> pd.DataFrame:
+    """Detections of two files."""
+    return parse_detections(
+        {Path("a.wav"): TEST_FILE_VERSION1, Path("b.wav"): TEST_FILE_VERSION1}
+    )
+
+
+@pytest.fixture
+def lazy(tmp_path: Path, detections: pd.DataFrame) -> LazyDetections:
+    """Lazy detections of two files with detections and one without."""
+    files = [Path("a.wav"), Path("b.wav"), Path("empty.wav")]
+    store = DetectionStore(tmp_path / "spill.db")
+    store.add_batch(detections, files)
+    return LazyDetections(store, files, delete=True)
+
+
+def test_get_reads_a_single_file(lazy, detections):
+    """Test per file access returns only the rows of that file."""
+    with lazy:
+        rows = lazy.get("a.wav", columns=["wav", "StTime"])
+
+    expected = detections[detections["wav"] == Path("a.wav")]
+    assert list(rows.columns) == ["wav", "StTime"]
+    assert list(rows["StTime"]) == list(expected["StTime"])
+    assert set(rows["wav"]) == {Path("a.wav")}
+
+
+def test_get_raises_for_unknown_files(lazy):
+    """Test files that were not processed raise a KeyError."""
+    with lazy, pytest.raises(KeyError):
+        lazy["other.wav"]
+
+
+def test_iter_files_filters_detections(lazy, detections):
+    """Test iteration skips files without matching detections."""
+    with lazy:
+        files = [wav for wav, _ in lazy.iter_files(start=10)]
+        empty = list(lazy.iter_files(start=detections["StTime"].max() + 1))
+
+    assert files == [Path("a.wav"), Path("b.wav")]
+    assert not empty
+
+
+def test_close_deletes_temporary_database(tmp_path: Path, lazy, detections):
+    """Test the spill database is removed once closed."""
+    with lazy:
+        assert len(lazy.to_dataframe()) == len(detections)
+
+    assert not (tmp_path / "spill.db").exists()
+
+
+def test_run_tadarida_lazy_works_on_wav_file():
+    """Test run_tadarida_lazy gives access to the detections of a file."""
+    detections, _ = run_tadarida_lazy(TEST_WAV)
+
+    with detections:
+        assert TEST_WAV in detections
+        assert isinstance(detections[TEST_WAV], pd.DataFrame)
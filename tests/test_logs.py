@@ -166,3 +166,42 @@ def test_get_run_status_returns_run_status():
     assert not os.path.exists("log/tadaridaD.log")
     assert not os.path.exists("log/detec.log")
     assert not os.path.exists("log/error.log")
+
+
+def test_merge_run_status():
+    """Test merge_run_status combines the logs and resource usage."""
+    merged = logs.merge_run_status(
+        [
+            logs.RunStatus(
+                "a\n",
+                "",
+                "x\n",
+                peak_rss=10,
+                cpu_time=1.0,
+                skipped=[Path("quiet.wav")],
+                timings={"run": 1.0, "parse": 0.5},
+                files=2,
+                detections=5,
+            ),
+            logs.RunStatus(
+                "b\n",
+                "error\n",
+                "",
+                peak_rss=30,
+                cpu_time=2.0,
+                timings={"run": 2.0},
+                files=1,
+                detections=1,
+            ),
+        ]
+    )
+
+    assert merged.stdout == "a\nb\n"
+    assert merged.error == "error\n"
+    assert merged.detect == "x\n"
+    assert merged.peak_rss == 30
+    assert merged.cpu_time == 3.0
+    assert merged.skipped == [Path("quiet.wav")]
+    assert merged.timings == {"run": 3.0, "parse": 0.5}
+    assert merged.files == 3
+    assert merged.detections == 6
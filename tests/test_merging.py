@@ -0,0 +1,113 @@
+"""Tests for pytadarida.merging"""
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytadarida import parallel
+from pytadarida.logs import RunStatus
+from pytadarida.merging import iter_merged, merge_sorted, sort_detections
+from pytadarida.parsing import parse_detections
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+@pytest.fixture
+def detections() -> pd.DataFrame:
+    """Random detections of many files."""
+    rng = np.random.default_rng(0)
+    size = 5000
+    wavs = np.array(
+        [Path(f"/recordings/{index:03d}.wav") for index in range(200)],
+        dtype=object,
+    )
+    return pd.DataFrame(
+        {
+            "CallNum": np.arange(size),
+            "StTime": rng.integers(0, 100, size).astype(float),
+            "wav": wavs[rng.integers(0, len(wavs), size)],
+        }
+    )
+
+
+def canonical(detections: pd.DataFrame) -> pd.DataFrame:
+    """Sort detections with pandas, as a reference."""
+    return (
+        detections.assign(name=detections["wav"].map(str))
+        .sort_values(["name", "StTime"], kind="stable")
+        .drop(columns="name")
+        .reset_index(drop=True)
+    )
+
+
+def test_sort_detections_is_stable(detections):
+    """Test detections are sorted by file and time, keeping ties in order."""
+    pd.testing.assert_frame_equal(
+        sort_detections(detections), canonical(detections)
+    )
+
+
+def test_merge_sorted_equals_global_sort(detections):
+    """Test merging sorted batches of disjoint files gives the sorted rows."""
+    batch = detections["wav"].map(lambda wav: int(wav.stem) % 7)
+    frames = [sort_detections(detections[batch == index]) for index in range(7)]
+
+    pd.testing.assert_frame_equal(
+        merge_sorted([pd.DataFrame(), *frames]), canonical(detections)
+    )
+
+
+def test_iter_merged_merges_files_split_across_batches(detections):
+    """Test rows of a file in several batches are merged by start time."""
+    frames = [
+        sort_detections(detections.iloc[:2000]),
+        sort_detections(detections.iloc[2000:]),
+    ]
+
+    chunks = list(iter_merged(frames, chunk_size=1000))
+
+    assert len(chunks) > 1
+    assert all(
+        not set(first["wav"]) & set(second["wav"])
+        for first, second in zip(chunks, chunks[1:])
+    )
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), canonical(detections)
+    )
+
+
+def test_merge_sorted_rejects_unsorted_batches(detections):
+    """Test batches must be sorted by file."""
+    with pytest.raises(ValueError):
+        merge_sorted([detections])
+
+
+def test_run_tadarida_parallel_ordered(monkeypatch, tmp_path):
+    """Test batches finishing in any order give the canonical order."""
+    wavs = [tmp_path / f"{name}.wav" for name in "dcba"]
+    for wav in wavs:
+        shutil.copy(TEST_WAV, wav)
+
+    def fake_run_batch(files, **_):
+        return parallel.BatchResult(
+            files=list(files),
+            detections=parse_detections(
+                {path: TEST_FILE_VERSION1 for path in files}
+            ),
+            status=RunStatus("", "", ""),
+            elapsed=0.0,
+        )
+
+    monkeypatch.setattr(parallel, "run_batch", fake_run_batch)
+
+    result, _ = parallel.run_tadarida_parallel(
+        wavs, processes=2, batch_size=1, ordered=True
+    )
+
+    pd.testing.assert_frame_equal(result, canonical(result))
+    assert list(result["wav"].unique()) == sorted(wavs)
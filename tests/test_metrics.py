@@ -0,0 +1,139 @@
+"""Tests for pytadarida.metrics"""
+import urllib.request
+import wave
+from pathlib import Path
+
+import pytest
+
+from pytadarida.commands import run_tadarida
+from pytadarida.logs import RunStatus
+from pytadarida.metrics import CONTENT_TYPE, Counter, Histogram, MetricsRegistry
+from pytadarida.runner import run_wav_files
+from pytadarida.screening import EnergyGate
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+
+
+def test_counter_exposition():
+    """Test counters are exposed with the _total suffix."""
+    counter = Counter("pytadarida_files", "Files.")
+    counter.inc()
+    counter.inc(2)
+
+    assert counter.expose() == [
+        "# HELP pytadarida_files Files.",
+        "# TYPE pytadarida_files counter",
+        "pytadarida_files_total 3",
+    ]
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test observations are counted in cumulative buckets."""
+    histogram = Histogram("latency", "Latency.", buckets=[1, 2])
+    for value in [0.5, 1, 1.5, 3]:
+        histogram.observe(value)
+
+    assert histogram.expose()[2:] == [
+        'latency_bucket{le="1.0"} 2',
+        'latency_bucket{le="2.0"} 3',
+        'latency_bucket{le="+Inf"} 4',
+        "latency_count 4",
+        "latency_sum 6.0",
+    ]
+
+
+def test_registry_observes_runs():
+    """Test the status of runs updates the counters and histograms."""
+    metrics = MetricsRegistry()
+    status = RunStatus(
+        "",
+        "",
+        "",
+        skipped=[Path("quiet.wav")],
+        timings={"run": 2.0, "parse": 0.1},
+        files=1,
+        detections=4,
+    )
+
+    metrics.observe(status, files=[TEST_WAV])
+    metrics.observe_failure([TEST_WAV, TEST_WAV])
+
+    assert metrics.runs.value == 1
+    assert metrics.files_processed.value == 1
+    assert metrics.files_skipped.value == 1
+    assert metrics.files_failed.value == 2
+    assert metrics.detections.value == 4
+    assert metrics.bytes_read.value == TEST_WAV.stat().st_size
+    assert metrics.binary_seconds.sum == 2.0
+
+
+def test_exposition_ends_with_eof():
+    """Test the exposition follows the OpenMetrics text format."""
+    text = MetricsRegistry().exposition()
+
+    assert text.endswith("# EOF\n")
+    assert "pytadarida_files_processed_total 0" in text
+    assert "pytadarida_binary_seconds_count 0" in text
+
+
+def test_write_textfile(tmp_path: Path):
+    """Test the metrics are written to a file."""
+    metrics = MetricsRegistry()
+    metrics.write_textfile(tmp_path / "pytadarida.prom")
+
+    assert (tmp_path / "pytadarida.prom").read_text() == metrics.exposition()
+    assert list(tmp_path.iterdir()) == [tmp_path / "pytadarida.prom"]
+
+
+def test_serve_metrics_over_http():
+    """Test the metrics can be scraped."""
+    metrics = MetricsRegistry()
+    metrics.runs.inc()
+    server = metrics.serve()
+
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as reply:
+            body = reply.read().decode("utf-8")
+            content_type = reply.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type == CONTENT_TYPE
+    assert "pytadarida_runs_total 1" in body
+
+
+def test_run_tadarida_updates_metrics(tmp_path: Path):
+    """Test skipped and failed files of run_tadarida are counted."""
+    with wave.open(str(tmp_path / "silence.wav"), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(250_000)
+        wav.writeframes(bytes(2 * 250_000))
+
+    metrics = MetricsRegistry()
+    run_tadarida([tmp_path], gate=EnergyGate(), metrics=metrics)
+
+    with pytest.raises(FileNotFoundError):
+        run_tadarida(tmp_path / "missing.wav", metrics=metrics)
+
+    assert metrics.files_skipped.value == 1
+    assert metrics.files_failed.value == 1
+    assert metrics.runs.value == 0
+
+
+def test_failed_run_counts_files_given_as_iterator(tmp_path: Path):
+    """Test failed files are counted when the inputs can be read once."""
+    metrics = MetricsRegistry()
+    missing = [tmp_path / "first.wav", tmp_path / "second.wav"]
+
+    with pytest.raises(FileNotFoundError):
+        run_wav_files((path for path in missing), metrics=metrics)
+
+    assert metrics.files_failed.value == 2
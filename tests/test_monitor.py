@@ -0,0 +1,40 @@
+"""Test the pytadarida monitor module."""
+import os
+import subprocess
+import sys
+
+from pytadarida.monitor import ProcessMonitor, read_process_usage
+
+ALLOCATE_MEMORY = (
+    "import time; data = bytearray(64 * 1024 ** 2); "
+    "sum(range(10 ** 6)); time.sleep(0.5)"
+)
+
+
+def test_read_process_usage_of_current_process():
+    """Test the memory and CPU time of the current process are read."""
+    usage = read_process_usage(os.getpid())
+
+    assert usage is not None
+    rss, cpu_time = usage
+    assert rss > 0
+    assert cpu_time > 0
+
+
+def test_read_process_usage_returns_none_for_missing_process():
+    """Test None is returned if the process does not exist."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+
+    assert read_process_usage(process.pid) is None
+
+
+def test_process_monitor_records_peak_memory():
+    """Test the monitor records the peak memory of a child process."""
+    with subprocess.Popen([sys.executable, "-c", ALLOCATE_MEMORY]) as process:
+        with ProcessMonitor(process.pid, interval=0.05) as monitor:
+            process.wait()
+
+    assert monitor.usage.peak_rss >= 64 * 1024**2
+    assert monitor.usage.cpu_time > 0
+    assert monitor.usage.rss == 0
@@ -0,0 +1,134 @@
+"""Tests for pytadarida.normalize"""
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida import parallel
+from pytadarida.commands import run_tadarida
+from pytadarida.logs import RunStatus
+from pytadarida.normalize import (
+    PREFIX_SIZE,
+    find_identical_files,
+    normalize_inputs,
+)
+from pytadarida.parsing import parse_detections
+from pytadarida.screening import EnergyGate
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+@pytest.fixture
+def wav_dir(tmp_path: Path) -> Path:
+    """A directory with a recording and a copy, and links to both."""
+    directory = tmp_path / "wavs"
+    directory.mkdir()
+    shutil.copy(TEST_WAV, directory / "a.wav")
+    shutil.copy(TEST_WAV, directory / "copy.wav")
+    (tmp_path / "link.wav").symlink_to(directory / "a.wav")
+    (tmp_path / "linked_dir").symlink_to(directory)
+    return directory
+
+
+def test_normalize_inputs_merges_overlapping_paths(wav_dir: Path):
+    """Test a file given in a directory, directly and through links."""
+    link = wav_dir.parent / "link.wav"
+    linked_dir = wav_dir.parent / "linked_dir"
+    inputs = normalize_inputs([wav_dir, wav_dir / "a.wav", link, linked_dir])
+
+    assert inputs.files == [wav_dir / "a.wav", wav_dir / "copy.wav"]
+    assert inputs.aliases[wav_dir / "a.wav"] == [
+        wav_dir / "a.wav",
+        link,
+        linked_dir / "a.wav",
+    ]
+    assert inputs.aliases[wav_dir / "copy.wav"] == [
+        wav_dir / "copy.wav",
+        linked_dir / "copy.wav",
+    ]
+
+
+def test_normalize_inputs_merges_identical_contents(wav_dir: Path):
+    """Test byte-identical copies are only merged in content mode."""
+    assert len(normalize_inputs(wav_dir).files) == 2
+
+    inputs = normalize_inputs(wav_dir, mode="content")
+
+    assert inputs.files == [wav_dir / "a.wav"]
+    assert inputs.aliases[wav_dir / "a.wav"] == [
+        wav_dir / "a.wav",
+        wav_dir / "copy.wav",
+    ]
+
+
+def test_find_identical_files_compares_whole_files(tmp_path: Path):
+    """Test files with the same size and first bytes can still differ."""
+    contents = bytes(PREFIX_SIZE + 10)
+    for name, tail in [("a", b"a"), ("b", b"b"), ("c", b"a")]:
+        (tmp_path / f"{name}.wav").write_bytes(contents + tail)
+
+    groups = find_identical_files(sorted(tmp_path.iterdir()), workers=2)
+
+    assert groups == [[tmp_path / "a.wav", tmp_path / "c.wav"]]
+
+
+def test_fan_out_copies_detections_to_aliases(wav_dir: Path):
+    """Test each alias gets the detections of its recording."""
+    inputs = normalize_inputs(wav_dir, mode="content")
+    detections = parse_detections({wav_dir / "a.wav": TEST_FILE_VERSION1})
+
+    result = inputs.fan_out(detections)
+
+    assert len(result) == 2 * len(detections)
+    assert list(result["wav"].unique()) == [
+        wav_dir / "a.wav",
+        wav_dir / "copy.wav",
+    ]
+    assert set(result["Filename"]) == {"a.wav", "copy.wav"}
+
+
+def test_run_tadarida_fans_out_skipped_files(wav_dir: Path):
+    """Test skipped recordings are reported under all their paths."""
+    detections, status = run_tadarida(
+        [wav_dir / "a.wav", wav_dir.parent / "link.wav"],
+        gate=EnergyGate(min_level=100),
+    )
+
+    assert detections.empty
+    assert status.skipped == [wav_dir / "a.wav", wav_dir.parent / "link.wav"]
+
+
+def test_iter_batch_results_processes_duplicates_once(monkeypatch, wav_dir):
+    """Test duplicated recordings are processed once and fanned out."""
+    processed = []
+
+    def fake_run_batch(files, **_):
+        processed.extend(files)
+        return parallel.BatchResult(
+            files=list(files),
+            detections=parse_detections(
+                {path: TEST_FILE_VERSION1 for path in files}
+            ),
+            status=RunStatus("", "", ""),
+            elapsed=0.0,
+        )
+
+    monkeypatch.setattr(parallel, "run_batch", fake_run_batch)
+
+    detections, _ = parallel.run_tadarida_parallel(
+        [wav_dir, wav_dir.parent / "link.wav"],
+        processes=1,
+        deduplicate="content",
+    )
+
+    assert processed == [wav_dir / "a.wav"]
+    assert isinstance(detections, pd.DataFrame)
+    assert set(detections["wav"]) == {
+        wav_dir / "a.wav",
+        wav_dir / "copy.wav",
+        wav_dir.parent / "link.wav",
+    }
@@ -288,6 +288,58 @@ def test_clean_output_does_not_delete_txt_dir_if_not_empty(
         assert file.parent.exists()
 
 
+def test_clean_output_files_reuses_given_outputs(tmp_path: Path) -> None:
+    """Test clean_output_files does not search for outputs if given."""
+    wav_file = tmp_path / "file1.wav"
+    ta_file = tmp_path / "txt" / "file1.ta"
+    ta_file.parent.mkdir()
+    ta_file.touch()
+
+    # The wav file does not exist, so searching for outputs would fail.
+    output.clean_output_files([wav_file], outputs={wav_file: ta_file})
+
+    assert not ta_file.parent.exists()
+
+
+def test_remove_output_files_in_parallel(tmp_path: Path) -> None:
+    """Test remove_output_files cleans many directories with workers."""
+    ta_files = []
+    for index in range(5):
+        directory = tmp_path / f"dir{index}" / "txt"
+        directory.mkdir(parents=True)
+        for name in ["file1.ta", "file2.ta"]:
+            (directory / name).touch()
+            ta_files.append(directory / name)
+
+    # One directory has a file that must be kept.
+    keep = tmp_path / "dir0" / "txt" / "notes.txt"
+    keep.touch()
+
+    output.remove_output_files(ta_files, workers=3)
+
+    assert not any(ta_file.exists() for ta_file in ta_files)
+    assert keep.exists()
+    assert not (tmp_path / "dir1" / "txt").exists()
+
+
+def test_stage_files_keeps_names(tmp_path: Path) -> None:
+    """Test files with the same name are staged in different directories."""
+    files = []
+    for name in ["a", "b"]:
+        (tmp_path / name).mkdir()
+        files.append(tmp_path / name / "file.wav")
+        files[-1].touch()
+
+    staged = output.stage_files(files, tmp_path / "staged")
+
+    assert list(staged.values()) == files
+    assert {path.name for path in staged} == {"file.wav"}
+    assert len({path.parent for path in staged}) == 2
+    assert output.expand_wav_files(
+        sorted({path.parent for path in staged})
+    ) == list(staged)
+
+
 def test_parse_ta_file_has_correct_output(tmp_path: Path) -> None:
     """Test parse_ta_file has correct output."""
     # Create input file
@@ -0,0 +1,124 @@
+"""Tests for pytadarida.parallel"""
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from pytadarida import parallel
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import (
+    BatchResult,
+    SweepConfig,
+    make_batches,
+    run_tadarida_parallel,
+    run_tadarida_sweep,
+)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_DIR_WAVS = DATA_DIR / "dir_of_wavs"
+
+
+def test_make_batches_without_batch_size_creates_one_batch_per_process():
+    """Test files are split into one batch per process."""
+    costs = {Path(f"file{index}.wav"): index for index in range(6)}
+
+    batches = make_batches(costs, processes=3)
+
+    assert len(batches) == 3
+
+
+def test_make_batches_starts_with_most_expensive_files():
+    """Test batches are sorted from the most to the least expensive."""
+    costs = {Path(f"file{index}.wav"): index for index in range(5)}
+
+    batches = make_batches(costs, processes=2, batch_size=2)
+
+    assert batches == [
+        [Path("file4.wav"), Path("file3.wav")],
+        [Path("file2.wav"), Path("file1.wav")],
+        [Path("file0.wav")],
+    ]
+
+
+def test_run_tadarida_parallel_works_on_dir_of_wavs():
+    """Test run_tadarida_parallel processes every file of a directory."""
+    detections, status = run_tadarida_parallel(
+        [TEST_DIR_WAVS, TEST_WAV],
+        processes=2,
+    )
+
+    assert isinstance(detections, pd.DataFrame)
+    assert isinstance(status, RunStatus)
+    assert set(detections["wav"]) <= {
+        TEST_WAV,
+        *TEST_DIR_WAVS.glob("*.wav"),
+    }
+
+
+def test_run_tadarida_parallel_leaves_no_output_next_to_wavs():
+    """Test no txt directories are created next to the input files."""
+    run_tadarida_parallel(TEST_DIR_WAVS, processes=2, batch_size=1)
+
+    assert not (TEST_DIR_WAVS / "txt").exists()
+    assert not Path("log").exists()
+
+
+def test_run_tadarida_sweep_runs_every_config_on_every_file(monkeypatch):
+    """Test sweep results are keyed by config and batches never overlap."""
+    lock = threading.Lock()
+    active = set()
+    overlaps = []
+
+    def fake_run_staged(staged, workdir=None, **params):
+        batch = next(iter(staged)).parent.parent
+        with lock:
+            if batch in active:
+                overlaps.append(batch)
+            active.add(batch)
+
+        time.sleep(0.01)
+
+        with lock:
+            active.remove(batch)
+
+        detections = pd.DataFrame(
+            {
+                "features": [params["features"]] * len(staged),
+                "wav": list(staged.values()),
+            }
+        )
+        return BatchResult(
+            files=list(staged.values()),
+            detections=detections,
+            status=RunStatus("", "", ""),
+            elapsed=0.0,
+        )
+
+    monkeypatch.setattr(parallel, "_run_staged", fake_run_staged)
+
+    configs = [SweepConfig(features=1), SweepConfig(features=2)]
+    sweep = run_tadarida_sweep(
+        TEST_DIR_WAVS,
+        configs,
+        processes=4,
+        batch_size=1,
+    )
+
+    assert not overlaps
+    assert set(sweep) == set(configs)
+    for config, (detections, _) in sweep.items():
+        assert set(detections["features"]) == {config.features}
+        assert set(detections["wav"]) == set(TEST_DIR_WAVS.glob("*.wav"))
+
+
+def test_run_tadarida_sweep_works_on_dir_of_wavs():
+    """Test run_tadarida_sweep runs Tadarida-D with every config."""
+    configs = [SweepConfig(features=1), SweepConfig(features=2)]
+
+    sweep = run_tadarida_sweep(TEST_DIR_WAVS, configs, processes=2)
+
+    assert set(sweep) == set(configs)
+    assert not (TEST_DIR_WAVS / "txt").exists()
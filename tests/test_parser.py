@@ -4,7 +4,7 @@ import os
 import pandas as pd
 import pytest
 
-from pytadarida.parsing import parse_ta_file
+from pytadarida.parsing import parse_detections, parse_ta_file
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -486,6 +486,32 @@ def test_parse_ta_file_version_2():
     assert list(dataframe.columns) == VERSION2_COLUMNS
 
 
+def test_parse_ta_file_with_columns():
+    """Test only the requested and key columns are parsed."""
+    dataframe = parse_ta_file(TEST_FILE_VERSION1, columns=["Fmax", "StTime"])
+    expected = parse_ta_file(TEST_FILE_VERSION1)
+
+    # Columns keep the order of the file
+    assert list(dataframe.columns) == ["Filename", "CallNum", "StTime", "Fmax"]
+    pd.testing.assert_frame_equal(dataframe, expected[dataframe.columns])
+
+
+def test_parse_ta_file_raises_with_missing_columns():
+    """Test a ValueError is raised if a requested column is missing."""
+    with pytest.raises(ValueError):
+        parse_ta_file(TEST_FILE_VERSION1, columns=["NotAColumn"])
+
+
+def test_parse_detections_with_columns():
+    """Test column projection keeps the wav column."""
+    dataframe = parse_detections(
+        {"file.wav": TEST_FILE_VERSION2},
+        columns=["Fmin"],
+    )
+
+    assert list(dataframe.columns) == ["Filename", "CallNum", "Fmin", "wav"]
+
+
 def test_parse_ta_file_raises_if_file_not_found():
     """Test that a FileNotFoundError is raised if the file is not found."""
     with pytest.raises(FileNotFoundError):
@@ -0,0 +1,92 @@
+"""Test the pytadarida priority module."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pytadarida.priority import (
+    ProcessPriority,
+    assign_cpus,
+    get_numa_nodes,
+    parse_cpu_list,
+)
+
+PRINT_SCHEDULING = (
+    "import os, sys; sys.stdin.read(); "
+    "print(sorted(os.sched_getaffinity(0)), os.nice(0))"
+)
+
+
+def _run_with_priority(priority: ProcessPriority) -> str:
+    with subprocess.Popen(
+        [sys.executable, "-c", PRINT_SCHEDULING],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    ) as process:
+        priority.apply(process.pid)
+        stdout, _ = process.communicate()
+
+    assert process.returncode == 0
+    return stdout.decode("utf-8").strip()
+
+
+def test_parse_cpu_list():
+    """Test parsing of Linux CPU lists."""
+    assert parse_cpu_list("0-3,8,10-11\n") == {0, 1, 2, 3, 8, 10, 11}
+    assert parse_cpu_list("5") == {5}
+
+
+def test_get_numa_nodes_covers_available_cpus():
+    """Test NUMA nodes only contain CPUs available to the process."""
+    nodes = get_numa_nodes()
+
+    assert nodes
+    for cpus in nodes:
+        assert cpus <= os.sched_getaffinity(0)
+
+
+def test_assign_cpus_returns_one_set_per_process():
+    """Test every process gets a non-empty set of available CPUs."""
+    available = os.sched_getaffinity(0)
+    assignment = assign_cpus(3)
+
+    assert len(assignment) == 3
+    for cpus in assignment:
+        assert cpus
+        assert cpus <= available
+
+
+def test_assign_cpus_does_not_share_cpus_when_enough_are_available():
+    """Test processes get disjoint CPU sets if there are enough CPUs."""
+    num_processes = len(os.sched_getaffinity(0))
+    assignment = assign_cpus(num_processes)
+
+    assert len(set.union(*assignment)) == num_processes
+
+
+def test_process_priority_sets_affinity_and_niceness():
+    """Test the options are applied to the child process."""
+    cpu = min(os.sched_getaffinity(0))
+    current_nice = os.nice(0)
+
+    output = _run_with_priority(ProcessPriority(cpus={cpu}, nice=5))
+
+    assert output == f"[{cpu}] {min(current_nice + 5, 19)}"
+
+
+def test_process_priority_sets_idle_io_class():
+    """Test the idle I/O class can be set without privileges."""
+    _run_with_priority(ProcessPriority(ionice_class=3))
+
+
+def test_process_priority_rejects_invalid_options():
+    """Test invalid options raise a ValueError."""
+    with pytest.raises(ValueError):
+        ProcessPriority(cpus=set())
+
+    with pytest.raises(ValueError):
+        ProcessPriority(ionice_class=4)
+
+    with pytest.raises(ValueError):
+        ProcessPriority(ionice_level=8)
@@ -0,0 +1,88 @@
+"""Tests for pytadarida.profiling"""
+import wave
+from pathlib import Path
+
+import pytest
+
+from pytadarida.commands import run_tadarida
+from pytadarida.profiling import PhaseCallback, ProfileHook, timed_phase
+from pytadarida.screening import EnergyGate
+
+
+def write_silence(path: Path) -> Path:
+    """Write a silent .wav file."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(250_000)
+        wav.writeframes(bytes(2 * 250_000))
+    return path
+
+
+def test_timed_phase_adds_up_durations():
+    """Test durations of the same phase are added up."""
+    timings = {}
+
+    with timed_phase("parse", timings):
+        pass
+    first = timings["parse"]
+    with timed_phase("parse", timings):
+        pass
+
+    assert timings["parse"] >= first >= 0
+
+
+def test_timed_phase_records_failed_phases():
+    """Test the duration of a failed phase is still recorded."""
+    calls = []
+    timings = {}
+
+    with pytest.raises(RuntimeError):
+        with timed_phase(
+            "run", timings, PhaseCallback(lambda *args: calls.append(args))
+        ):
+            raise RuntimeError
+
+    assert "run" in timings
+    assert [phase for phase, _ in calls] == ["run"]
+
+
+def test_profile_hook_profiles_selected_phases():
+    """Test only the selected phases are profiled."""
+    hook = ProfileHook(phases=["parse"])
+
+    with hook("parse"):
+        sorted(range(1000))
+    with hook("run"):
+        pass
+
+    assert list(hook.profiles) == ["parse"]
+    assert hook.stats().total_calls > 0
+
+
+def test_run_tadarida_calls_hook_for_each_phase(tmp_path: Path):
+    """Test the hook wraps the phases of a run."""
+    write_silence(tmp_path / "silence.wav")
+    calls = []
+
+    _, status = run_tadarida(
+        [tmp_path],
+        gate=EnergyGate(),
+        hook=PhaseCallback(lambda phase, _: calls.append(phase)),
+    )
+
+    assert calls == ["validate", "normalize", "screen"]
+    assert set(status.timings) == {"normalize", "validate", "screen"}
+
+
+def test_run_tadarida_validates_before_normalizing(tmp_path: Path):
+    """Test a missing path fails in the validate phase."""
+    calls = []
+
+    with pytest.raises(FileNotFoundError, match="does not exist"):
+        run_tadarida(
+            [tmp_path / "missing.wav"],
+            hook=PhaseCallback(lambda phase, _: calls.append(phase)),
+        )
+
+    assert calls == ["validate"]
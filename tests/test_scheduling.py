@@ -0,0 +1,106 @@
+"""Test the pytadarida scheduling module."""
+import wave
+from pathlib import Path
+
+import pytest
+
+from pytadarida import scheduling
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+TEST_TA = DATA_DIR / "ta_file_version_1.ta"
+TEST_DIR_WAVS = DATA_DIR / "dir_of_wavs"
+
+
+def test_get_wav_duration_matches_wave_module():
+    """Test get_wav_duration reads the duration from the header."""
+    with wave.open(str(TEST_WAV)) as wav:
+        expected = wav.getnframes() / wav.getframerate()
+
+    assert scheduling.get_wav_duration(TEST_WAV) == pytest.approx(expected)
+
+
+def test_get_wav_duration_fails_on_non_wav_file():
+    """Test get_wav_duration raises on a file that is not a .wav."""
+    with pytest.raises(ValueError):
+        scheduling.get_wav_duration(TEST_TA)
+
+
+def test_estimate_costs_uses_recording_durations():
+    """Test longer recordings have larger estimated costs."""
+    wavs = sorted(TEST_DIR_WAVS.glob("*.wav"))
+    costs = scheduling.estimate_costs(wavs)
+
+    for wav in wavs:
+        assert costs[wav] == pytest.approx(scheduling.get_wav_duration(wav))
+
+
+def test_estimate_costs_prefers_past_timings(tmp_path: Path):
+    """Test timings from the history take precedence over durations."""
+    history = scheduling.TimingHistory(tmp_path / "history.json")
+    history.record(TEST_WAV, 10.0, 0.2)
+
+    costs = scheduling.estimate_costs([TEST_WAV], history)
+
+    assert costs[TEST_WAV] == 10.0
+
+
+def test_estimate_costs_scales_durations_with_history_rate(tmp_path: Path):
+    """Test durations of new files are scaled by the observed rate."""
+    history = scheduling.TimingHistory()
+    history.record(tmp_path / "other.wav", 4.0, 2.0)
+
+    costs = scheduling.estimate_costs([TEST_WAV], history)
+
+    assert costs[TEST_WAV] == pytest.approx(
+        2 * scheduling.get_wav_duration(TEST_WAV)
+    )
+
+
+def test_estimate_costs_gives_average_cost_to_unreadable_files(
+    tmp_path: Path,
+):
+    """Test files without a valid header get the average cost."""
+    broken = tmp_path / "broken.wav"
+    broken.touch()
+
+    costs = scheduling.estimate_costs([TEST_WAV, broken])
+
+    assert costs[broken] == costs[TEST_WAV]
+
+
+def test_timing_history_is_saved_and_loaded(tmp_path: Path):
+    """Test timings are persisted to the history file."""
+    history = scheduling.TimingHistory(tmp_path / "history.json")
+    history.record(TEST_WAV, 3.0, 1.5)
+    history.save()
+
+    loaded = scheduling.TimingHistory(tmp_path / "history.json")
+
+    assert loaded.get(TEST_WAV) == 3.0
+    assert loaded.seconds_per_second == 2.0
+
+
+def test_lpt_schedule_balances_load():
+    """Test LPT scheduling balances the total cost of each shard."""
+    costs = {
+        Path(f"file{index}.wav"): cost
+        for index, cost in enumerate([1, 1, 1, 1, 1, 10, 1, 1, 1, 1, 1])
+    }
+
+    shards = scheduling.lpt_schedule(costs, 2)
+
+    loads = sorted(sum(costs[path] for path in shard) for shard in shards)
+    assert loads == [10, 10]
+    assert sorted(path for shard in shards for path in shard) == sorted(costs)
+
+
+def test_lpt_schedule_omits_empty_shards():
+    """Test no empty shards are returned when there are few files."""
+    costs = {Path("file1.wav"): 1.0, Path("file2.wav"): 2.0}
+
+    assert scheduling.lpt_schedule(costs, 4) == [
+        [Path("file2.wav")],
+        [Path("file1.wav")],
+    ]
@@ -0,0 +1,113 @@
+"""Tests for pytadarida.screening"""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from pytadarida.commands import run_tadarida
+from pytadarida.parallel import run_tadarida_parallel
+from pytadarida.screening import EnergyGate, apply_gate, screen_file
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_WAV = DATA_DIR / "Barbastella_barbastellus_1_s.wav"
+
+
+def write_wav(path: Path, samples: np.ndarray, sample_rate: int) -> Path:
+    """Write float samples in [-1, 1] as a 16 bit .wav file."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return path
+
+
+def make_noise(sample_rate: int, seconds: float = 1.0) -> np.ndarray:
+    """Make quiet white noise."""
+    rng = np.random.default_rng(0)
+    return rng.normal(scale=0.001, size=int(sample_rate * seconds))
+
+
+def add_call(samples: np.ndarray, sample_rate: int, frequency: float):
+    """Add a short loud tone with a smooth envelope in the middle."""
+    start = len(samples) // 2
+    times = np.arange(int(sample_rate * 0.005)) / sample_rate
+    envelope = 0.5 * np.hanning(len(times))
+    samples[start : start + len(times)] += envelope * np.sin(
+        2 * np.pi * frequency * times
+    )
+    return samples
+
+
+def test_screen_file_keeps_recording_with_a_call():
+    """Test a real bat recording passes the gate."""
+    result = screen_file(TEST_WAV, EnergyGate())
+
+    assert result.passed
+    assert result.contrast is not None and result.contrast > 6
+
+
+def test_screen_file_skips_silence_and_noise(tmp_path: Path):
+    """Test silent and noise-only recordings do not pass the gate."""
+    silence = write_wav(tmp_path / "silence.wav", np.zeros(250_000), 250_000)
+    noise = write_wav(tmp_path / "noise.wav", make_noise(250_000), 250_000)
+
+    assert not screen_file(silence, EnergyGate()).passed
+    assert not screen_file(noise, EnergyGate()).passed
+
+
+def test_screen_file_uses_time_expansion(tmp_path: Path):
+    """Test the band is checked on the frequencies before expansion."""
+    # A 4 kHz tone in a 10x expanded recording was a 40 kHz call.
+    samples = add_call(make_noise(25_000), 25_000, 4_000)
+    path = write_wav(tmp_path / "expanded.wav", samples, 25_000)
+
+    assert screen_file(path, EnergyGate(), time_expansion=10).passed
+    assert not screen_file(path, EnergyGate(), time_expansion=1).passed
+
+
+def test_screen_file_keeps_unreadable_files(tmp_path: Path):
+    """Test files the gate can not read are left to Tadarida-D."""
+    path = tmp_path / "broken.wav"
+    path.write_bytes(b"not a wav file")
+
+    assert screen_file(path, EnergyGate()).passed
+
+
+def test_apply_gate_splits_files(tmp_path: Path):
+    """Test files are split into kept and skipped in order."""
+    call = add_call(make_noise(250_000), 250_000, 40_000)
+    files = [
+        write_wav(tmp_path / "noise.wav", make_noise(250_000), 250_000),
+        write_wav(tmp_path / "call.wav", call, 250_000),
+    ]
+
+    kept, skipped = apply_gate(files, EnergyGate(), workers=2)
+
+    assert kept == [files[1]]
+    assert skipped == [files[0]]
+
+
+def test_run_tadarida_reports_skipped_files(tmp_path: Path):
+    """Test no run is needed when every file is skipped."""
+    noise = write_wav(tmp_path / "noise.wav", make_noise(250_000), 250_000)
+
+    detections, status = run_tadarida([tmp_path], gate=EnergyGate())
+
+    assert detections.empty
+    assert status.skipped == [noise]
+
+
+def test_run_tadarida_parallel_reports_skipped_files(tmp_path: Path):
+    """Test skipped files are gathered in the status of parallel runs."""
+    noise = write_wav(tmp_path / "noise.wav", make_noise(250_000), 250_000)
+
+    detections, status = run_tadarida_parallel(
+        [noise],
+        processes=2,
+        gate=EnergyGate(),
+    )
+
+    assert detections.empty
+    assert status.skipped == [noise]
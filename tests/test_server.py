@@ -0,0 +1,264 @@
+"""Test the pytadarida job server.
+
+The server runs batches through a runner function. These tests use a runner
+that returns the detections of a test .ta file for every file in the batch,
+so the server can be tested without the Tadarida-D binary.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+import pytest
+
+from pytadarida.configs import MEMORY_PER_THREAD
+from pytadarida.logs import RunStatus
+from pytadarida.parsing import parse_ta_file
+from pytadarida.server import TadaridaServer, submit
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_TA = DATA_DIR / "ta_file_version_1.ta"
+
+
+class FakeRunner:
+    """Runner that records its calls and optionally blocks."""
+
+    def __init__(self, peak_rss: int = 0):
+        self.peak_rss = peak_rss
+        self.calls: List[List[Path]] = []
+        self.release = threading.Event()
+        self.release.set()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, files, workdir=None, **kwargs):
+        with self.lock:
+            self.calls.append(list(files))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        self.release.wait()
+        time.sleep(0.01)
+
+        template = parse_ta_file(TEST_TA)
+        dfs = []
+        for path in files:
+            detections = template.copy()
+            detections["wav"] = Path(path)
+            dfs.append(detections)
+
+        with self.lock:
+            self.running -= 1
+
+        return pd.concat(dfs, ignore_index=True), RunStatus(
+            "", "", "", peak_rss=self.peak_rss
+        )
+
+
+def _make_wavs(path: Path, num_files: int, prefix: str = "file"):
+    wavs = [path / f"{prefix}{index}.wav" for index in range(num_files)]
+    for wav in wavs:
+        wav.touch()
+    return wavs
+
+
+def _start_server(socket_path: Path, runner: FakeRunner, **kwargs):
+    server = TadaridaServer(socket_path, runner=runner, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop_server(server: TadaridaServer):
+    server.shutdown()
+    server.server_close()
+
+
+def test_submit_streams_detections_for_all_files(tmp_path: Path):
+    """Test submit returns the detections of every submitted file."""
+    wavs = _make_wavs(tmp_path, 3)
+    runner = FakeRunner()
+    server = _start_server(tmp_path / "server.sock", runner, batch_size=2)
+
+    try:
+        results = list(submit(wavs, socket_path=tmp_path / "server.sock"))
+    finally:
+        _stop_server(server)
+
+    assert len(results) == 2
+    detections = pd.concat([result for result, _ in results])
+    assert sorted(set(detections["wav"])) == sorted(str(wav) for wav in wavs)
+    assert len(detections) == 9
+    assert all(isinstance(status, RunStatus) for _, status in results)
+
+
+def test_server_merges_requests_from_several_clients(tmp_path: Path):
+    """Test files from different clients are processed in a single batch."""
+    socket_path = tmp_path / "server.sock"
+    first = _make_wavs(tmp_path, 1, prefix="first")
+    second = _make_wavs(tmp_path, 2, prefix="second")
+    third = _make_wavs(tmp_path, 2, prefix="third")
+
+    runner = FakeRunner()
+    runner.release.clear()
+    server = _start_server(socket_path, runner, batch_wait=0.05)
+
+    results = {}
+
+    def client(name, files):
+        results[name] = list(submit(files, socket_path=socket_path))
+
+    threads = [threading.Thread(target=client, args=("first", first))]
+    threads[0].start()
+
+    # Wait until the first batch is blocked in the runner
+    while not runner.calls:
+        time.sleep(0.01)
+
+    for name, files in [("second", second), ("third", third)]:
+        thread = threading.Thread(target=client, args=(name, files))
+        thread.start()
+        threads.append(thread)
+
+    time.sleep(0.2)
+    runner.release.set()
+
+    for thread in threads:
+        thread.join(timeout=5)
+
+    _stop_server(server)
+
+    assert len(runner.calls) == 2
+    assert sorted(runner.calls[1]) == sorted(second + third)
+    assert len(pd.concat([df for df, _ in results["second"]])) == 6
+    assert len(pd.concat([df for df, _ in results["third"]])) == 6
+
+
+def test_server_limits_concurrent_processes(tmp_path: Path):
+    """Test the server does not run more than max_processes batches."""
+    socket_path = tmp_path / "server.sock"
+    wavs = _make_wavs(tmp_path, 8)
+    runner = FakeRunner()
+    server = _start_server(
+        socket_path,
+        runner,
+        max_processes=2,
+        batch_size=1,
+        batch_wait=0,
+    )
+
+    try:
+        results = list(submit(wavs, socket_path=socket_path))
+    finally:
+        _stop_server(server)
+
+    assert len(results) == 8
+    assert runner.max_running <= 2
+
+
+def test_server_alternates_between_parameters(tmp_path: Path):
+    """Test a large job does not hold back jobs with other parameters."""
+    socket_path = tmp_path / "server.sock"
+    large = _make_wavs(tmp_path, 4, prefix="large")
+    small = _make_wavs(tmp_path, 1, prefix="small")
+    runner = FakeRunner()
+    runner.release.clear()
+    server = _start_server(socket_path, runner, batch_size=1, batch_wait=0)
+
+    def client(files, threads):
+        list(submit(files, socket_path=socket_path, threads=threads))
+
+    clients = [threading.Thread(target=client, args=(large, 1))]
+    clients[0].start()
+
+    # Wait until the first batch of the large job is blocked in the runner
+    while not runner.calls:
+        time.sleep(0.01)
+
+    clients.append(threading.Thread(target=client, args=(small, 2)))
+    clients[1].start()
+
+    time.sleep(0.2)
+    runner.release.set()
+
+    for thread in clients:
+        thread.join(timeout=5)
+
+    _stop_server(server)
+
+    assert len(runner.calls) == 5
+    assert small in runner.calls[:3]
+
+
+def test_server_limits_memory_budget(tmp_path: Path):
+    """Test batches exceeding the memory budget do not run concurrently."""
+    socket_path = tmp_path / "server.sock"
+    wavs = _make_wavs(tmp_path, 4)
+    runner = FakeRunner()
+    server = _start_server(
+        socket_path,
+        runner,
+        max_processes=4,
+        memory_budget=1,
+        batch_size=1,
+        batch_wait=0,
+    )
+
+    try:
+        list(submit(wavs, socket_path=socket_path))
+    finally:
+        _stop_server(server)
+
+    assert len(runner.calls) == 4
+    assert runner.max_running == 1
+
+
+def test_server_budgets_measured_memory(tmp_path: Path):
+    """Test the memory budget uses the peak memory of finished batches."""
+    socket_path = tmp_path / "server.sock"
+    wavs = _make_wavs(tmp_path, 5)
+    runner = FakeRunner(peak_rss=2 * MEMORY_PER_THREAD)
+    server = _start_server(
+        socket_path,
+        runner,
+        max_processes=4,
+        memory_budget=2 * MEMORY_PER_THREAD,
+        batch_size=1,
+        batch_wait=0,
+    )
+
+    try:
+        list(submit(wavs[:1], socket_path=socket_path))
+        runner.max_running = 0
+        list(submit(wavs[1:], socket_path=socket_path))
+    finally:
+        _stop_server(server)
+
+    assert len(runner.calls) == 5
+    assert runner.max_running == 1
+
+
+def test_submit_raises_on_invalid_files(tmp_path: Path):
+    """Test submit raises if the server rejects the files."""
+    socket_path = tmp_path / "server.sock"
+    server = _start_server(socket_path, FakeRunner())
+
+    try:
+        with pytest.raises(RuntimeError):
+            list(submit(tmp_path / "missing.wav", socket_path=socket_path))
+    finally:
+        _stop_server(server)
+
+
+def test_server_removes_socket_on_close(tmp_path: Path):
+    """Test the socket file is removed when the server is closed."""
+    socket_path = tmp_path / "server.sock"
+    server = _start_server(socket_path, FakeRunner())
+    assert socket_path.exists()
+
+    _stop_server(server)
+
+    assert not socket_path.exists()
@@ -0,0 +1,104 @@
+"""Tests for pytadarida.shared"""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida.parsing import parse_detections
+from pytadarida.shared import parse_detections_shared
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+TEST_FILE_VERSION2 = DATA_DIR / "ta_file_version_2.ta"
+
+
+def make_mapping(count: int, ta_file: Path = TEST_FILE_VERSION1):
+    """Map several .wav files to the same test .ta file."""
+    return {Path(f"file_{index}.wav"): ta_file for index in range(count)}
+
+
+def test_parse_detections_shared_matches_pandas():
+    """Test the result is the same as with parse_detections."""
+    mapping = make_mapping(10)
+
+    expected = parse_detections(mapping)
+    detections = parse_detections_shared(mapping, workers=2)
+
+    pd.testing.assert_frame_equal(detections, expected)
+
+
+def test_parse_detections_shared_with_columns():
+    """Test column projection works on files of different versions."""
+    mapping = {
+        Path("a.wav"): TEST_FILE_VERSION1,
+        Path("b.wav"): TEST_FILE_VERSION2,
+    }
+
+    expected = parse_detections(mapping, columns=["Fmin"])
+    detections = parse_detections_shared(mapping, columns=["Fmin"], workers=2)
+
+    pd.testing.assert_frame_equal(detections, expected)
+
+
+def test_parse_detections_shared_raises_with_missing_columns():
+    """Test a ValueError is raised if a requested column is missing."""
+    with pytest.raises(ValueError):
+        parse_detections_shared(make_mapping(2), columns=["NotAColumn"])
+
+
+def test_parse_detections_shared_raises_with_different_columns():
+    """Test files must have the same columns unless some are requested."""
+    mapping = {
+        Path("a.wav"): TEST_FILE_VERSION1,
+        Path("b.wav"): TEST_FILE_VERSION2,
+    }
+
+    with pytest.raises(ValueError):
+        parse_detections_shared(mapping)
+
+
+def test_parse_detections_uses_workers():
+    """Test parse_detections can parse in worker processes."""
+    mapping = make_mapping(3)
+
+    pd.testing.assert_frame_equal(
+        parse_detections(mapping, workers=2),
+        parse_detections(mapping),
+    )
+
+
+def test_parse_detections_shared_mixed_integer_column(tmp_path: Path):
+    """Test a column is only integer if all its values are integers."""
+    lines = TEST_FILE_VERSION1.read_text().splitlines()
+    header = lines[0].split("\t")
+    start, dur = header.index("StTime"), header.index("Dur")
+
+    rows = [line.split("\t") for line in lines[1:4]]
+    rows[0][start] = "3"
+    rows[1][0] = "other.wav"
+    rows[2][dur] = "NaN"
+
+    ta_file = tmp_path / "mixed.ta"
+    ta_file.write_text(
+        "\n".join("\t".join(row) for row in [header, *rows]) + "\n"
+    )
+    mapping = {Path("mixed.wav"): ta_file}
+
+    expected = parse_detections(mapping)
+    detections = parse_detections_shared(mapping, workers=1)
+
+    pd.testing.assert_frame_equal(detections, expected)
+    assert detections["StTime"].tolist() == [3.0, 12.29, 18.64]
+    assert detections["Filename"].tolist()[1] == "other.wav"
+
+
+def test_parse_detections_shared_float_columns_are_views():
+    """Test float columns are not copied out of the shared block."""
+    detections = parse_detections_shared(make_mapping(2), workers=1)
+
+    base = detections["StTime"].to_numpy()
+    while getattr(base, "base", None) is not None:
+        base = base.base
+
+    assert type(base).__name__ == "_BlockOwner"
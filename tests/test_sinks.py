@@ -0,0 +1,69 @@
+"""Tests for pytadarida.sinks"""
+import importlib.util
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import BatchResult
+from pytadarida.parsing import parse_detections
+from pytadarida.sinks import ParquetSink, SqliteSink, TsvSink, open_sink
+from pytadarida.store import DetectionStore
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+
+
+def make_result(*wavs: Path) -> BatchResult:
+    """Build the result of a batch from a test .ta file."""
+    return BatchResult(
+        files=list(wavs),
+        detections=parse_detections({wav: TEST_FILE_VERSION1 for wav in wavs}),
+        status=RunStatus("", "", ""),
+        elapsed=0.0,
+    )
+
+
+def test_tsv_sink_appends_batches_under_one_header(tmp_path: Path):
+    """Test batches written by several sinks share a single header."""
+    path = tmp_path / "detections.tsv"
+
+    with TsvSink(path) as sink:
+        sink.write(make_result(Path("a.wav")))
+
+    with TsvSink(path) as sink:
+        sink.write(make_result(Path("b.wav")))
+
+    detections = pd.read_csv(path, sep="\t")
+    assert list(detections["wav"].unique()) == ["a.wav", "b.wav"]
+
+
+def test_sqlite_sink_writes_to_store(tmp_path: Path):
+    """Test batches are written to a detection store."""
+    path = tmp_path / "detections.db"
+
+    with SqliteSink(path) as sink:
+        sink.write(make_result(Path("a.wav")))
+
+    with DetectionStore(path) as store:
+        assert store.processed_files() == {Path("a.wav")}
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("pyarrow") is not None,
+    reason="pyarrow is installed",
+)
+def test_parquet_sink_requires_pyarrow(tmp_path: Path):
+    """Test a clear error is raised if pyarrow is missing."""
+    with pytest.raises(ImportError):
+        ParquetSink(tmp_path / "detections")
+
+
+def test_open_sink_chooses_format_from_suffix(tmp_path: Path):
+    """Test the sink is chosen from the suffix of the output."""
+    assert isinstance(open_sink(tmp_path / "out.tsv"), TsvSink)
+
+    with pytest.raises(ValueError):
+        open_sink(tmp_path / "out.unknown")
@@ -0,0 +1,127 @@
+"""Tests for pytadarida.store"""
+from pathlib import Path
+
+import pandas as pd
+
+from pytadarida.logs import RunStatus
+from pytadarida.parallel import BatchResult
+from pytadarida.parsing import parse_detections
+from pytadarida.store import DetectionStore
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TEST_FILE_VERSION1 = DATA_DIR / "ta_file_version_1.ta"
+TEST_FILE_VERSION2 = DATA_DIR / "ta_file_version_2.ta"
+
+
+def make_detections(*wavs: Path, ta_file: Path = TEST_FILE_VERSION1):
+    """Parse a test .ta file as if it was the output of each wav file."""
+    return parse_detections({wav: ta_file for wav in wavs})
+
+
+def test_add_batch_stores_detections_and_files(tmp_path: Path):
+    """Test detections and processed files are stored."""
+    detections = make_detections(Path("a.wav"), Path("b.wav"))
+
+    with DetectionStore(tmp_path / "store.db") as store:
+        store.add_batch(detections, [Path("a.wav"), Path("b.wav")])
+        stored = store.query()
+        processed = store.processed_files()
+
+    assert len(stored) == len(detections)
+    assert set(stored["wav"]) == {"a.wav", "b.wav"}
+    assert processed == {Path("a.wav"), Path("b.wav")}
+
+
+def test_query_filters_by_file_time_and_frequency(tmp_path: Path):
+    """Test the query conditions match those applied with pandas."""
+    detections = make_detections(Path("a.wav"), Path("b.wav"))
+
+    with DetectionStore(tmp_path / "store.db") as store:
+        store.add_batch(detections, [Path("a.wav"), Path("b.wav")])
+        stored = store.query(
+            wav="a.wav",
+            start=1,
+            end=20,
+            fmin=100,
+            columns=["wav", "StTime"],
+        )
+
+    expected = detections[
+        (detections["wav"] == Path("a.wav"))
+        & (detections["StTime"] >= 1)
+        & (detections["StTime"] <= 20)
+        & (detections["Fmax"] >= 100)
+    ]
+    assert list(stored.columns) == ["wav", "StTime"]
+    assert list(stored["StTime"]) == list(expected["StTime"])
+
+
+def test_add_batch_replaces_previous_results(tmp_path: Path):
+    """Test writing a batch again does not duplicate detections."""
+    detections = make_detections(Path("a.wav"))
+
+    with DetectionStore(tmp_path / "store.db") as store:
+        store.add_batch(detections, [Path("a.wav")])
+        store.add_batch(detections, [Path("a.wav")])
+
+        assert len(store.query()) == len(detections)
+
+
+def test_add_batch_adds_new_columns(tmp_path: Path):
+    """Test .ta files with different columns can be stored together."""
+    with DetectionStore(tmp_path / "store.db") as store:
+        store.add_batch(make_detections(Path("a.wav")), [Path("a.wav")])
+        store.add_batch(
+            make_detections(Path("b.wav"), ta_file=TEST_FILE_VERSION2),
+            [Path("b.wav")],
+        )
+
+        columns = set(store.columns)
+
+    assert set(parse_detections({Path("b.wav"): TEST_FILE_VERSION2})) <= (
+        columns
+    )
+
+
+def test_add_result_records_skipped_files(tmp_path: Path):
+    """Test files skipped by the pre-screen are recorded as processed."""
+    skipped = [Path("quiet.wav")]
+    result = BatchResult(
+        files=skipped,
+        detections=pd.DataFrame(),
+        status=RunStatus("", "", "", skipped=skipped),
+        elapsed=0.0,
+    )
+
+    with DetectionStore(tmp_path / "store.db") as store:
+        store.add_result(result)
+
+        assert store.processed_files() == set(skipped)
+        assert store.query().empty
+
+
+def test_store_can_be_read_while_writing(tmp_path: Path):
+    """Test readers see the committed data while a write is in progress."""
+    path = tmp_path / "store.db"
+    detections = make_detections(Path("a.wav"))
+
+    with DetectionStore(path) as writer, DetectionStore(path) as reader:
+        writer.add_batch(detections, [Path("a.wav")])
+
+        writer.connection.execute("BEGIN IMMEDIATE")
+        writer.connection.execute("DELETE FROM detections")
+
+        assert len(reader.query()) == len(detections)
+
+        writer.connection.execute("ROLLBACK")
+
+
+def test_metadata_is_stored(tmp_path: Path):
+    """Test metadata values persist across connections."""
+    with DetectionStore(tmp_path / "store.db") as store:
+        assert store.get_metadata("key") is None
+        store.set_metadata("key", "value")
+
+    with DetectionStore(tmp_path / "store.db") as store:
+        assert store.get_metadata("key") == "value"